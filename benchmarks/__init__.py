@@ -0,0 +1,85 @@
+"""Benchmarks of genshinstats.
+
+Every benchmark runs against a local mock server, so no cookies or authkeys are required.
+Run them all with `python -m benchmarks` or pick some by name, see `python -m benchmarks --help`.
+
+A benchmark is a generator function named `bench_*` which takes in the mock server.
+It prepares everything, yields the operation to measure and cleans up afterwards.
+"""
+import importlib
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, List, NamedTuple, Tuple
+
+__all__ = ["Result", "measure", "collect"]
+
+MODULES = [
+    "bench_fetch",
+    "bench_wishes",
+    "bench_caching",
+    "bench_errors",
+    "bench_export",
+    "bench_analytics",
+    "bench_pretty",
+    "bench_all_user_data",
+]
+
+Benchmark = Callable[[Any], Iterator[Callable[[], Any]]]
+
+
+class Result(NamedTuple):
+    name: str
+    repeat: int
+    total: float
+    p50: float
+    p95: float
+    memory: int = 0  # bytes taken up by the result of the operation
+
+    @property
+    def ops(self) -> float:
+        return self.repeat / self.total if self.total else float("inf")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<40} {self.ops:>10.1f} ops/s"
+            f"   p50 {self.p50 * 1000:>8.3f} ms   p95 {self.p95 * 1000:>8.3f} ms"
+            f"   mem {self.memory / 1024:>9.1f} KiB"
+        )
+
+
+def measure(name: str, op: Callable[[], Any], repeat: int) -> Result:
+    """Calls an operation repeat times and measures how long every call took.
+
+    The memory is measured separately, tracing allocations slows everything down.
+    """
+    op()  # warmup
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        op()
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    tracemalloc.start()
+    try:
+        result = op()
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return Result(name, repeat, sum(timings), statistics.median(timings), p95, memory)
+
+
+def collect(names: List[str] = None) -> Iterator[Tuple[str, Benchmark]]:
+    """Yields all benchmarks, optionally only the ones that contain one of the names"""
+    for module_name in MODULES:
+        module = importlib.import_module(f".{module_name}", __name__)
+        for attr, func in vars(module).items():
+            if not attr.startswith("bench_"):
+                continue
+            name = f"{module_name[len('bench_'):]}.{attr[len('bench_'):]}"
+            if not names or any(n in name for n in names):
+                yield name, func
@@ -0,0 +1,33 @@
+"""Runs the benchmarks against a local mock server.
+
+python -m benchmarks [--latency SECONDS] [--repeat N] [--quick] [names...]
+"""
+import argparse
+
+import genshinstats as gs
+
+from . import collect, measure
+from .mockserver import MockServer
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+parser.add_argument("names", nargs="*", help="only run benchmarks containing one of these names")
+parser.add_argument("--latency", type=float, default=0.0, help="latency of every request in seconds")
+parser.add_argument("--repeat", type=int, default=50, help="how many times to run every benchmark")
+parser.add_argument("--quick", action="store_true", help="run every benchmark only a few times")
+parser.add_argument("--ratelimit", action="store_true", help="keep the client-side ratelimits")
+args = parser.parse_args()
+
+if not args.ratelimit:
+    # the benchmarks would only measure how long the ratelimiter waits
+    gs.set_ratelimiter(None)
+
+repeat = 3 if args.quick else args.repeat
+
+for name, bench in collect(args.names):
+    with MockServer(latency=args.latency) as server, server.patch():
+        gen = bench(server)
+        op = next(gen)
+        try:
+            print(measure(name, op, repeat), flush=True)
+        finally:
+            gen.close()
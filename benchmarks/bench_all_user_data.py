@@ -0,0 +1,19 @@
+"""Latency of get_all_user_data, best measured with --latency"""
+from typing import Any, Callable, Iterator
+
+import genshinstats as gs
+from genshinstats import genshinstats as api
+
+UID = 710785423
+
+
+def bench_serial(server: Any) -> Iterator[Callable[[], Any]]:
+    gs.set_cookie(ltuid=1, ltoken="bench")
+    yield lambda: api.get_all_user_data(UID, max_workers=1)
+    gs.set_cookies()
+
+
+def bench_concurrent(server: Any) -> Iterator[Callable[[], Any]]:
+    gs.set_cookie(ltuid=1, ltoken="bench")
+    yield lambda: api.get_all_user_data(UID, max_workers=4)
+    gs.set_cookies()
@@ -0,0 +1,37 @@
+"""Pity statistics of many users at once"""
+from typing import Any, Callable, Dict, Iterator, List
+
+from genshinstats import analytics, export, pretty
+
+from . import fixtures
+
+USERS = 100
+PULLS = 1000
+
+
+def _pages() -> List[List[Dict[str, Any]]]:
+    return [fixtures.wish_history_page(301, PULLS, size=PULLS, uid=uid)["list"] for uid in range(USERS)]
+
+
+def bench_pull_by_pull(server: Any) -> Iterator[Callable[[], Any]]:
+    # how pity is usually counted, see examples/pity_calculator.py
+    pulls = [p for page in _pages() for p in pretty.prettify_wish_history(page, "Character Event Wish")]
+
+    def count() -> Dict[int, List[int]]:
+        stats: Dict[int, List[int]] = {}
+        for pull in reversed(pulls):
+            s = stats.setdefault(pull["uid"], [0, 0, 0])
+            s[0] += 1
+            s[1] = 0 if pull["rarity"] == 5 else s[1] + 1
+            s[2] = 0 if pull["rarity"] >= 4 else s[2] + 1
+        return stats
+
+    yield count
+
+
+def bench_analyze(server: Any) -> Iterator[Callable[[], Any]]:
+    columns = export.Columns(export.WISH_SCHEMA)
+    for page in _pages():
+        export._append(columns, page, export._WISH_FIELDS)
+        columns.extend_column("banner", ["Character Event Wish"] * len(page))
+    yield lambda: analytics.analyze_wish_history(columns)
@@ -0,0 +1,40 @@
+"""Overhead of cache hits, the wrapped functions never run during the measurement"""
+import inspect
+from typing import Any, Callable, Iterator
+
+from genshinstats.caching import _make_key_builder, cache_func, permanent_cache
+
+CALLS = 10000
+
+
+def get_data(uid: int, equipment: bool = False, lang: str = "en-us", cookie: Any = None) -> Any:
+    return uid
+
+
+def bench_signature_bind(server: Any) -> Iterator[Callable[[], Any]]:
+    # how keys were built before they were compiled, for comparison
+    sig = inspect.signature(get_data)
+
+    def make_key(*args: Any, **kwargs: Any) -> Any:
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple(v for k, v in bound.arguments.items() if k != "cookie")
+
+    yield lambda: [make_key(1, lang="en-us") for _ in range(CALLS)]
+
+
+def bench_key_builder(server: Any) -> Iterator[Callable[[], Any]]:
+    make_key = _make_key_builder(get_data, lambda name: name != "cookie", ("get_data",))
+    yield lambda: [make_key(1, lang="en-us") for _ in range(CALLS)]
+
+
+def bench_cache_func_hit(server: Any) -> Iterator[Callable[[], Any]]:
+    cached = cache_func(get_data, {})
+    cached(1, lang="en-us")
+    yield lambda: [cached(1, lang="en-us") for _ in range(CALLS)]
+
+
+def bench_permanent_cache_hit(server: Any) -> Iterator[Callable[[], Any]]:
+    cached = permanent_cache("lang")(get_data)
+    cached(1, lang="en-us")
+    yield lambda: [cached(1, lang="en-us") for _ in range(CALLS)]
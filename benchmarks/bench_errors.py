@@ -0,0 +1,53 @@
+"""The error path, which runs for every rejected request when the api is ratelimiting us"""
+from typing import Any, Callable, Iterator
+
+import genshinstats as gs
+from genshinstats.errors import _errors, raise_for_error
+
+CALLS = 10000
+REQUESTS = 100
+
+response = {"retcode": 10101, "message": "Too many requests", "data": None}
+
+
+def _raise_all(func: Callable[[], Any]) -> None:
+    for _ in range(CALLS):
+        try:
+            func()
+        except gs.GenshinStatsException:
+            pass
+
+
+def bench_error_table(server: Any) -> Iterator[Callable[[], Any]]:
+    # how errors were raised before the registry, a table of every error was built per call
+    def raise_error() -> None:
+        table = {retcode: cls(msg) for (retcode, _), (cls, msg) in _errors.items()}
+        error = table.get(response["retcode"], gs.GenshinStatsException("{} Error ({})"))
+        error.set_response(response)
+        raise error
+
+    yield lambda: _raise_all(raise_error)
+
+
+def bench_raise_for_error(server: Any) -> Iterator[Callable[[], Any]]:
+    yield lambda: _raise_all(lambda: raise_for_error(response, "/game_record/", "0123456789abcdef"))
+
+
+def bench_raise_for_error_unknown(server: Any) -> Iterator[Callable[[], Any]]:
+    unknown = {"retcode": 12345, "message": "Unknown error", "data": None}
+    yield lambda: _raise_all(lambda: raise_for_error(unknown))
+
+
+def bench_ratelimited_requests(server: Any) -> Iterator[Callable[[], Any]]:
+    cookie = {"ltuid": "ratelimited", "ltoken": "mock"}
+    server.ratelimited.add("ratelimited")
+
+    def run() -> None:
+        for _ in range(REQUESTS):
+            try:
+                gs.get_notes(710785423, cookie=cookie)
+            except gs.TooManyRequests:
+                pass
+
+    yield run
+    server.ratelimited.discard("ratelimited")
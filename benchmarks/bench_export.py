@@ -0,0 +1,62 @@
+"""Building tables of a large wish history, from dicts and from columns"""
+import csv
+import io
+import json
+from typing import Any, Callable, Iterator, List
+
+from genshinstats import export, pretty
+
+from . import fixtures
+
+ROWS = 10000
+FIELDS = ["id", "uid", "time", "banner_type", "rarity", "type", "name", "banner"]
+
+
+def _pages() -> str:
+    pulls = fixtures.wish_history_page(301, ROWS, size=ROWS)["list"]
+    return json.dumps([pulls[i : i + 20] for i in range(0, ROWS, 20)])
+
+
+def _columns(pages: List[Any]) -> export.Columns:
+    columns = export.Columns(export.WISH_SCHEMA)
+    for page in pages:
+        export._append(columns, page, export._WISH_FIELDS)
+        columns.extend_column("banner", ["Character Event Wish"] * len(page))
+    return columns
+
+
+def bench_dicts(server: Any) -> Iterator[Callable[[], Any]]:
+    data = _pages()
+    yield lambda: [
+        pull
+        for page in json.loads(data)
+        for pull in pretty.prettify_wish_history(page, "Character Event Wish")
+    ]
+
+
+def bench_columns(server: Any) -> Iterator[Callable[[], Any]]:
+    data = _pages()
+    yield lambda: _columns(json.loads(data))
+
+
+def bench_csv_dicts(server: Any) -> Iterator[Callable[[], Any]]:
+    # how examples/wish_export.py writes a csv file
+    pages = json.loads(_pages())
+
+    def write() -> None:
+        writer = csv.DictWriter(io.StringIO(), FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for page in pages:
+            writer.writerows(pretty.prettify_wish_history(page, "Character Event Wish"))
+
+    yield write
+
+
+def bench_csv_columns(server: Any) -> Iterator[Callable[[], Any]]:
+    pages = json.loads(_pages())
+    yield lambda: export.write_csv(_columns(pages), io.StringIO())
+
+
+def bench_binary_columns(server: Any) -> Iterator[Callable[[], Any]]:
+    pages = json.loads(_pages())
+    yield lambda: export.write_binary(_columns(pages), io.BytesIO())
@@ -0,0 +1,35 @@
+"""Throughput of fetch_endpoint with one or many threads"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+import genshinstats as gs
+from genshinstats import genshinstats as api
+
+UID = 710785423
+BATCH = 16
+
+
+def fetch_notes(uid: int = UID) -> Any:
+    return api.fetch_game_record_endpoint(
+        "genshin/api/dailyNote", params=dict(server="os_euro", role_id=uid)
+    )
+
+
+def bench_fetch_endpoint(server: Any) -> Iterator[Callable[[], Any]]:
+    gs.set_cookie(ltuid=1, ltoken="bench")
+    yield fetch_notes
+    gs.set_cookies()
+
+
+def bench_serial(server: Any) -> Iterator[Callable[[], Any]]:
+    gs.set_cookies(*[dict(ltuid=i, ltoken="bench") for i in range(4)])
+    yield lambda: [fetch_notes(UID + i) for i in range(BATCH)]
+    gs.set_cookies()
+
+
+def bench_threaded(server: Any) -> Iterator[Callable[[], Any]]:
+    gs.set_cookies(*[dict(ltuid=i, ltoken="bench") for i in range(4)])
+    with ThreadPoolExecutor(8) as executor:
+        # different uids so the requests are not coalesced
+        yield lambda: list(executor.map(lambda i: fetch_notes(UID + i), range(BATCH)))
+    gs.set_cookies()
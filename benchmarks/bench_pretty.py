@@ -0,0 +1,74 @@
+"""Speed of the prettifiers on large payloads.
+
+Payloads of histories are parsed inside of the operation, so the memory only includes the prettified rows.
+The projections only read a single field, which lazy views get without prettifying the rest.
+"""
+import json
+from typing import Any, Callable, Iterator
+
+from genshinstats import pretty
+from genshinstats.lazy import LazyView
+
+from . import fixtures
+
+
+def bench_stats(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.user_stats()
+    yield lambda: pretty.prettify_stats(data)
+
+
+def bench_characters(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.characters()["avatars"]
+    yield lambda: pretty.prettify_characters(data)
+
+
+def bench_abyss(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.spiral_abyss()
+    yield lambda: pretty.prettify_abyss(data)
+
+
+def bench_wish_history(server: Any) -> Iterator[Callable[[], Any]]:
+    data = json.dumps(fixtures.wish_history_page(301, 10000, size=10000)["list"])
+    yield lambda: pretty.prettify_wish_history(json.loads(data), "Character Event Wish")
+
+
+def bench_wish_history_records(server: Any) -> Iterator[Callable[[], Any]]:
+    data = json.dumps(fixtures.wish_history_page(301, 10000, size=10000)["list"])
+    yield lambda: pretty.prettify_wish_history(json.loads(data), "Character Event Wish", True)
+
+
+def bench_transactions(server: Any) -> Iterator[Callable[[], Any]]:
+    data = json.dumps(fixtures.transactions_page("getPrimogemLog", 10000, size=10000)["list"])
+    reasons = {int(k.split("_")[-1]): v for k, v in fixtures.reasons().items()}
+    yield lambda: pretty.prettify_trans(json.loads(data), reasons)
+
+
+def bench_transactions_records(server: Any) -> Iterator[Callable[[], Any]]:
+    data = json.dumps(fixtures.transactions_page("getPrimogemLog", 10000, size=10000)["list"])
+    reasons = {int(k.split("_")[-1]): v for k, v in fixtures.reasons().items()}
+    yield lambda: pretty.prettify_trans(json.loads(data), reasons, True)
+
+
+def bench_banner_details(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.banner_details()
+    yield lambda: pretty.prettify_banner_details(data)
+
+
+def bench_tcg(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.tcg(cards=2000)
+    yield lambda: pretty.prettyify_tcg(data)
+
+
+def bench_stats_projection(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.user_stats()
+    yield lambda: pretty.prettify_stats(data)["stats"]["achievements"]
+
+
+def bench_stats_projection_lazy(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.user_stats()
+    yield lambda: LazyView(data, "stats")["stats"]["achievements"]
+
+
+def bench_tcg_projection_lazy(server: Any) -> Iterator[Callable[[], Any]]:
+    data = fixtures.tcg(cards=2000)
+    yield lambda: LazyView(data, "tcg")["stats"]["level"]
@@ -0,0 +1,35 @@
+"""Pagination of the wish history, with and without a cache"""
+from typing import Any, Callable, Iterator
+
+from genshinstats import caching, wishes
+
+AUTHKEY = "bench"
+
+
+def bench_wish_history(server: Any) -> Iterator[Callable[[], Any]]:
+    yield lambda: list(wishes.get_wish_history(301, authkey=AUTHKEY))
+
+
+def bench_wish_history_all(server: Any) -> Iterator[Callable[[], Any]]:
+    yield lambda: list(wishes.get_wish_history(authkey=AUTHKEY))
+
+
+def bench_wish_history_prefetch(server: Any) -> Iterator[Callable[[], Any]]:
+    yield lambda: list(wishes.get_wish_history(authkey=AUTHKEY, prefetch=100))
+
+
+def bench_cache_paginator(server: Any) -> Iterator[Callable[[], Any]]:
+    caching.install_cache({})
+    try:
+        # the warmup call fills the cache, only the head page is requested afterwards
+        yield lambda: list(wishes.get_wish_history(301, authkey=AUTHKEY))
+    finally:
+        caching.uninstall_cache()
+
+
+def bench_cache_paginator_strict(server: Any) -> Iterator[Callable[[], Any]]:
+    caching.install_cache({}, strict=True)
+    try:
+        yield lambda: list(wishes.get_wish_history(301, authkey=AUTHKEY))
+    finally:
+        caching.uninstall_cache()
@@ -0,0 +1,470 @@
+"""Payloads of the mihoyo apis.
+
+Every fixture has the same shape as a recorded api response.
+Sizes can be scaled up to make benchmarks over large payloads.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from genshinstats.characters import _SNAPSHOT
+
+CHARACTER_IDS = [i for i in _SNAPSHOT if i not in (10000005, 10000007)]
+ELEMENTS = ["Anemo", "Geo", "Electro", "Dendro", "Hydro", "Pyro", "Cryo"]
+BANNERS = {100: "Novice Wishes", 200: "Permanent Wish", 301: "Character Event Wish", 302: "Weapon Event Wish"}
+START_TIME = datetime(2020, 9, 28, 10)
+
+
+def user_stats(characters: int = 40) -> Dict[str, Any]:
+    """genshin/api/index"""
+    return {
+        "role": {"nickname": "sadru", "level": 60, "region": "os_euro", "AvatarUrl": ""},
+        "stats": {
+            "achievement_number": 700,
+            "active_day_number": 900,
+            "avatar_number": characters,
+            "spiral_abyss": "12-3",
+            "anemoculus_number": 66,
+            "geoculus_number": 131,
+            "electroculus_number": 181,
+            "dendroculus_number": 271,
+            "hydroculus_number": 271,
+            "common_chest_number": 1500,
+            "exquisite_chest_number": 1200,
+            "precious_chest_number": 400,
+            "luxurious_chest_number": 150,
+            "magic_chest_number": 60,
+            "way_point_number": 300,
+            "domain_number": 50,
+        },
+        "avatars": [
+            {
+                "id": id,
+                "name": _SNAPSHOT[id],
+                "rarity": 105 if id == 10000062 else 4 + i % 2,
+                "element": ELEMENTS[i % len(ELEMENTS)],
+                "level": 90,
+                "fetter": 10,
+                "actived_constellation_num": i % 7,
+                "image": f"https://upload-os-bbs.mihoyo.com/game_record/genshin/character_image/UI_AvatarIcon_{id}@2x.png",
+            }
+            for i, id in enumerate(CHARACTER_IDS[:characters])
+        ],
+        "homes": [
+            {
+                "name": name,
+                "icon": "",
+                "level": 10,
+                "comfort_num": 20000,
+                "comfort_level_name": "Fit for a King",
+                "comfort_level_icon": "",
+                "item_num": 3000,
+                "visit_num": 0,
+            }
+            for name in ("Floating Abode", "Emerald Peak")
+        ],
+        "world_explorations": [
+            {
+                "id": i,
+                "name": f"Region {i}",
+                "exploration_percentage": 1000,
+                "type": "Reputation",
+                "level": 10,
+                "icon": "",
+                "inner_icon": "",
+                "offerings": [],
+            }
+            for i in range(1, 11)
+        ],
+    }
+
+
+def characters(ids: List[int] = None) -> Dict[str, Any]:
+    """genshin/api/character"""
+    ids = ids or CHARACTER_IDS
+    return {
+        "avatars": [
+            {
+                "id": id,
+                "name": _SNAPSHOT.get(id, "Traveler"),
+                "rarity": 105 if id == 10000062 else 4 + i % 2,
+                "element": ELEMENTS[i % len(ELEMENTS)],
+                "level": 90,
+                "fetter": 10,
+                "icon": f"https://upload-os-bbs.mihoyo.com/game_record/genshin/character_icon/UI_AvatarIcon_{id}.png",
+                "image": "",
+                "constellations": [
+                    {
+                        "id": id % 1000 * 10 + c,
+                        "name": f"Constellation {c}",
+                        "effect": "Increases the level of a talent by 3.",
+                        "is_actived": c <= i % 7,
+                        "pos": c,
+                        "icon": "",
+                    }
+                    for c in range(1, 7)
+                ],
+                "weapon": {
+                    "id": 11509,
+                    "name": "Mistsplitter Reforged",
+                    "rarity": 5,
+                    "type_name": "Sword",
+                    "level": 90,
+                    "promote_level": 6,
+                    "affix_level": 1,
+                    "desc": "A sword that cuts through the mist.",
+                    "icon": "",
+                },
+                "reliquaries": [
+                    {
+                        "id": 81000 + pos,
+                        "name": f"Artifact {pos}",
+                        "pos": pos,
+                        "pos_name": f"Position {pos}",
+                        "rarity": 5,
+                        "level": 20,
+                        "icon": "",
+                        "set": {
+                            "id": 15020,
+                            "name": "Emblem of Severed Fate",
+                            "affixes": [
+                                {"activation_number": 2, "effect": "Energy Recharge +20%"},
+                                {"activation_number": 4, "effect": "Increases Burst DMG."},
+                            ],
+                        },
+                    }
+                    for pos in range(1, 6)
+                ],
+                "costumes": [],
+            }
+            for i, id in enumerate(ids)
+        ]
+    }
+
+
+def spiral_abyss(schedule_id: int = 1) -> Dict[str, Any]:
+    """genshin/api/spiralAbyss"""
+    rank = [
+        {"avatar_id": id, "avatar_icon": "", "value": 50 - i, "rarity": 5}
+        for i, id in enumerate(CHARACTER_IDS[:4])
+    ]
+    return {
+        "schedule_id": schedule_id,
+        "start_time": "1633046400",
+        "end_time": "1634342399",
+        "total_battle_times": 12,
+        "total_win_times": 12,
+        "max_floor": "12-3",
+        "total_star": 36,
+        "reveal_rank": rank,
+        "defeat_rank": rank,
+        "damage_rank": rank,
+        "take_damage_rank": rank,
+        "normal_skill_rank": rank,
+        "energy_skill_rank": rank,
+        "floors": [
+            {
+                "index": floor,
+                "icon": "",
+                "star": 9,
+                "max_star": 9,
+                "levels": [
+                    {
+                        "index": chamber,
+                        "star": 3,
+                        "max_star": 3,
+                        "battles": [
+                            {
+                                "index": half,
+                                "timestamp": str(1633046400 + floor * 1000 + chamber * 100 + half),
+                                "avatars": [
+                                    {"id": id, "icon": "", "level": 90, "rarity": 5}
+                                    for id in CHARACTER_IDS[half * 4 : half * 4 + 4]
+                                ],
+                            }
+                            for half in (1, 2)
+                        ],
+                    }
+                    for chamber in (1, 2, 3)
+                ],
+            }
+            for floor in (9, 10, 11, 12)
+        ],
+    }
+
+
+def notes() -> Dict[str, Any]:
+    """genshin/api/dailyNote"""
+    return {
+        "current_resin": 80,
+        "max_resin": 160,
+        "resin_recovery_time": "38400",
+        "finished_task_num": 4,
+        "total_task_num": 4,
+        "is_extra_task_reward_received": True,
+        "remain_resin_discount_num": 3,
+        "resin_discount_num_limit": 3,
+        "current_expedition_num": 5,
+        "max_expedition_num": 5,
+        "expeditions": [
+            {"avatar_side_icon": "", "status": "Ongoing", "remained_time": "3600"} for _ in range(5)
+        ],
+        "current_home_coin": 1200,
+        "max_home_coin": 2400,
+        "home_coin_recovery_time": "72000",
+        "transformer": {
+            "obtained": True,
+            "recovery_time": {"Day": 3, "Hour": 0, "Minute": 0, "Second": 0, "reached": False},
+        },
+    }
+
+
+def activities() -> Dict[str, Any]:
+    """genshin/api/activities"""
+    return {
+        "activities": [
+            {
+                "sumo": {
+                    "exists_data": True,
+                    "records": [
+                        {
+                            "challenge_id": i,
+                            "challenge_name": f"Challenge {i}",
+                            "difficulty": 4,
+                            "heraldry_icon": "",
+                            "max_score": 3000,
+                            "score_multiple": 300,
+                            "lineups": [
+                                {
+                                    "avatars": [
+                                        {"id": id, "icon": "", "level": 90, "rarity": 4, "is_trail_avatar": False}
+                                        for id in CHARACTER_IDS[team * 4 : team * 4 + 4]
+                                    ],
+                                    "skills": [{"id": 1, "name": "Skill", "desc": "", "icon": ""}],
+                                }
+                                for team in (0, 1)
+                            ],
+                        }
+                        for i in range(1, 7)
+                    ],
+                }
+            }
+        ]
+    }
+
+
+def tcg_basic() -> Dict[str, Any]:
+    """genshin/api/gcg/basicInfo"""
+    return {
+        "level": 12,
+        "avatar_card_num_gained": 30,
+        "avatar_card_num_total": 40,
+        "action_card_num_gained": 150,
+        "action_card_num_total": 200,
+        "replays": [
+            {
+                "game_id": i,
+                "self": {"name": "sadru", "linups": ["", "", ""]},
+                "opposite": {"name": "Opponent", "linups": ["", "", ""]},
+                "match_type": "Friendly",
+                "match_time": {"year": 2023, "month": 1, "day": 1, "hour": 12, "minute": 0, "second": 0},
+                "is_win": i % 2 == 0,
+            }
+            for i in range(2)
+        ],
+    }
+
+
+def tcg(cards: int = 265) -> Dict[str, Any]:
+    """genshin/api/gcg/cardList"""
+    types = ["CardTypeCharacter", "CardTypeModify", "CardTypeAssist", "CardTypeEvent"]
+    elements = ["Fire", "Water", "Ice", "Electric", "Wind", "Rock", "Grass"]
+    return {
+        "stats": tcg_basic(),
+        "card_list": [
+            {
+                "id": 1000 + i,
+                "name": f"Card {i}",
+                "desc": "",
+                "image": "",
+                "card_type": types[i % 4],
+                "num": i % 3,
+                "use_count": i,
+                "proficiency": i % 5,
+                "hp": 10,
+                "tags": [f"UI_Gcg_Tag_Element_{elements[i % 7]}", "UI_Gcg_Tag_Weapon_Sword"],
+                "card_skills": [{"name": "Normal Attack", "desc": "", "tag": "Normal Attack"}],
+                "card_wiki": "",
+                "action_cost": [{"cost_type": "CostTypeSame", "cost_value": i % 4}],
+            }
+            for i in range(cards)
+        ],
+    }
+
+
+def langs() -> Dict[str, Any]:
+    """community/misc/wapi/langs"""
+    return {"langs": [{"name": "English", "value": "en-us"}, {"name": "Deutsch", "value": "de-de"}]}
+
+
+def banner_types() -> Dict[str, Any]:
+    """gacha_info getConfigList"""
+    return {
+        "gacha_type_list": [{"id": str(k), "key": str(k), "name": v} for k, v in BANNERS.items()]
+    }
+
+
+def wish_history_page(
+    banner_type: int, total: int, end_id: int = 0, size: int = 20, uid: int = 710785423
+) -> Dict[str, Any]:
+    """gacha_info getGachaLog
+
+    Every banner has `total` pulls, the newest pull has the highest index.
+    Pulls of different banners are interleaved in time.
+    """
+    banner = list(BANNERS).index(banner_type) if banner_type in BANNERS else 0
+    first = total - 1
+    if end_id:
+        first = (end_id - 1600000000000000000) // 10 - 1
+    indexes = range(first, max(first - size, -1), -1)
+    return {
+        "page": "1",
+        "size": str(size),
+        "total": "0",
+        "list": [
+            {
+                "uid": str(uid),
+                "gacha_type": str(banner_type),
+                "item_id": "",
+                "count": "1",
+                "time": (START_TIME + timedelta(minutes=i * 10 + banner)).strftime("%Y-%m-%d %H:%M:%S"),
+                "name": _SNAPSHOT[CHARACTER_IDS[i % len(CHARACTER_IDS)]] if i % 10 == 9 else "Cool Steel",
+                "lang": "en-us",
+                "item_type": "Character" if i % 10 == 9 else "Weapon",
+                "rank_type": "5" if i % 80 == 79 else "4" if i % 10 == 9 else "3",
+                "id": str(1600000000000000000 + i * 10 + banner),
+            }
+            for i in indexes
+        ],
+        "region": "os_euro",
+    }
+
+
+def transactions_page(
+    endpoint: str, total: int, end_id: int = 0, size: int = 20, uid: int = 710785423
+) -> Dict[str, Any]:
+    """ysulog get*Log, artifact and weapon logs also contain item names"""
+    first = total - 1
+    if end_id:
+        first = (end_id - 1600000000000000000) // 10 - 1
+    items = endpoint in ("getArtifactLog", "getWeaponLog")
+    return {
+        "list": [
+            {
+                "uid": str(uid),
+                "time": (START_TIME + timedelta(minutes=i * 10)).strftime("%Y-%m-%d %H:%M:%S"),
+                "add_num": str(-160 if i % 2 else 60),
+                "reason": str(1001 + i % 20),
+                "id": str(1600000000000000000 + i * 10),
+                **({"name": "Cool Steel", "rank": "3"} if items else {}),
+            }
+            for i in range(first, max(first - size, -1), -1)
+        ],
+        "region": "os_euro",
+    }
+
+
+def reasons() -> Dict[str, str]:
+    """mi18n translations"""
+    return {f"selfinquiry_general_reason_{i}": f"Reason {i}" for i in range(1001, 1021)}
+
+
+def gacha_items() -> List[Dict[str, Any]]:
+    """webstatic gacha items"""
+    return [
+        {"item_id": str(id - 10000000 + 1000), "name": name, "item_type": "Character", "rank_type": "5"}
+        for id, name in _SNAPSHOT.items()
+    ]
+
+
+def banner_details(gacha_type: int = 301) -> Dict[str, Any]:
+    """webstatic banner details"""
+    item = lambda name, rank, up: {
+        "item_type": "Character" if rank > 3 else "Weapon",
+        "item_name": name,
+        "rank": str(rank),
+        "is_up": int(up),
+        "order_value": rank,
+    }
+    return {
+        "gacha_type": gacha_type,
+        "title": "<color=#FFFFFF>Event Wish \"Ballad in Goblets\"</color>",
+        "content": "",
+        "date_range": "2021/09/01 10:00:00 ~ 2021/09/21 17:59:59",
+        "r5_up_prob": "0.300%",
+        "r4_up_prob": "2.550%",
+        "r5_prob": "0.600%",
+        "r4_prob": "5.100%",
+        "r3_prob": "94.300%",
+        "r5_baodi_prob": "1.600%",
+        "r4_baodi_prob": "13.000%",
+        "r3_baodi_prob": "85.400%",
+        "r5_up_items": [{"item_type": "Character", "item_name": "Venti", "item_attr": "风", "item_img": ""}],
+        "r4_up_items": [
+            {"item_type": "Character", "item_name": name, "item_attr": attr, "item_img": ""}
+            for name, attr in (("Xiangling", "火"), ("Noelle", "岩"), ("Razor", "雷"))
+        ],
+        "r5_prob_list": [item("Venti", 5, True)] + [item(n, 5, False) for n in ("Diluc", "Jean", "Keqing")],
+        "r4_prob_list": [item(n, 4, n == "Razor") for n in ("Razor", "Noelle", "Barbara", "Fischl")],
+        "r3_prob_list": [item(n, 3, False) for n in ("Cool Steel", "Slingshot", "Debate Club")],
+    }
+
+
+def daily_info() -> Dict[str, Any]:
+    """sol info"""
+    return {"total_sign_day": 3, "today": "2021-10-01", "is_sign": False, "first_bind": False}
+
+
+def monthly_rewards() -> Dict[str, Any]:
+    """sol home"""
+    return {"month": 10, "awards": [{"icon": "", "name": "Primogem", "cnt": 20} for _ in range(31)]}
+
+
+def claimed_rewards() -> Dict[str, Any]:
+    """sol award"""
+    return {
+        "total": 3,
+        "list": [
+            {"id": i, "name": "Primogem", "cnt": 20, "icon": "", "created_at": "2021-10-01 00:00:00"}
+            for i in range(3)
+        ],
+    }
+
+
+def map_info() -> Dict[str, Any]:
+    """map info"""
+    return {"info": {"detail": json.dumps({"slices": [[{"url": "https://example.com/map.png"}]]})}}
+
+
+def character_names() -> Dict[str, Any]:
+    """ambr.top avatar"""
+    return {"response": 200, "data": {"items": {str(k): {"name": v} for k, v in _SNAPSHOT.items()}}}
+
+
+def game_accounts(levels: Tuple[int, ...] = (60, 8)) -> Dict[str, Any]:
+    """binding getUserGameRolesByCookie"""
+    return {
+        "list": [
+            {
+                "game_biz": "hk4e_global",
+                "region": "os_euro",
+                "game_uid": str(710785423 + i),
+                "nickname": f"Player {i}",
+                "level": level,
+                "is_chosen": i == 0,
+                "region_name": "Europe Server",
+                "is_official": True,
+            }
+            for i, level in enumerate(levels)
+        ]
+    }
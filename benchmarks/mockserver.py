@@ -0,0 +1,328 @@
+"""A local stand-in for the mihoyo apis.
+
+Serves the payloads from `benchmarks.fixtures` over http so genshinstats can be
+tested and benchmarked without touching the real endpoints.
+
+Usage:
+>>> with MockServer(latency=0.05) as server, server.patch():
+...     gs.set_cookie(ltuid=1, ltoken="token")
+...     gs.get_user_stats(710785423)
+
+Errors can be injected with `fail` and known api errors are reproduced:
+authkeys "invalid" and "expired" return -100 and -101,
+cookies with an ltuid from `ratelimited` return 10101.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from . import fixtures
+
+__all__ = ["MockServer", "MockError"]
+
+Handler = Callable[[Dict[str, str], Dict[str, Any], Dict[str, str]], Any]
+
+# every url constant of genshinstats and the prefix it is served under
+URLS: Dict[Tuple[str, str], str] = {
+    ("genshinstats", "OS_TAKUMI_URL"): "takumi/",
+    ("genshinstats", "CN_TAKUMI_URL"): "takumi/",
+    ("genshinstats", "OS_GAME_RECORD_URL"): "game_record/",
+    ("genshinstats", "CN_GAME_RECORD_URL"): "game_record/",
+    ("wishes", "GACHA_INFO_URL"): "gacha_info/",
+    ("wishes", "GACHA_STATIC_URL"): "gacha_static/",
+    ("transactions", "YSULOG_URL"): "ysulog/",
+    ("transactions", "REASONS_URL"): "mi18n/{lang}.json",
+    ("daily", "OS_URL"): "sol/",
+    ("daily", "CN_URL"): "sol/",
+    ("map", "OS_MAP_URL"): "map/",
+    ("characters", "AMBR_AVATAR_URL"): "ambr/{lang}/avatar",
+    ("hoyolab", "OS_BINDING_URL"): "takumi/binding/api/",
+    ("hoyolab", "CN_BINDING_URL"): "takumi/binding/api/",
+    ("hoyolab", "REDEEM_URL"): "apicdkey/webExchangeCdkey",
+    ("aio", "OS_TAKUMI_URL"): "takumi/",
+    ("aio", "CN_TAKUMI_URL"): "takumi/",
+    ("aio", "OS_GAME_RECORD_URL"): "game_record/",
+    ("aio", "CN_GAME_RECORD_URL"): "game_record/",
+    ("aio", "GACHA_INFO_URL"): "gacha_info/",
+    ("aio", "YSULOG_URL"): "ysulog/",
+    ("aio", "REASONS_URL"): "mi18n/{lang}.json",
+}
+
+# routes which need a cookie or an authkey
+COOKIE_ROUTES = ("game_record/", "takumi/binding/", "sol/", "apicdkey/")
+AUTHKEY_ROUTES = ("gacha_info/", "ysulog/")
+
+
+class MockError(Exception):
+    """An api error returned by a route"""
+
+    def __init__(self, retcode: int, message: str) -> None:
+        super().__init__(retcode, message)
+        self.retcode = retcode
+        self.message = message
+
+
+class MockServer:
+    """A threaded http server which mimics the mihoyo apis.
+
+    `latency` is the amount of seconds every request takes to respond.
+    `wishes` and `transactions` are the amount of items in every paginated log.
+    Requests are counted per route in `requests` and opened connections in `connections`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,
+        wishes: int = 200,
+        transactions: int = 200,
+        fixture_dir: str = None,
+    ) -> None:
+        self.latency = latency
+        self.wishes = wishes
+        self.transactions = transactions
+        self.requests: Counter = Counter()
+        self.connections = 0
+        self.ratelimited: Set[str] = set()
+        self.signed_in: Set[str] = set()  # ltuids which claimed their daily reward
+        self.redeemed: Set[Tuple[str, str]] = set()  # uids and codes
+        self.renew_cookies: Dict[str, str] = {}  # cookies set by every response
+        self._failures: Dict[str, List[Tuple[int, int, str, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Handler] = self._default_routes()
+        if fixture_dir is not None:
+            self.load_fixtures(fixture_dir)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def route(self, path: str, handler: Handler) -> None:
+        """Sets the handler of a route.
+
+        Handlers take in the query, the json body and the cookies and return the data of the response.
+        They may raise MockError to return an error instead.
+        """
+        self._routes[path] = handler
+
+    def fail(
+        self,
+        path: str,
+        retcode: int = -1,
+        message: str = "error",
+        times: int = 1,
+        status: int = 200,
+        retry_after: float = None,
+    ) -> None:
+        """Makes the next few requests to a route return an error.
+
+        The error may also have an http status and a Retry-After header.
+        """
+        with self._lock:
+            self._failures.setdefault(path, []).extend([(status, retcode, message, retry_after)] * times)
+
+    def load_fixtures(self, directory: str) -> None:
+        """Serves recorded responses instead of the generated ones.
+
+        Every json file is a route with slashes replaced by dots, e.g. `game_record.genshin.api.index.json`.
+        The file contains the data of a response, without the retcode and message.
+        """
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(directory, filename), encoding="utf-8") as file:
+                data = json.load(file)
+            self.route(filename[: -len(".json")].replace(".", "/"), lambda q, b, c, data=data: data)
+
+    @contextmanager
+    def patch(self) -> Iterator["MockServer"]:
+        """Points all url constants of the loaded genshinstats modules to this server"""
+        original: Dict[Tuple[str, str], str] = {}
+        for (module_name, attr), path in URLS.items():
+            module = sys.modules.get(f"genshinstats.{module_name}")
+            if module is None or not hasattr(module, attr):
+                continue
+            original[module_name, attr] = getattr(module, attr)
+            setattr(module, attr, self.url + path)
+        try:
+            yield self
+        finally:
+            for (module_name, attr), value in original.items():
+                setattr(sys.modules[f"genshinstats.{module_name}"], attr, value)
+
+    def _respond(
+        self, path: str, query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        """Returns a status code, the json response and extra headers of a request"""
+        with self._lock:
+            self.requests[path] += 1
+            failures = self._failures.get(path)
+            if failures:
+                status, retcode, message, retry_after = failures.pop(0)
+                headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+                return status, {"retcode": retcode, "message": message, "data": None}, headers
+
+        status, data = self._respond_ok(path, query, body, cookies)
+        return status, data, {}
+
+    def _respond_ok(
+        self, path: str, query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]
+    ) -> Tuple[int, Any]:
+        if path.startswith(COOKIE_ROUTES):
+            if "ltuid" not in cookies and "account_id" not in cookies:
+                return 200, {"retcode": 10001, "message": "Please login", "data": None}
+            if cookies.get("ltuid") in self.ratelimited:
+                return 200, {"retcode": 10101, "message": "Too many requests", "data": None}
+        if path.startswith(AUTHKEY_ROUTES):
+            authkey = query.get("authkey")
+            if not authkey or authkey == "invalid":
+                return 200, {"retcode": -100, "message": "authkey error", "data": None}
+            if authkey == "expired":
+                return 200, {"retcode": -101, "message": "authkey timeout", "data": None}
+
+        handler = self._routes.get(path)
+        if handler is None:
+            # routes with wildcards are only checked if there's no exact match
+            handler = next((h for p, h in self._routes.items() if "*" in p and fnmatch(path, p)), None)
+        if handler is None:
+            return 404, {"retcode": -1, "message": f"Unknown route {path}", "data": None}
+        try:
+            data = handler(query, body, cookies)
+        except MockError as e:
+            return 200, {"retcode": e.retcode, "message": e.message, "data": None}
+        if path.startswith(("gacha_static/", "mi18n/", "ambr/")):
+            return 200, data  # static files are not wrapped
+        return 200, {"retcode": 0, "message": "OK", "data": data}
+
+    def _make_handler(self) -> type:
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body are sent separately
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def handle_request(self) -> None:
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                cookies = dict(
+                    c.strip().split("=", 1)
+                    for c in (self.headers.get("Cookie") or "").split(";")
+                    if "=" in c
+                )
+                if server.latency:
+                    time.sleep(server.latency)
+
+                status, data, headers = server._respond(url.path.lstrip("/"), query, body, cookies)
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                for name, value in server.renew_cookies.items():
+                    self.send_header("Set-Cookie", f"{name}={value}; Path=/")
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return RequestHandler
+
+    def _default_routes(self) -> Dict[str, Handler]:
+        def wish_history(query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]) -> Any:
+            return fixtures.wish_history_page(
+                int(query["gacha_type"]),
+                self.wishes,
+                int(query.get("end_id") or 0),
+                int(query.get("size") or 20),
+            )
+
+        def transaction_log(endpoint: str) -> Handler:
+            return lambda query, body, cookies: fixtures.transactions_page(
+                endpoint,
+                self.transactions,
+                int(query.get("end_id") or 0),
+                int(query.get("size") or 20),
+            )
+
+        def sign(query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]) -> Any:
+            with self._lock:
+                self.signed_in.add(cookies.get("ltuid", ""))
+            return {"code": "ok"}
+
+        def info(query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]) -> Any:
+            return {**fixtures.daily_info(), "is_sign": cookies.get("ltuid", "") in self.signed_in}
+
+        def redeem(query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]) -> Any:
+            with self._lock:
+                if (query["uid"], query["cdkey"]) in self.redeemed:
+                    raise MockError(-2017, "Redemption code has been claimed already.")
+                self.redeemed.add((query["uid"], query["cdkey"]))
+            return {"msg": "Redeemed successfully"}
+
+        def awards(query: Dict[str, str], body: Dict[str, Any], cookies: Dict[str, str]) -> Any:
+            return fixtures.claimed_rewards() if query.get("current_page", "1") == "1" else {"list": []}
+
+        routes: Dict[str, Handler] = {
+            "game_record/genshin/api/index": lambda q, b, c: fixtures.user_stats(),
+            "game_record/genshin/api/character": lambda q, b, c: fixtures.characters(b.get("character_ids")),
+            "game_record/genshin/api/spiralAbyss": lambda q, b, c: fixtures.spiral_abyss(),
+            "game_record/genshin/api/dailyNote": lambda q, b, c: fixtures.notes(),
+            "game_record/genshin/api/activities": lambda q, b, c: fixtures.activities(),
+            "game_record/genshin/api/gcg/basicInfo": lambda q, b, c: fixtures.tcg_basic(),
+            "game_record/genshin/api/gcg/cardList": lambda q, b, c: fixtures.tcg(),
+            "takumi/community/misc/wapi/langs": lambda q, b, c: fixtures.langs(),
+            "gacha_info/getConfigList": lambda q, b, c: fixtures.banner_types(),
+            "gacha_info/getGachaLog": wish_history,
+            "mi18n/en-us.json": lambda q, b, c: fixtures.reasons(),
+            "gacha_static/items/en-us.json": lambda q, b, c: fixtures.gacha_items(),
+            "gacha_static/*/en-us.json": lambda q, b, c: fixtures.banner_details(),
+            "sol/info": info,
+            "sol/home": lambda q, b, c: fixtures.monthly_rewards(),
+            "sol/award": awards,
+            "sol/sign": sign,
+            "map/info": lambda q, b, c: fixtures.map_info(),
+            "ambr/en/avatar": lambda q, b, c: fixtures.character_names(),
+            "takumi/binding/api/getUserGameRolesByCookie": lambda q, b, c: fixtures.game_accounts(),
+            "apicdkey/webExchangeCdkey": redeem,
+        }
+        for endpoint in ("getPrimogemLog", "getCrystalLog", "getResinLog", "getArtifactLog", "getWeaponLog"):
+            routes[f"ysulog/{endpoint}"] = transaction_log(endpoint)
+        return routes
@@ -2,13 +2,8 @@
 import genshinstats as gs
 
 banners = gs.get_banner_types()
-for banner_type, banner_name in banners.items():
-    print("\n" + banner_name)
-    since = 0
-    for pull in gs.get_wish_history(banner_type):
-        since += 1
-        if pull["rarity"] == 5:
-            print(f"{since} pulls since 5*, {90-since} until pity")
-            break
-    else:
-        print(f"Pulled a 5* a long time ago or never, less than {90-since} until pity")
+columns = gs.wish_history_to_columns()
+for stats in gs.analyze_wish_history(columns):
+    print("\n" + banners.get(stats.banner_type, str(stats.banner_type)))
+    print(f"{stats.pity5} pulls since 5*, {90 - stats.pity5} until pity")
+    print(f"{stats.pity4} pulls since 4*, {10 - stats.pity4} until pity")
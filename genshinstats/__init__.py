@@ -1,18 +1,172 @@
 """Wrapper for the Genshin Impact's api.
 
-This is an unofficial wrapper for the Genshin Impact gameRecord and wish history api. 
+This is an unofficial wrapper for the Genshin Impact gameRecord and wish history api.
 Majority of the endpoints are implemented, documented and typehinted.
 
 All endpoints require to be logged in with either a cookie or an authkey, read the README.md for more info.
 
 https://github.com/nitolar/genshinstats/
 """
-from .caching import *
-from .daily import *
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from . import errors
 from .errors import *
-from .genshinstats import *
-from .hoyolab import *
-from .map import *
-from .transactions import *
-from .utils import *
-from .wishes import *
+
+if TYPE_CHECKING:
+    from .aio import *
+    from .analytics import *
+    from .batch import *
+    from .caching import *
+    from .characters import *
+    from .cookiepool import *
+    from .daily import *
+    from .export import *
+    from .genshinstats import *
+    from .hoyolab import *
+    from .lazy import *
+    from .map import *
+    from .ratelimit import *
+    from .records import *
+    from .scheduler import *
+    from .transactions import *
+    from .utils import *
+    from .wishes import *
+    from .wishstore import *
+
+# submodules are only imported once one of their members is accessed
+# this keeps the import fast since most programs only need a small part of genshinstats
+_exports: Dict[str, List[str]] = {
+    "aio": ["AsyncGenshinClient"],
+    "analytics": ["BannerStats", "analyze_wish_history"],
+    "batch": [
+        "fetch_many",
+        "get_user_stats_many",
+        "get_characters_many",
+        "get_spiral_abyss_many",
+        "get_notes_many",
+    ],
+    "caching": ["permanent_cache", "install_cache", "uninstall_cache", "SqliteCache"],
+    "characters": ["get_character_name", "get_character_names", "refresh_character_names"],
+    "cookiepool": ["CookiePool"],
+    "daily": [
+        "fetch_daily_endpoint",
+        "get_daily_reward_info",
+        "get_claimed_rewards",
+        "get_monthly_rewards",
+        "claim_daily_reward",
+    ],
+    "export": [
+        "Columns",
+        "iter_wish_history_columns",
+        "wish_history_to_columns",
+        "iter_transaction_columns",
+        "transactions_to_columns",
+        "write_csv",
+        "write_binary",
+        "read_binary",
+    ],
+    "genshinstats": [
+        "set_cookie",
+        "set_cookies",
+        "get_browser_cookies",
+        "set_cookies_auto",
+        "set_cookie_auto",
+        "set_transport",
+        "fetch_endpoint",
+        "get_user_stats",
+        "get_characters",
+        "get_spiral_abyss",
+        "get_notes",
+        "get_activities",
+        "get_tcg",
+        "get_tcg_basic",
+        "get_all_user_data",
+    ],
+    "hoyolab": [
+        "get_langs",
+        "search",
+        "set_visibility",
+        "hoyolab_check_in",
+        "get_game_accounts",
+        "get_record_card",
+        "get_uid_from_hoyolab_uid",
+        "redeem_code",
+        "get_recommended_users",
+        "get_hot_posts",
+    ],
+    "lazy": ["LazyView", "LazyList"],
+    "map": [
+        "fetch_map_endpoint",
+        "get_map_image",
+        "get_map_icons",
+        "get_map_labels",
+        "get_map_locations",
+        "get_map_points",
+        "get_map_tile",
+    ],
+    "pretty": [],
+    "ratelimit": [
+        "Limit",
+        "MemoryBackend",
+        "SqliteBackend",
+        "RateLimiter",
+        "get_family",
+        "get_ratelimiter",
+        "set_ratelimiter",
+    ],
+    "records": ["Record", "Wish", "Transaction", "ItemTransaction"],
+    "scheduler": ["AccountResult", "claim_daily_rewards", "redeem_codes", "time_until_reset"],
+    "transactions": [
+        "fetch_transaction_endpoint",
+        "get_primogem_log",
+        "get_resin_log",
+        "get_crystal_log",
+        "get_artifact_log",
+        "get_weapon_log",
+        "current_resin",
+        "approximate_current_resin",
+    ],
+    "utils": [
+        "USER_AGENT",
+        "recognize_server",
+        "recognize_id",
+        "is_game_uid",
+        "is_chinese",
+        "get_datafile",
+        "SingleFlight",
+        "RetryPolicy",
+    ],
+    "wishes": [
+        "extract_authkey",
+        "get_authkey",
+        "set_authkey",
+        "get_banner_ids",
+        "fetch_gacha_endpoint",
+        "get_banner_types",
+        "get_wish_history",
+        "get_gacha_items",
+        "get_banner_details",
+        "get_uid_from_authkey",
+        "validate_authkey",
+    ],
+    "wishstore": ["WishHistoryStore"],
+}
+_members = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = [*errors.__all__, *_members]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _exports:
+        return importlib.import_module(f".{name}", __name__)
+    if name not in _members:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{_members[name]}", __name__), name)
+    globals()[name] = value  # later accesses won't need to go through __getattr__
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__) | set(_exports))
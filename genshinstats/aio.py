@@ -0,0 +1,439 @@
+"""Asynchronous client for the genshin api.
+
+Mirrors the blocking functions of genshinstats with awaitable methods,
+so a single event loop can drive hundreds of requests at once.
+Requires the optional library aiohttp.
+"""
+import asyncio
+import sys
+from http.cookies import SimpleCookie
+from typing import Any, AsyncGenerator, Dict, List, Mapping, Union
+from urllib.parse import urljoin, urlsplit
+
+from .cookiepool import CookiePool, _get_cookie_id
+from .errors import NotLoggedIn, TooManyRequests, raise_for_error
+from .genshinstats import (
+    CN_DS_SALT,
+    CN_GAME_RECORD_URL,
+    CN_TAKUMI_URL,
+    OS_DS_SALT,
+    OS_GAME_RECORD_URL,
+    OS_TAKUMI_URL,
+    generate_cn_ds,
+    generate_ds,
+)
+from .pretty import (
+    prettify_abyss,
+    prettify_activities,
+    prettify_characters,
+    prettify_notes,
+    prettify_stats,
+    prettify_trans,
+    prettify_wish_history,
+)
+from .ratelimit import reserve
+from .transactions import REASONS_URL, YSULOG_URL, _parse_reasons
+from .utils import USER_AGENT, RetryPolicy, _parse_retry_after, is_chinese, recognize_server
+from .wishes import GACHA_INFO_URL, _get_short_lang_code
+
+__all__ = ["AsyncGenshinClient"]
+
+
+class AsyncGenshinClient:
+    """An asynchronous genshinstats client.
+
+    Usage:
+    >>> async with AsyncGenshinClient(cookies=[{"ltuid": ..., "ltoken": ...}]) as client:
+    ...     stats = await client.get_user_stats(uid)
+    ...     async for pull in client.get_wish_history(authkey=...):
+    ...         ...
+
+    Multiple cookies are cycled between the same way `set_cookies` does,
+    requests are paced by the same ratelimiter and retried like the blocking ones.
+    The amount of simultaneous connections is limited by `limit`.
+    """
+
+    def __init__(
+        self,
+        cookies: List[Union[Mapping[str, Any], str]] = None,
+        authkey: str = None,
+        limit: int = 100,
+    ) -> None:
+        try:
+            import aiohttp  # optional library
+        except ImportError:
+            raise ImportError(
+                'AsyncGenshinClient requires "aiohttp". '
+                'To use it please install the dependency with "pip install aiohttp".'
+            )
+        self._aiohttp = aiohttp
+        self._session: Any = None
+        self.limit = limit
+        self.authkey = authkey
+        self.cookies = CookiePool()
+        # retries connection errors, server errors and internal errors with a backoff, per endpoint
+        self.retry_policy = RetryPolicy(3, aiohttp.ClientConnectionError)
+        self.set_cookies(*(cookies or []))
+        self._banner_types: Dict[str, Dict[int, str]] = {}
+        self._reasons: Dict[str, Dict[int, str]] = {}
+
+    async def __aenter__(self) -> "AsyncGenshinClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the underlying http session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def set_cookies(self, *args: Union[Mapping[str, Any], str], clear: bool = True) -> None:
+        """Sets multiple cookies at once to cycle between. Same as genshinstats.set_cookies"""
+        if clear:
+            self.cookies.clear()
+
+        for cookie in args:
+            if isinstance(cookie, Mapping):
+                cookie = {k: str(v) for k, v in cookie.items()}  # SimpleCookie needs a string
+            self.cookies.append({k: v.value for k, v in SimpleCookie(cookie).items()})
+
+    def _get_session(self) -> Any:
+        # sessions must be created inside of a running event loop
+        if self._session is None:
+            self._session = self._aiohttp.ClientSession(
+                headers={"user-agent": USER_AGENT},
+                connector=self._aiohttp.TCPConnector(limit=self.limit),
+                # cookies are sent per request, the session must not mix them up
+                cookie_jar=self._aiohttp.DummyCookieJar(),
+            )
+        return self._session
+
+    async def _throttle(self, url: str, key: Any = None) -> None:
+        # the ratelimiter sleeps when asked to wait, that would block the whole event loop
+        delay = reserve(url, key)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Fancy aiohttp request"""
+        key = urlsplit(url).path
+        return await self.retry_policy.acall(key, self._send, method, url, **kwargs)
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> Any:
+        async with self._get_session().request(method, url, **kwargs) as r:
+            r.raise_for_status()
+            data = await r.json(content_type=None)
+
+        if data["retcode"] == 0:
+            return data["data"]
+        cookies = kwargs.get("cookies")
+        raise_for_error(
+            data,
+            urlsplit(url).path,
+            _get_cookie_id(cookies) if cookies is not None else None,
+            _parse_retry_after(r.headers.get("Retry-After")),
+        )
+
+    async def fetch_endpoint(
+        self, endpoint: str, chinese: bool = False, cookie: Mapping[str, Any] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Fetch an enpoint from the API. Same as genshinstats.fetch_endpoint"""
+        kwargs.setdefault("headers", {})
+        method = kwargs.pop("method", "get")
+        if chinese:
+            kwargs["headers"].update(
+                {
+                    "ds": generate_cn_ds(CN_DS_SALT, kwargs.get("json"), kwargs.get("params")),
+                    "x-rpc-app_version": "2.11.1",
+                    "x-rpc-client_type": "5",
+                }
+            )
+            url = urljoin(CN_TAKUMI_URL, endpoint)
+        else:
+            kwargs["headers"].update(
+                {
+                    "ds": generate_ds(OS_DS_SALT),
+                    "x-rpc-app_version": "1.5.0",
+                    "x-rpc-client_type": "4",
+                }
+            )
+            url = urljoin(OS_TAKUMI_URL, endpoint)
+        kwargs["headers"].setdefault("x-rpc-language", "en-us")
+
+        if cookie is not None:
+            cookie = {k: str(v) for k, v in cookie.items()}
+            await self._throttle(url, _get_cookie_id(cookie))
+            return await self._request(method, url, cookies=cookie, **kwargs)
+        elif len(self.cookies) == 0:
+            raise NotLoggedIn("Login cookies have not been provided")
+
+        # the quota is only used up by requests for other accounts
+        account = kwargs.get("params", {}).get("role_id") or (kwargs.get("json") or {}).get("role_id")
+        account = int(account) if account else None
+        while True:
+            # the pool is shared by every task, only the cookie which failed is exhausted
+            cookie = self.cookies.acquire(account)  # raises TooManyRequests if there's none left
+            try:
+                await self._throttle(url, _get_cookie_id(cookie))
+                return await self._request(method, url, cookies=cookie, **kwargs)
+            except TooManyRequests:
+                self.cookies.exhaust(cookie)
+            finally:
+                self.cookies.release(cookie)
+
+    async def fetch_game_record_endpoint(
+        self, endpoint: str, chinese: bool = False, cookie: Mapping[str, Any] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """A short-hand for fetching data for the game record"""
+        base_url = CN_GAME_RECORD_URL if chinese else OS_GAME_RECORD_URL
+        url = urljoin(base_url, endpoint)
+        return await self.fetch_endpoint(url, chinese, cookie, **kwargs)
+
+    async def get_user_stats(
+        self, uid: int, equipment: bool = False, lang: str = "en-us", cookie: Mapping[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Gets basic user information and stats. Same as genshinstats.get_user_stats"""
+        data = await self.fetch_game_record_endpoint(
+            "genshin/api/index",
+            chinese=is_chinese(uid),
+            cookie=cookie,
+            params=dict(server=recognize_server(uid), role_id=uid),
+            headers={"x-rpc-language": lang},
+        )
+        data = prettify_stats(data)
+        if equipment:
+            data["characters"] = await self.get_characters(
+                uid, [i["id"] for i in data["characters"]], lang, cookie
+            )
+        return data
+
+    async def get_characters(
+        self,
+        uid: int,
+        character_ids: List[int] = None,
+        lang: str = "en-us",
+        cookie: Mapping[str, Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """Gets characters of a user. Same as genshinstats.get_characters"""
+        if character_ids is None:
+            stats = await self.get_user_stats(uid, cookie=cookie)
+            character_ids = [i["id"] for i in stats["characters"]]
+
+        data = await self.fetch_game_record_endpoint(
+            "genshin/api/character",
+            chinese=is_chinese(uid),
+            cookie=cookie,
+            method="POST",
+            json=dict(character_ids=character_ids, role_id=uid, server=recognize_server(uid)),
+            headers={"x-rpc-language": lang},
+        )
+        return prettify_characters(data["avatars"])
+
+    async def get_spiral_abyss(
+        self, uid: int, previous: bool = False, cookie: Mapping[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Gets spiral abyss runs of a user. Same as genshinstats.get_spiral_abyss"""
+        data = await self.fetch_game_record_endpoint(
+            "genshin/api/spiralAbyss",
+            chinese=is_chinese(uid),
+            cookie=cookie,
+            params=dict(
+                server=recognize_server(uid), role_id=uid, schedule_type=2 if previous else 1
+            ),
+        )
+        return prettify_abyss(data)
+
+    async def get_activities(
+        self, uid: int, lang: str = "en-us", cookie: Mapping[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Gets the activities of the user. Same as genshinstats.get_activities"""
+        data = await self.fetch_game_record_endpoint(
+            "genshin/api/activities",
+            chinese=is_chinese(uid),
+            cookie=cookie,
+            params=dict(server=recognize_server(uid), role_id=uid),
+            headers={"x-rpc-language": lang},
+        )
+        return prettify_activities(data)
+
+    async def get_notes(
+        self, uid: int, lang: str = "en-us", cookie: Mapping[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Gets the real-time notes of the user. Same as genshinstats.get_notes"""
+        data = await self.fetch_game_record_endpoint(
+            "genshin/api/dailyNote",
+            chinese=is_chinese(uid),
+            cookie=cookie,
+            params=dict(server=recognize_server(uid), role_id=uid),
+            headers={"x-rpc-language": lang},
+        )
+        return prettify_notes(data)
+
+    async def fetch_gacha_endpoint(
+        self, endpoint: str, authkey: str = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Fetch an enpoint from mihoyo's gacha info. Same as genshinstats.fetch_gacha_endpoint
+
+        Unlike the blocking version the authkey is never read from the game's logfile.
+        """
+        authkey = authkey or self.authkey
+        if authkey is None:
+            raise NotLoggedIn("An authkey has not been provided")
+
+        # same as the default params of the blocking gacha session
+        kwargs["params"] = {
+            "authkey_ver": "1",
+            "lang": "en",
+            "sign_type": "2",
+            **kwargs.get("params", {}),
+            "authkey": authkey,
+        }
+        method = kwargs.pop("method", "get")
+        url = urljoin(GACHA_INFO_URL, endpoint)
+        await self._throttle(url, authkey)
+        return await self._request(method, url, **kwargs)
+
+    async def get_banner_types(self, authkey: str = None, lang: str = "en") -> Dict[int, str]:
+        """Gets ids for all banners and their names"""
+        if lang not in self._banner_types:
+            data = await self.fetch_gacha_endpoint(
+                "getConfigList", authkey=authkey, params=dict(lang=_get_short_lang_code(lang))
+            )
+            self._banner_types[lang] = {int(i["key"]): i["name"] for i in data["gacha_type_list"]}
+        return self._banner_types[lang]
+
+    async def get_wish_history(
+        self,
+        banner_type: int = None,
+        size: int = None,
+        authkey: str = None,
+        end_id: int = 0,
+        lang: str = "en",
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Gets wish history. Same as genshinstats.get_wish_history
+
+        Pulls are yielded by an async iterator.
+        When no banner_type is set, every banner is fetched and pulls are sorted by time.
+        """
+        if size is not None and size <= 0:
+            return
+
+        if banner_type is None:
+            # an async equivalent of heapq.merge, there are only a few banners
+            # so the newest pull can be simply picked out of the heads of every history
+            gens = [
+                self.get_wish_history(banner, None, authkey, end_id, lang)
+                for banner in await self.get_banner_types(authkey)
+            ]
+            heads: Dict[Any, Dict[str, Any]] = {}
+
+            async def advance(gen: Any) -> None:
+                try:
+                    heads[gen] = await gen.__anext__()
+                except StopAsyncIteration:
+                    heads.pop(gen, None)
+
+            try:
+                for gen in gens:
+                    await advance(gen)
+
+                size = size or sys.maxsize
+                while heads and size > 0:
+                    gen = max(heads, key=lambda x: heads[x]["time"])
+                    yield heads[gen]
+                    size -= 1
+                    await advance(gen)
+            finally:
+                # histories which weren't exhausted must be closed inside of the event loop
+                for gen in gens:
+                    await gen.aclose()
+            return
+
+        banner_name = (await self.get_banner_types(authkey, lang))[banner_type]
+        lang = _get_short_lang_code(lang)
+        page_size = 20
+        size = size or sys.maxsize
+
+        while True:
+            data = await self.fetch_gacha_endpoint(
+                "getGachaLog",
+                authkey=authkey,
+                params=dict(
+                    gacha_type=banner_type, size=min(page_size, size), end_id=end_id, lang=lang
+                ),
+            )
+            data = prettify_wish_history(data["list"], banner_name)
+            for pull in data:
+                yield pull
+
+            size -= page_size
+            if len(data) < page_size or size <= 0:
+                break
+
+            end_id = data[-1]["id"]
+
+    async def _get_reasons(self, lang: str = "en-us") -> Dict[int, str]:
+        if lang not in self._reasons:
+            async with self._get_session().get(REASONS_URL.format(lang=lang)) as r:
+                r.raise_for_status()
+                self._reasons[lang] = _parse_reasons(await r.json(content_type=None))
+        return self._reasons[lang]
+
+    async def _get_transactions(
+        self, endpoint: str, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """A paginator that uses mihoyo's id paginator algorithm to yield pages"""
+        if size is not None and size <= 0:
+            return
+
+        reasons = await self._get_reasons(lang)
+        page_size = 20
+        size = size or sys.maxsize
+
+        while True:
+            data = await self.fetch_gacha_endpoint(
+                urljoin(YSULOG_URL, endpoint),
+                authkey=authkey,
+                params=dict(size=min(page_size, size), end_id=end_id),
+            )
+            data = prettify_trans(data["list"], reasons)
+            for transaction in data:
+                yield transaction
+
+            size -= page_size
+            if len(data) < page_size or size <= 0:
+                break
+
+            end_id = data[-1]["id"]
+
+    def get_primogem_log(
+        self, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Gets all transactions of primogems. Same as genshinstats.get_primogem_log"""
+        return self._get_transactions("getPrimogemLog", size, authkey, lang, end_id)
+
+    def get_crystal_log(
+        self, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Get all transactions of genesis crystals. Same as genshinstats.get_crystal_log"""
+        return self._get_transactions("getCrystalLog", size, authkey, lang, end_id)
+
+    def get_resin_log(
+        self, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Gets all usage of resin. Same as genshinstats.get_resin_log"""
+        return self._get_transactions("getResinLog", size, authkey, lang, end_id)
+
+    def get_artifact_log(
+        self, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Get the log of all artifacts gotten or destroyed. Same as genshinstats.get_artifact_log"""
+        return self._get_transactions("getArtifactLog", size, authkey, lang, end_id)
+
+    def get_weapon_log(
+        self, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Get the log of all weapons gotten or destroyed. Same as genshinstats.get_weapon_log"""
+        return self._get_transactions("getWeaponLog", size, authkey, lang, end_id)
@@ -0,0 +1,252 @@
+"""Pity, 50/50 and spending statistics of wish histories.
+
+Statistics are computed over the columns of genshinstats.export,
+which may contain the histories of many users at once.
+The pity of every pull is computed with numpy when it's installed,
+only the 4* and 5* pulls themselves are then looked at one by one.
+
+>>> columns = gs.wish_history_to_columns(authkey=...)
+>>> banners = [gs.get_banner_details(i) for i in gs.get_banner_ids()]
+>>> for stats in gs.analyze_wish_history(columns, banners):
+...     print(stats.banner_type, stats.pity5, stats.wins, stats.losses)
+"""
+from datetime import datetime
+from itertools import compress, groupby
+from operator import gt, itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .export import Columns
+
+__all__ = ["BannerStats", "analyze_wish_history"]
+
+# banners which share their pity
+PITY_GROUPS = {400: 301}
+# banners which have rate-up 5* items and therefore a 50/50
+EVENT_BANNERS = {301, 302}
+# a wish costs 160 primogems, novice wishes are discounted to 8 fates for 10 wishes
+PRIMOGEMS_PER_PULL = {100: 128}
+DEFAULT_PRIMOGEMS_PER_PULL = 160
+
+_EPOCH = datetime(1970, 1, 1)
+_is_rare = (3).__lt__  # 4* and 5*
+
+
+class BannerStats(NamedTuple):
+    """Statistics of a single user's banner, banners which share their pity are counted together"""
+
+    uid: int
+    banner_type: int
+    pulls: int
+    pity5: int  # pulls since the last 5*
+    pity4: int  # pulls since the last 4* or 5*
+    distribution5: List[int]  # the amount of 5* pulls at every pity
+    distribution4: List[int]
+    wins: int  # 5* pulls which won the 50/50
+    losses: int  # 5* pulls which lost the 50/50
+    guaranteed: int  # rate-up 5* pulls after a lost 50/50
+    next_guaranteed: bool  # whether the next 5* is a guaranteed rate-up
+    primogems: int  # primogems the pulls would have cost
+
+
+def _parse_date_range(date_range: str) -> Tuple[int, int]:
+    """Parses a date range of banner details into seconds like the export does"""
+    start, end = (
+        int((datetime.strptime(d.strip(), "%Y/%m/%d %H:%M:%S") - _EPOCH).total_seconds())
+        for d in date_range.split("~")
+    )
+    return start, end
+
+
+def _get_rate_ups(banners: Iterable[Dict[str, Any]]) -> Dict[int, List[Tuple[int, int, set]]]:
+    """Maps banner types to the time ranges of banners and their rate-up 5* items"""
+    rate_ups: Dict[int, List[Tuple[int, int, set]]] = {}
+    for banner in banners:
+        start, end = _parse_date_range(banner["date_range"])
+        items = {i["name"] for i in banner["r5_up_items"]}
+        group = PITY_GROUPS.get(banner["banner_type"], banner["banner_type"])
+        rate_ups.setdefault(group, []).append((start, end, items))
+    return rate_ups
+
+
+def _is_rate_up(rate_ups: List[Tuple[int, int, set]], name: str, time: int) -> Optional[bool]:
+    """Checks whether an item was a rate-up at the time, None if no banner was running"""
+    for start, end, items in rate_ups:
+        if start <= time <= end:
+            return name in items
+    return None
+
+
+class _Pulls(NamedTuple):
+    """Pulls sorted into groups of a user and a banner"""
+
+    groups: List[Tuple[int, int, int, int, int]]  # uid, banner type, pulls, 5* pity, 4* pity
+    rows: List[int]  # rows of 4* and 5* pulls
+    group_of: List[int]  # the group of every 4* and 5* pull
+    pity5: List[int]  # the pity at which every 4* and 5* pull was made
+    pity4: List[int]
+
+
+def _runs(values: Sequence[int], start: int = 0) -> Iterator[Tuple[int, int, int]]:
+    """Splits a column into runs of equal values, yields the value, start and end of every run"""
+    for value, run in groupby(values):
+        end = start + len(list(run))
+        yield value, start, end
+        start = end
+
+
+def _group_python(columns: Columns) -> _Pulls:
+    uids, ids, rarities = columns.arrays["uid"], columns.arrays["id"], columns.arrays["rarity"]
+    banner_types = columns.arrays["banner_type"]
+
+    # pulls of a user's banner are usually exported one after another, newest first
+    runs: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for uid, start, end in _runs(uids):
+        for banner_type, start, end in _runs(banner_types[start:end], start):
+            group = PITY_GROUPS.get(banner_type, banner_type)
+            runs.setdefault((uid, group), []).append((start, end))
+
+    groups: List[Tuple[int, int, int, int, int]] = []
+    pulls = _Pulls(groups, [], [], [], [])
+    for (uid, group), ranges in sorted(runs.items(), key=itemgetter(0)):
+        start, end = ranges[0]
+        order: Sequence[int]
+        if len(ranges) == 1 and all(map(gt, ids[start:end], ids[start + 1 : end])):
+            order = range(end - 1, start - 1, -1)
+            group_rarities = rarities[start:end].tobytes()[::-1]
+        else:
+            rows = sorted((i for start, end in ranges for i in range(start, end)), key=ids.__getitem__)
+            # banners which share their pity also share their history, the first row of a pull is kept
+            order = list({ids[i]: i for i in reversed(rows)}.values())[::-1]
+            group_rarities = bytes(rarities[i] for i in order)
+
+        # only 4* and 5* pulls are visited one by one
+        hits = list(compress(range(len(order)), map(_is_rare, group_rarities)))
+        last5 = -1
+        for i in hits:
+            pulls.pity5.append(i - last5)
+            if group_rarities[i] >= 5:
+                last5 = i
+        pulls.pity4.extend(map(int.__sub__, hits, [-1, *hits]))
+        pulls.rows.extend(map(order.__getitem__, hits))
+        pulls.group_of.extend([len(groups)] * len(hits))
+
+        last4 = hits[-1] if hits else -1
+        groups.append((uid, group, len(order), len(order) - 1 - last5, len(order) - 1 - last4))
+    return pulls
+
+
+def _group_numpy(columns: Columns, np: Any) -> _Pulls:
+    if not len(columns):
+        return _Pulls([], [], [], [], [])
+    uid = np.array(memoryview(columns.arrays["uid"]))
+    group = np.array(memoryview(columns.arrays["banner_type"])).astype(np.int64)
+    for banner_type, shared in PITY_GROUPS.items():
+        group[group == banner_type] = shared
+    id = np.array(memoryview(columns.arrays["id"]))
+    order = np.lexsort((id, group, uid))
+    uid, group, id = uid[order], group[order], id[order]
+
+    # banners which share their pity also share their history
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (id[1:] != id[:-1]) | (uid[1:] != uid[:-1]) | (group[1:] != group[:-1])
+    order, uid, group = order[keep], uid[keep], group[keep]
+    rarity = np.array(memoryview(columns.arrays["rarity"]))[order]
+
+    pos = np.arange(len(order))
+    is_start = np.ones(len(order), dtype=bool)
+    is_start[1:] = (uid[1:] != uid[:-1]) | (group[1:] != group[:-1])
+    first = np.maximum.accumulate(np.where(is_start, pos, 0))
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], len(order))
+
+    def pity(hits: Any) -> Tuple[Any, Any]:
+        # the position of the last hit before every pull, without crossing into another group
+        last = np.maximum.accumulate(np.where(hits, pos, -1))
+        before = np.empty_like(last)
+        before[:1] = -1
+        before[1:] = last[:-1]
+        at = pos - np.maximum(before, first - 1)
+        current = ends - 1 - np.maximum(last[ends - 1], starts - 1)
+        return at, current
+
+    pity5, current5 = pity(rarity >= 5)
+    pity4, current4 = pity(rarity >= 4)
+    hits = np.flatnonzero(rarity >= 4)
+    groups = zip(
+        uid[starts].tolist(),
+        group[starts].tolist(),
+        (ends - starts).tolist(),
+        current5.tolist(),
+        current4.tolist(),
+    )
+    return _Pulls(
+        list(groups),
+        order[hits].tolist(),
+        (np.cumsum(is_start) - 1)[hits].tolist(),
+        pity5[hits].tolist(),
+        pity4[hits].tolist(),
+    )
+
+
+def _group(columns: Columns) -> _Pulls:
+    """Sorts pulls into groups of a user and a banner and computes the pity of every 4* and 5* pull"""
+    try:
+        import numpy as np  # optional library
+    except ImportError:
+        return _group_python(columns)
+    return _group_numpy(columns, np)
+
+
+def analyze_wish_history(
+    columns: Columns, banners: Iterable[Dict[str, Any]] = None, max_pity: Sequence[int] = (90, 10)
+) -> List[BannerStats]:
+    """Computes statistics of every user and banner in the columns of a wish history.
+
+    The 50/50 is only computed if the details of the banners the pulls were made on are provided,
+    these may be gotten with get_banner_details. The distributions have a count for every pity
+    up to the max pity of 5* and 4*, higher pities are counted at the max pity.
+    """
+    rate_ups = _get_rate_ups(banners or [])
+    pulls = _group(columns)
+    rarities, times = columns.arrays["rarity"], columns.arrays["time"]
+    names, categories = columns.arrays["name"], columns.categories["name"]
+
+    distributions = [
+        ([0] * (max_pity[0] + 1), [0] * (max_pity[1] + 1)) for _ in pulls.groups
+    ]
+    fifty_fifty = [[0, 0, 0, False] for _ in pulls.groups]  # wins, losses, guaranteed, next
+
+    # only 4* and 5* pulls are visited, their pity is already known
+    for i, g, pity5, pity4 in zip(pulls.rows, pulls.group_of, pulls.pity5, pulls.pity4):
+        distributions[g][1][min(pity4, max_pity[1])] += 1
+        if rarities[i] < 5:
+            continue
+        distributions[g][0][min(pity5, max_pity[0])] += 1
+
+        banner_type = pulls.groups[g][1]
+        if banner_type not in EVENT_BANNERS or banner_type not in rate_ups:
+            continue
+        rate_up = _is_rate_up(rate_ups[banner_type], categories[names[i]], times[i])
+        if rate_up is None:
+            continue
+        counts = fifty_fifty[g]
+        counts[1 if not rate_up else 2 if counts[3] else 0] += 1
+        counts[3] = not rate_up
+
+    return [
+        BannerStats(
+            uid,
+            banner_type,
+            count,
+            pity5,
+            pity4,
+            distributions[g][0],
+            distributions[g][1],
+            int(fifty_fifty[g][0]),
+            int(fifty_fifty[g][1]),
+            int(fifty_fifty[g][2]),
+            bool(fifty_fifty[g][3]),
+            count * PRIMOGEMS_PER_PULL.get(banner_type, DEFAULT_PRIMOGEMS_PER_PULL),
+        )
+        for g, (uid, banner_type, count, pity5, pity4) in enumerate(pulls.groups)
+    ]
@@ -0,0 +1,116 @@
+"""Batch requests for many users.
+
+Fetches data for many uids with a bounded pool of worker threads.
+Results are yielded as soon as they're done together with their uid.
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Set, Tuple, Union
+
+from . import genshinstats
+from .errors import GenshinStatsException
+from .utils import recognize_server
+
+__all__ = [
+    "fetch_many",
+    "get_user_stats_many",
+    "get_characters_many",
+    "get_spiral_abyss_many",
+    "get_notes_many",
+]
+
+BatchResult = Tuple[int, Union[Any, Exception]]
+
+
+def fetch_many(
+    func: Callable[..., Any],
+    uids: Iterable[int],
+    max_workers: int = 8,
+    cookie: Mapping[str, Any] = None,
+    **kwargs: Any,
+) -> Iterator[BatchResult]:
+    """Calls a getter like get_user_stats for every uid concurrently.
+
+    Yields tuples of (uid, result) in the order the requests complete.
+    If a request fails the exception takes the place of the result instead of being raised.
+
+    Uids are read a few at a time and grouped by their server,
+    so requests for one region are sent together.
+    Unless a cookie is passed in, every request uses the least busy cookie set with `set_cookies`.
+    At most max_workers requests are in flight and only a few more are queued,
+    so even very long iterables of uids don't take up much memory.
+    """
+    window = max_workers * 2
+    uids = iter(uids)
+    pending: Dict[Future, int] = {}
+
+    def drain(return_when: str) -> Iterator[BatchResult]:
+        done: Set[Future]
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            uid = pending.pop(future)
+            exc = future.exception()
+            yield uid, exc if exc is not None else future.result()
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        # uids are only read a window at a time so unbounded iterables can be used
+        for chunk in iter(lambda: list(islice(uids, window)), []):
+            servers: Dict[str, List[int]] = {}
+            for uid in chunk:
+                try:
+                    servers.setdefault(recognize_server(uid), []).append(uid)
+                except GenshinStatsException as e:
+                    yield uid, e
+
+            for group in servers.values():
+                for uid in group:
+                    pending[executor.submit(func, uid, cookie=cookie, **kwargs)] = uid
+
+                    if len(pending) >= window:
+                        yield from drain(FIRST_COMPLETED)
+
+        while pending:
+            yield from drain(FIRST_COMPLETED)
+
+
+def get_user_stats_many(
+    uids: Iterable[int],
+    equipment: bool = False,
+    lang: str = "en-us",
+    max_workers: int = 8,
+    cookie: Mapping[str, Any] = None,
+) -> Iterator[BatchResult]:
+    """Gets user stats of many users. Yields tuples of (uid, stats or exception)"""
+    return fetch_many(
+        genshinstats.get_user_stats, uids, max_workers, cookie, equipment=equipment, lang=lang
+    )
+
+
+def get_characters_many(
+    uids: Iterable[int],
+    lang: str = "en-us",
+    max_workers: int = 8,
+    cookie: Mapping[str, Any] = None,
+) -> Iterator[BatchResult]:
+    """Gets characters of many users. Yields tuples of (uid, characters or exception)"""
+    return fetch_many(genshinstats.get_characters, uids, max_workers, cookie, lang=lang)
+
+
+def get_spiral_abyss_many(
+    uids: Iterable[int],
+    previous: bool = False,
+    max_workers: int = 8,
+    cookie: Mapping[str, Any] = None,
+) -> Iterator[BatchResult]:
+    """Gets spiral abyss runs of many users. Yields tuples of (uid, abyss or exception)"""
+    return fetch_many(genshinstats.get_spiral_abyss, uids, max_workers, cookie, previous=previous)
+
+
+def get_notes_many(
+    uids: Iterable[int],
+    lang: str = "en-us",
+    max_workers: int = 8,
+    cookie: Mapping[str, Any] = None,
+) -> Iterator[BatchResult]:
+    """Gets real-time notes of many users. Yields tuples of (uid, notes or exception)"""
+    return fetch_many(genshinstats.get_notes, uids, max_workers, cookie, lang=lang)
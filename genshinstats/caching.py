@@ -1,39 +1,218 @@
 """Install a cache into genshinstats"""
+import ast
 import inspect
 import os
+import pickle
+import sqlite3
 import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from functools import update_wrapper
 from itertools import islice
-from typing import Any, Callable, Dict, List, MutableMapping, Tuple, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import genshinstats as gs
 
-__all__ = ["permanent_cache", "install_cache", "uninstall_cache"]
+from .utils import SingleFlight
+
+__all__ = ["permanent_cache", "install_cache", "uninstall_cache", "SqliteCache"]
 
 C = TypeVar("C", bound=Callable[..., Any])
 
+# calls of cached functions which are in flight, keys are the same as the cache keys
+_flight = SingleFlight()
 
-def permanent_cache(*params: str) -> Callable[[C], C]:
-    """Like lru_cache except permanent and only caches based on some parameters"""
-    cache: Dict[Any, Any] = {}
 
-    def wrapper(func):
-        sig = inspect.signature(func)
+def _make_key_builder(
+    func: Callable[..., Any],
+    include: Callable[[str], bool] = lambda name: True,
+    prefix: Tuple[Any, ...] = (),
+) -> Callable[..., Tuple[Any, ...]]:
+    """Compiles a function that takes the same arguments as func and returns them as a cache key
 
-        def inner(*args, **kwargs):
-            bound = sig.bind(*args, **kwargs)
-            bound.apply_defaults()
-            # since the amount of arguments is constant we can just save the values
-            key = tuple(v for k, v in bound.arguments.items() if k in params)
+    The key is a tuple of the prefix and the values of all included parameters, defaults included.
+    The signature is only inspected once, the arguments are then bound by the interpreter itself
+    which is a lot faster than calling inspect.Signature.bind for every call.
+    """
+    parameters = list(inspect.signature(func).parameters.values())
+    namespace: Dict[str, Any] = {"_key_prefix": prefix}
+    params: List[str] = []
+    values: List[str] = []
+    star = False
+
+    for i, param in enumerate(parameters):
+        name = param.name
+        if param.kind is param.VAR_POSITIONAL:
+            params.append("*" + name)
+            star = True
+        elif param.kind is param.VAR_KEYWORD:
+            params.append("**" + name)
+        else:
+            if param.kind is param.KEYWORD_ONLY and not star:
+                params.append("*")
+                star = True
+            if param.default is param.empty:
+                params.append(name)
+            else:
+                namespace[f"_key_default_{i}"] = param.default
+                params.append(f"{name}=_key_default_{i}")
+
+        if param.kind is param.POSITIONAL_ONLY and (
+            i + 1 == len(parameters) or parameters[i + 1].kind is not param.POSITIONAL_ONLY
+        ):
+            params.append("/")
+
+        if include(name):
+            if param.kind is param.VAR_KEYWORD:
+                # keyword arguments must be hashable and independent of their order
+                name = f"tuple(sorted({name}.items()))"
+            values.append(name)
+
+    key = "".join(f"{value}, " for value in values)
+    source = f"def make_key({', '.join(params)}):\n    return (*_key_prefix, {key})\n"
+    exec(source, namespace)
+    make_key = namespace["make_key"]
+    make_key.__qualname__ = f"make_key[{func.__qualname__}]"
+    return make_key
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class _CacheValues(MutableMapping):
+    """The entries of a permanent cache without their expiry times, like the plain dict it used to be"""
+
+    def __init__(
+        self, entries: MutableMapping[Tuple[Any, ...], Tuple[Any, Optional[float]]], lock: Any
+    ) -> None:
+        self._entries = entries
+        self._lock = lock
+
+    def __getitem__(self, key: Tuple[Any, ...]) -> Any:
+        return self._entries[key][0]
+
+    def __setitem__(self, key: Tuple[Any, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, None)
+
+    def __delitem__(self, key: Tuple[Any, ...]) -> None:
+        with self._lock:
+            del self._entries[key]
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def permanent_cache(
+    *params: str, maxsize: int = None, ttl: float = None, refresh: bool = False
+) -> Callable[[C], C]:
+    """Like lru_cache except it only caches based on some parameters
+
+    Entries are kept forever unless a ttl in seconds is set.
+    When there are more than maxsize entries the least recently used one is removed.
+    If refresh is True expired entries are still returned while a new one is fetched in the background.
+
+    The decorated function has cache_info(), cache_clear() and invalidate(*args, **kwargs) methods.
+    Its cache attribute maps keys to the cached values.
+    """
 
-            if key in cache:
-                return cache[key]
+    def wrapper(func):
+        make_key = _make_key_builder(func, lambda name: name in params)
+        # key -> (value, time it expires at)
+        cache: "OrderedDict[Tuple[Any, ...], Tuple[Any, Optional[float]]]" = OrderedDict()
+        refreshing: Set[Tuple[Any, ...]] = set()
+        flight = SingleFlight()
+        lock = threading.Lock()
+        hits = misses = 0
+
+        def call(key: Tuple[Any, ...], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
             r = func(*args, **kwargs)
             if r is not None:
-                cache[key] = r
+                with lock:
+                    cache[key] = (r, None if ttl is None else time.monotonic() + ttl)
+                    cache.move_to_end(key)
+                    if maxsize is not None and len(cache) > maxsize:
+                        cache.popitem(last=False)
             return r
 
-        inner.cache = cache
+        def background_refresh(
+            key: Tuple[Any, ...], args: Tuple[Any, ...], kwargs: Dict[str, Any]
+        ) -> None:
+            try:
+                call(key, args, kwargs)
+            except Exception:
+                pass  # the stale entry will be refreshed by the next call
+            finally:
+                with lock:
+                    refreshing.discard(key)
+
+        def inner(*args, **kwargs):
+            nonlocal hits, misses
+            key = make_key(*args, **kwargs)
+            with lock:
+                entry = cache.get(key)
+                if entry is not None:
+                    value, expires = entry
+                    if expires is None or time.monotonic() < expires:
+                        hits += 1
+                        cache.move_to_end(key)
+                        return value
+                    if refresh:
+                        hits += 1
+                        if key not in refreshing:
+                            refreshing.add(key)
+                            threading.Thread(
+                                target=background_refresh, args=(key, args, kwargs), daemon=True
+                            ).start()
+                        return value
+                misses += 1
+
+            return flight.do(key, call, key, args, kwargs)
+
+        def cache_info() -> CacheInfo:
+            """Returns the hits, misses, maxsize and current size of the cache"""
+            with lock:
+                return CacheInfo(hits, misses, maxsize, len(cache))
+
+        def cache_clear() -> None:
+            """Removes all entries and resets the statistics"""
+            nonlocal hits, misses
+            with lock:
+                cache.clear()
+                hits = misses = 0
+
+        def invalidate(*args, **kwargs) -> None:
+            """Removes the entry of the given arguments"""
+            with lock:
+                cache.pop(make_key(*args, **kwargs), None)
+
+        inner.cache = _CacheValues(cache, lock)
+        inner.cache_info = cache_info
+        inner.cache_clear = cache_clear
+        inner.invalidate = invalidate
         return update_wrapper(inner, func)
 
     return wrapper  # type: ignore
@@ -45,85 +224,164 @@ def cache_func(func: C, cache: MutableMapping[Tuple[Any, ...], Any]) -> C:
     if hasattr(func, "__cache__"):
         return func
 
-    sig = inspect.signature(func)
-
-    def wrapper(*args, **kwargs):
-        # create key (func name, *arguments)
-        bound = sig.bind(*args, **kwargs)
-        bound.apply_defaults()
-        key = tuple(v for k, v in bound.arguments.items() if k != "cookie")
-        key = (func.__name__,) + key
-
-        if key in cache:
-            return cache[key]
+    # create key (func name, *arguments)
+    make_key = _make_key_builder(func, lambda name: name != "cookie", (func.__name__,))
 
+    def call(key: Tuple[Any, ...], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
         r = func(*args, **kwargs)
         if r is not None:
             cache[key] = r
         return r
 
+    def wrapper(*args, **kwargs):
+        key = make_key(*args, **kwargs)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+
+        # concurrent calls with the same arguments wait for the first one
+        # arguments like lists of character ids aren't hashable so the repr is used like in SqliteCache
+        return _flight.do(repr(key), call, key, args, kwargs)
+
     setattr(wrapper, "__cache__", cache)
     setattr(wrapper, "__original__", func)
     return update_wrapper(wrapper, func)  # type: ignore
 
 
 def cache_paginator(
-    func: C, cache: MutableMapping[Tuple[Any, ...], Any], strict: bool = False
+    func: C, cache: MutableMapping[Tuple[Any, ...], Any], strict: bool = False, segment_size: int = 500
 ) -> C:
     """Caches an id generator such as wish history
 
+    Items are cached in segments, contiguous runs of items which come right after a specific id.
+    Every paginator has an index of its segments so a whole history only takes a few cache accesses.
+    Segments are merged when a new page connects them, up to segment_size items.
+
     Respects size and authkey.
     If strict mode is on then the first item of the paginator will no longer be requested every time.
     """
     if hasattr(func, "__cache__"):
         return func
 
-    sig = inspect.signature(func)
+    names = list(inspect.signature(func).parameters)
+    bind = _make_key_builder(func)
+    page_size = 20
 
     def wrapper(*args, **kwargs):
-        # create key (func name, end id, *arguments)
-        bound = sig.bind(*args, **kwargs)
-        bound.apply_defaults()
-        arguments = bound.arguments
-
-        # remove arguments that might cause problems
-        size, authkey, end_id = [arguments.pop(k) for k in ("size", "authkey", "end_id")]
-        partial_key = tuple(arguments.values())
+        arguments = dict(zip(names, bind(*args, **kwargs)))
 
         # special recursive case must be ignored
         # otherwise an infinite recursion due to end_id resets will occur
         if "banner_type" in arguments and arguments["banner_type"] is None:
             return func(*args, **kwargs)
 
-        def make_key(end_id: int) -> Tuple[Any, ...]:
-            return (
-                func.__name__,
-                end_id,
-            ) + partial_key
+        # remove arguments that might cause problems
+        size, authkey, end_id = [arguments.pop(k) for k in ("size", "authkey", "end_id")]
+        arguments.pop("prefetch", None)  # only used when getting all banners
+        partial_key = tuple(arguments.values())
+
+        # the index maps the id a segment starts after to (id of its last item, whether it's the end)
+        # a segment that starts at 0 is the head which is only cached in strict mode
+        index_key = (func.__name__, "index") + partial_key
 
-        def helper(end_id: int):
-            while True:
-                # yield new items from the cache
-                key = make_key(end_id)
-                while key in cache:
-                    yield cache[key]
-                    end_id = cache[key]["id"]
-                    key = make_key(end_id)
-
-                # look ahead and add new items to the cache
-                # since the size limit is always 20 we use that to make only a single request
-                new = list(func(size=20, authkey=authkey, end_id=end_id, **arguments))
-                if not new:
-                    break
-                # the head may not want to be cached so it must be handled separately
-                if end_id != 0 or strict:
-                    cache[make_key(end_id)] = new[0]
+        def segment_key(start: int) -> Tuple[Any, ...]:
+            return (func.__name__, "segment", start) + partial_key
+
+        def find(index: Dict[int, Tuple[int, bool]], end_id: int) -> Optional[int]:
+            """Finds the segment which contains the items right after end_id"""
+            for start, (last, _) in index.items():
                 if end_id == 0:
-                    yield new[0]
-                    end_id = new[0]["id"]
+                    if start == 0:
+                        return start
+                elif last < end_id and (start == 0 or end_id <= start):
+                    return start
+            return None
+
+        def store(
+            index: Dict[int, Tuple[int, bool]], start: int, items: List[Any], end: bool
+        ) -> None:
+            """Stores a run of items which come after start and merges it with its neighbours"""
+            if not items:
+                # the history ends right after an existing segment
+                previous = next((s for s, (l, _) in index.items() if start and l == start), None)
+                if end and previous is not None:
+                    index[previous] = (start, True)
+                    cache[index_key] = index
+                return
+
+            # cut off the items which are already in the following segment
+            following = max(
+                (s for s in index if s and items[-1]["id"] <= s and (start == 0 or s < start)),
+                default=None,
+            )
+            if following is not None:
+                items = [i for i in items if i["id"] >= following]
+                last, end = following, False
+            else:
+                last = items[-1]["id"]
+
+            previous = next((s for s, (l, _) in index.items() if start and l == start), None)
+            if previous is not None:
+                previous_items = cache.get(segment_key(previous))
+                if previous_items is not None and len(previous_items) + len(items) <= segment_size:
+                    items = previous_items + items
+                    start = previous
+            if following is not None:
+                following_items = cache.get(segment_key(following))
+                if following_items is not None and len(items) + len(following_items) <= segment_size:
+                    items = items + following_items
+                    last, end = index.pop(following)
+                    del cache[segment_key(following)]
+
+            cache[segment_key(start)] = items
+            index[start] = (last, end)
+            cache[index_key] = index
+
+        def fetch(end_id: int) -> List[Any]:
+            # since the size limit is always 20 we use that to make only a single request
+            return _flight.do(
+                (func.__name__, "page", end_id, authkey) + partial_key,
+                lambda: list(func(size=page_size, authkey=authkey, end_id=end_id, **arguments)),
+            )
 
-                for p, n in zip(new, new[1:]):
-                    cache[make_key(p["id"])] = n
+        def helper(end_id: int):
+            index: Dict[int, Tuple[int, bool]] = dict(cache.get(index_key, {}))
+
+            # the head may not want to be cached so it must be handled separately
+            if end_id == 0 and not strict:
+                page = fetch(0)
+                if not page:
+                    return
+                yield page[0]
+                end_id = page[0]["id"]
+                if find(index, end_id) is None:
+                    store(index, end_id, page[1:], len(page) < page_size)
+
+            while True:
+                start = find(index, end_id)
+                if start is None:
+                    # look ahead and add new items to the cache
+                    page = fetch(end_id)
+                    store(index, end_id, page, len(page) < page_size)
+                    start = find(index, end_id)
+                    if start is None:
+                        return
+
+                last, end = index[start]
+                items = cache.get(segment_key(start))
+                if items is None:
+                    # the segment has been evicted from the cache
+                    del index[start]
+                    cache[index_key] = index
+                    continue
+
+                if end_id != start:
+                    items = [i for i in items if i["id"] < end_id]
+                yield from items
+                if end:
+                    return
+                end_id = last
 
         return islice(helper(end_id), size)
 
@@ -132,6 +390,115 @@ def cache_paginator(
     return update_wrapper(wrapper, func)  # type: ignore
 
 
+class SqliteCache(MutableMapping[Tuple[Any, ...], Any]):
+    """A persistent cache saved in an sqlite database.
+
+    Entries expire after ttl seconds, ttls may set a different ttl for specific functions:
+    >>> cache = SqliteCache("cache.db", ttl=3600, ttls={"get_wish_history": None})
+    >>> install_cache(cache)
+
+    When there are more than maxsize entries the least recently used ones are removed.
+    Values are pickled and compressed. The database may be safely shared by multiple processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = None,
+        ttls: Mapping[str, Any] = None,
+        maxsize: int = None,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._writes = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")  # readers don't block writers
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _dump_key(key: Tuple[Any, ...]) -> str:
+        return repr(key)
+
+    def _get_ttl(self, key: Tuple[Any, ...]) -> Any:
+        # keys always start with the name of the cached function
+        return self.ttls.get(key[0], self.ttl) if key else self.ttl
+
+    def __getitem__(self, key: Tuple[Any, ...]) -> Any:
+        conn = self._connect()
+        k = self._dump_key(key)
+        row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (k,)).fetchone()
+        now = time.time()
+        if row is None or (row[1] is not None and row[1] <= now):
+            raise KeyError(key)
+
+        if self.maxsize is not None:
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, k))
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def __setitem__(self, key: Tuple[Any, ...], value: Any) -> None:
+        ttl = self._get_ttl(key)
+        now = time.time()
+        data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (self._dump_key(key), data, None if ttl is None else now + ttl, now),
+        )
+
+        # counting entries is slow so the size is only checked every once in a while
+        self._writes += 1
+        if self.maxsize is not None and self._writes % 64 == 0:
+            self.evict()
+
+    def __delitem__(self, key: Tuple[Any, ...]) -> None:
+        cur = self._connect().execute("DELETE FROM cache WHERE key = ?", (self._dump_key(key),))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        rows = self._connect().execute(
+            "SELECT key FROM cache WHERE expires IS NULL OR expires > ?", (time.time(),)
+        )
+        for (key,) in rows.fetchall():
+            yield ast.literal_eval(key)
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM cache WHERE expires IS NULL OR expires > ?", (time.time(),)
+        ).fetchone()[0]
+
+    def evict(self) -> None:
+        """Removes expired entries and the least recently used ones above maxsize"""
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        if self.maxsize is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache")
+
+
 def install_cache(cache: MutableMapping[Tuple[Any, ...], Any], strict: bool = False) -> None:
     """Installs a cache into every cacheable function in genshinstats
 
@@ -179,7 +546,7 @@ def install_cache(cache: MutableMapping[Tuple[Any, ...], Any], strict: bool = Fa
 
     for func in wrapped:
         # ensure we only replace actual functions from the genshinstats directory
-        for module in sys.modules.values():
+        for module in list(sys.modules.values()):
             if not hasattr(module, func.__name__):
                 continue
             orig_func = getattr(module, func.__name__)
@@ -0,0 +1,183 @@
+"""Character catalogue.
+
+Maps character ids to their names without making a request for every character.
+A bundled snapshot is used for english and other languages are loaded from ambr.top once per process.
+"""
+import threading
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Set
+
+import requests
+
+from .utils import USER_AGENT
+
+__all__ = [
+    "get_character_name",
+    "get_character_names",
+    "refresh_character_names",
+]
+
+AMBR_AVATAR_URL = "https://api.ambr.top/v2/{lang}/avatar"
+
+# snapshot of the ambr.top avatar table, travelers are merged into a single entry
+_SNAPSHOT: Dict[int, str] = {
+    10000002: "Kamisato Ayaka",
+    10000003: "Jean",
+    10000005: "Traveler",
+    10000006: "Lisa",
+    10000007: "Traveler",
+    10000014: "Barbara",
+    10000015: "Kaeya",
+    10000016: "Diluc",
+    10000020: "Razor",
+    10000021: "Amber",
+    10000022: "Venti",
+    10000023: "Xiangling",
+    10000024: "Beidou",
+    10000025: "Xingqiu",
+    10000026: "Xiao",
+    10000027: "Ningguang",
+    10000029: "Klee",
+    10000030: "Zhongli",
+    10000031: "Fischl",
+    10000032: "Bennett",
+    10000033: "Tartaglia",
+    10000034: "Noelle",
+    10000035: "Qiqi",
+    10000036: "Chongyun",
+    10000037: "Ganyu",
+    10000038: "Albedo",
+    10000039: "Diona",
+    10000041: "Mona",
+    10000042: "Keqing",
+    10000043: "Sucrose",
+    10000044: "Xinyan",
+    10000045: "Rosaria",
+    10000046: "Hu Tao",
+    10000047: "Kaedehara Kazuha",
+    10000048: "Yanfei",
+    10000049: "Yoimiya",
+    10000050: "Thoma",
+    10000051: "Eula",
+    10000052: "Raiden Shogun",
+    10000053: "Sayu",
+    10000054: "Sangonomiya Kokomi",
+    10000055: "Gorou",
+    10000056: "Kujou Sara",
+    10000057: "Arataki Itto",
+    10000058: "Yae Miko",
+    10000059: "Shikanoin Heizou",
+    10000060: "Yelan",
+    10000061: "Kirara",
+    10000062: "Aloy",
+    10000063: "Shenhe",
+    10000064: "Yun Jin",
+    10000065: "Kuki Shinobu",
+    10000066: "Kamisato Ayato",
+    10000067: "Collei",
+    10000068: "Dori",
+    10000069: "Tighnari",
+    10000070: "Nilou",
+    10000071: "Cyno",
+    10000072: "Candace",
+    10000073: "Nahida",
+    10000074: "Layla",
+    10000075: "Wanderer",
+    10000076: "Faruzan",
+    10000077: "Yaoyao",
+    10000078: "Alhaitham",
+    10000079: "Dehya",
+    10000080: "Mika",
+    10000081: "Kaveh",
+    10000082: "Baizhu",
+    10000083: "Lynette",
+    10000084: "Lyney",
+    10000085: "Freminet",
+    10000086: "Wriothesley",
+    10000087: "Neuvillette",
+    10000088: "Charlotte",
+    10000089: "Furina",
+    10000090: "Chevreuse",
+    10000091: "Navia",
+    10000092: "Gaming",
+    10000093: "Xianyun",
+    10000094: "Chiori",
+    10000095: "Sigewinne",
+    10000096: "Arlecchino",
+    10000097: "Sethos",
+    10000098: "Clorinde",
+    10000099: "Emilie",
+    10000100: "Kachina",
+    10000101: "Kinich",
+    10000102: "Mualani",
+    10000103: "Xilonen",
+    10000104: "Chasca",
+    10000105: "Ororon",
+    10000106: "Mavuika",
+    10000107: "Citlali",
+}
+
+_catalogue: Dict[str, Dict[int, str]] = {"en": dict(_SNAPSHOT)}
+_refreshed: Set[str] = set()  # languages which have already been loaded from ambr.top
+_lock = threading.Lock()
+
+
+def _get_ambr_lang(lang: str) -> str:
+    """Converts a hoyolab lang code into one used by ambr.top"""
+    lang = lang.lower()
+    return {
+        "zh-cn": "chs",
+        "zh-tw": "cht",
+        "ja-jp": "jp",
+        "ko-kr": "kr",
+    }.get(lang, lang.split("-")[0])
+
+
+def refresh_character_names(lang: str = "en") -> Mapping[int, str]:
+    """Loads the newest character names for a language from ambr.top
+
+    The loaded table replaces the current one for every later lookup.
+    The returned table is read-only since it's shared by every caller.
+    """
+    lang = _get_ambr_lang(lang)
+    r = requests.get(AMBR_AVATAR_URL.format(lang=lang), headers={"user-agent": USER_AGENT})
+    r.raise_for_status()
+    items = r.json()["data"]["items"]
+
+    # travelers are split by element, e.g. "10000005-anemo"
+    table = {int(k.split("-")[0]): v["name"] for k, v in items.items()}
+    with _lock:
+        _catalogue[lang] = {**_catalogue.get(lang, {}), **table}
+        _refreshed.add(lang)
+        return MappingProxyType(_catalogue[lang])
+
+
+def get_character_names(lang: str = "en") -> Mapping[int, str]:
+    """Gets a read-only table of all known character ids and their names
+
+    Only the first call for a language without a bundled snapshot makes a request.
+    """
+    lang = _get_ambr_lang(lang)
+    if lang not in _catalogue:
+        return refresh_character_names(lang)
+    return MappingProxyType(_catalogue[lang])
+
+
+def get_character_name(id: int, lang: str = "en") -> Optional[str]:
+    """Gets the name of a character from their id
+
+    Unknown ids make the catalogue refresh at most once per language.
+    If the character still cannot be found or ambr.top is unreachable, returns None.
+    """
+    id = int(id)  # ids from responses may be strings
+    lang = _get_ambr_lang(lang)
+    try:
+        table = get_character_names(lang)
+        if id not in table and lang not in _refreshed:
+            table = refresh_character_names(lang)
+    except requests.RequestException:
+        with _lock:
+            _refreshed.add(lang)  # don't retry an unreachable server for every character
+        table = _catalogue.get(lang, {})
+
+    return table.get(id)
@@ -0,0 +1,250 @@
+"""A pool of cookies that keeps track of their ratelimits.
+
+Every cookie can only be used to get data for 30 accounts per day.
+The pool remembers which accounts every cookie has already been used for
+and which cookies have been ratelimited so they're not tried again until the next day.
+"""
+import hashlib
+import heapq
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, NoReturn, Optional, Set, Tuple
+
+from .errors import TooManyRequests
+
+__all__ = ["CookiePool"]
+
+DAY = 24 * 60 * 60
+RESET_OFFSET = 8 * 60 * 60  # mihoyo's days start at midnight UTC+8
+
+
+def _get_cookie_id(cookie: Mapping[str, Any]) -> str:
+    """Creates an id for a cookie that does not leak the cookie itself"""
+    data = ";".join(f"{k}={v}" for k, v in sorted(cookie.items()))
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+
+class _Entry:
+    __slots__ = ("jar", "id", "accounts", "exhausted_until", "in_flight", "version")
+
+    def __init__(self, jar: Any) -> None:
+        self.jar = jar
+        self.id = _get_cookie_id(jar)
+        self.accounts: Set[int] = set()  # accounts this cookie was used for today
+        self.exhausted_until = 0.0
+        self.in_flight = 0
+        self.version = 0
+
+
+class CookiePool:
+    """A pool of cookies which picks the least used cookie for every request.
+
+    Cookies are preferably reused for accounts they have already been used for today,
+    since that does not use up any of their quota.
+    Cookies that have been ratelimited are skipped until the next day.
+
+    The pool behaves like a list of cookie jars so it can be iterated and indexed.
+    """
+
+    def __init__(self, jars: List[Any] = None, limit: int = 30) -> None:
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._entries: List[_Entry] = []
+        self._indexes: Dict[int, int] = {}  # id(jar) -> index of entry
+        self._accounts: Dict[int, int] = {}  # account -> index of the entry used for it
+        self._heap: List[Tuple[bool, int, int, int, int, int]] = []
+        self._cooldowns: List[Tuple[float, int]] = []
+        self._counter = 0
+        self._day = self._get_day()
+        for jar in jars or []:
+            self.append(jar)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter([entry.jar for entry in self._entries])
+
+    def __getitem__(self, index: int) -> Any:
+        return self._entries[index].jar
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} cookies={len(self)} available={self.available}>"
+
+    def copy(self) -> List[Any]:
+        """Returns a list of all cookie jars"""
+        return list(self)
+
+    @property
+    def available(self) -> int:
+        """The amount of cookies which are not ratelimited"""
+        now = time.time()
+        return sum(entry.exhausted_until <= now for entry in self._entries)
+
+    @staticmethod
+    def _get_day(t: float = None) -> int:
+        return int(((t or time.time()) + RESET_OFFSET) // DAY)
+
+    def _push(self, index: int) -> None:
+        """Pushes the current state of an entry into the heap, invalidating the old one"""
+        if len(self._heap) > 4 * len(self._entries) + 16:
+            # get rid of outdated items so the heap doesn't grow forever
+            self._heap = [i for i in self._heap if i[4] == self._entries[i[5]].version]
+            heapq.heapify(self._heap)
+
+        entry = self._entries[index]
+        entry.version += 1
+        self._counter += 1
+        used = len(entry.accounts)
+        # full cookies are last, then the least busy and least used ones are first
+        # the counter makes equally loaded cookies take turns
+        heapq.heappush(
+            self._heap,
+            (used >= self.limit, entry.in_flight, used, self._counter, entry.version, index),
+        )
+
+    def _refresh(self) -> None:
+        """Resets the quotas on a new day and revives cookies that have cooled down"""
+        now = time.time()
+        day = self._get_day(now)
+        if day != self._day:
+            self._day = day
+            self._accounts.clear()
+            self._cooldowns.clear()
+            for entry in self._entries:
+                entry.accounts.clear()
+                entry.exhausted_until = 0.0
+            self._heap.clear()
+            for index in range(len(self._entries)):
+                self._push(index)
+            return
+
+        while self._cooldowns and self._cooldowns[0][0] <= now:
+            _, index = heapq.heappop(self._cooldowns)
+            if self._entries[index].exhausted_until <= now:
+                self._push(index)
+
+    def append(self, jar: Any) -> None:
+        """Adds a new cookie jar to the pool"""
+        with self._lock:
+            self._indexes[id(jar)] = len(self._entries)
+            self._entries.append(_Entry(jar))
+            self._push(len(self._entries) - 1)
+
+    def clear(self) -> None:
+        """Removes all cookies from the pool"""
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._accounts.clear()
+            self._heap.clear()
+            self._cooldowns.clear()
+
+    def _raise_exhausted(self) -> NoReturn:
+        if len(self._entries) == 1:
+            raise TooManyRequests("Cannnot get data for more than 30 accounts per day.")
+        else:
+            raise TooManyRequests("All cookies have hit their request limit of 30 accounts per day.")
+
+    def _pick(self, account: Optional[int], now: float) -> int:
+        # the index of the best cookie on the heap, must be called with the lock held
+        while self._heap:
+            full, _, _, _, version, index = self._heap[0]
+            entry = self._entries[index]
+            if version != entry.version or entry.exhausted_until > now:
+                heapq.heappop(self._heap)  # outdated
+                continue
+            if full and account is not None:
+                self._raise_exhausted()
+            return index
+
+        self._raise_exhausted()
+
+    def acquire(self, account: int = None) -> Any:
+        """Picks the best cookie jar for a request and marks it as in use.
+
+        If an account is given, the cookie's quota is used up for it.
+        Raises TooManyRequests if all cookies are ratelimited or out of quota.
+        Every acquired cookie must be given back with `release`.
+        """
+        with self._lock:
+            self._refresh()
+            now = time.time()
+
+            index = self._accounts.get(account) if account is not None else None
+            if index is None or self._entries[index].exhausted_until > now:
+                index = self._pick(account, now)
+
+            entry = self._entries[index]
+            entry.in_flight += 1
+            if account is not None:
+                entry.accounts.add(account)
+                self._accounts[account] = index
+            self._push(index)
+            return entry.jar
+
+    def release(self, jar: Any) -> None:
+        """Marks a cookie jar as no longer in use"""
+        with self._lock:
+            index = self._indexes.get(id(jar))
+            if index is None:
+                return  # the pool has been cleared in the meantime
+            self._entries[index].in_flight -= 1
+            self._push(index)
+
+    def exhaust(self, jar: Any, until: float = None) -> None:
+        """Marks a cookie jar as ratelimited.
+
+        By default the cookie is skipped until the next day, when the quotas are reset.
+        """
+        with self._lock:
+            index = self._indexes.get(id(jar))
+            if index is None:
+                return
+            entry = self._entries[index]
+            entry.exhausted_until = until or (self._day + 1) * DAY - RESET_OFFSET
+            entry.version += 1  # invalidates the heap entry
+            heapq.heappush(self._cooldowns, (entry.exhausted_until, index))
+
+    def save(self, path: str) -> None:
+        """Saves the quotas and ratelimits of all cookies into a json file.
+
+        Cookies are saved only as hashes so the file doesn't contain any credentials.
+        """
+        with self._lock:
+            data = {
+                "day": self._day,
+                "cookies": {
+                    entry.id: {
+                        "accounts": sorted(entry.accounts),
+                        "exhausted_until": entry.exhausted_until,
+                    }
+                    for entry in self._entries
+                },
+            }
+        with open(path, "w") as file:
+            json.dump(data, file)
+
+    def load(self, path: str) -> None:
+        """Loads the quotas and ratelimits saved with `save`.
+
+        Cookies which are not in the pool and states from previous days are ignored.
+        """
+        with open(path) as file:
+            data = json.load(file)
+
+        with self._lock:
+            if data["day"] != self._get_day():
+                return
+            for index, entry in enumerate(self._entries):
+                state: Optional[Dict[str, Any]] = data["cookies"].get(entry.id)
+                if state is None:
+                    continue
+                entry.accounts.update(state["accounts"])
+                entry.exhausted_until = state["exhausted_until"]
+                for account in state["accounts"]:
+                    self._accounts[account] = index
+                if entry.exhausted_until:
+                    heapq.heappush(self._cooldowns, (entry.exhausted_until, index))
+                self._push(index)
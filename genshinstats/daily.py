@@ -49,7 +49,7 @@ def get_daily_reward_info(
     return DailyRewardInfo(data["is_sign"], data["total_sign_day"])
 
 
-@permanent_cache("chinese", "lang")
+@permanent_cache("chinese", "lang", ttl=60 * 60)  # rewards change every month
 def get_monthly_rewards(
     chinese: bool = False, lang: str = "en-us", cookie: Mapping[str, Any] = None
 ) -> List[Dict[str, Any]]:
@@ -2,7 +2,25 @@
 
 These take in only a single argument: msg.
 It's possible to add retcodes and the original api response message with `.set_reponse()`.
+Errors of api responses are looked up in a registry, new retcodes may be added with `register_error()`.
 """
+from typing import Dict, Optional, Tuple, Type
+
+__all__ = [
+    "GenshinStatsException",
+    "TooManyRequests",
+    "NotLoggedIn",
+    "AccountNotFound",
+    "DataNotPublic",
+    "CodeRedeemException",
+    "SignInException",
+    "AuthkeyError",
+    "InvalidAuthkey",
+    "AuthkeyTimeout",
+    "MissingAuthKey",
+    "register_error",
+    "raise_for_error",
+]
 
 
 class GenshinStatsException(Exception):
@@ -10,6 +28,9 @@ class GenshinStatsException(Exception):
 
     retcode: int = 0
     orig_msg: str = ""
+    endpoint: Optional[str] = None  # the path of the requested url
+    cookie_id: Optional[str] = None  # a hash of the cookie which was used
+    retry_after: Optional[float] = None  # seconds the server asked to wait for
 
     def __init__(self, msg: str) -> None:
         self.msg = msg
@@ -69,47 +90,72 @@ class MissingAuthKey(AuthkeyError):
     """No gacha authkey was found."""
 
 
-def raise_for_error(response: dict):
-    """Raises a custom genshinstats error from a response."""
-    # every error uses a different response code and message,
-    # but the codes are not unique so we must check the message at some points too.
-    error = {
-        # general
-        10101: TooManyRequests("Cannnot get data for more than 30 accounts per cookie per day."),
-        -100: NotLoggedIn("Login cookies have not been provided or are incorrect."),
-        10001: NotLoggedIn("Login cookies have not been provided or are incorrect."),
-        10102: DataNotPublic("User's data is not public"),
-        1009: AccountNotFound("Could not find user; uid may not be valid."),
-        -1: GenshinStatsException("Internal database error, see original message"),
-        -10002: AccountNotFound(
-            "Cannot get rewards info. Account has no game account binded to it."
-        ),
-        -108: GenshinStatsException("Language is not valid."),
-        10103: NotLoggedIn("Cookies are correct but do not have a hoyolab account bound to them."),
-        # code redemption
-        -2003: CodeRedeemException("Invalid redemption code"),
-        -2007: CodeRedeemException("You have already used a redemption code of the same kind."),
-        -2017: CodeRedeemException("Redemption code has been claimed already."),
-        -2018: CodeRedeemException("This Redemption Code is already in use"),
-        -2001: CodeRedeemException("Redemption code has expired."),
-        -2021: CodeRedeemException(
-            "Cannot claim codes for account with adventure rank lower than 10."
-        ),
-        -1073: CodeRedeemException("Cannot claim code. Account has no game account bound to it."),
-        -1071: NotLoggedIn(
-            "Login cookies from redeem_code() have not been provided or are incorrect. "
-            "Make sure you use account_id and cookie_token cookies."
-        ),
-        # sign in
-        -5003: SignInException("Already claimed daily reward today."),
-        2001: SignInException("Already checked into hoyolab today."),
-        # gacha log
-        -100: InvalidAuthkey("Authkey is not valid.")
-        if response["message"] == "authkey error"
-        else NotLoggedIn("Login cookies have not been provided or are incorrect."),
-        -101: AuthkeyTimeout(
-            "Authkey has timed-out. Update it by opening the history page in Genshin."
-        ),
-    }.get(response["retcode"], GenshinStatsException("{} Error ({})"))
-    error.set_response(response)
+# retcode and original message -> error class and message
+# the codes are not unique so some errors also need the message, None matches any message
+_errors: Dict[Tuple[int, Optional[str]], Tuple[Type[GenshinStatsException], str]] = {}
+
+
+def register_error(
+    retcode: int, error: Type[GenshinStatsException], msg: str, orig_msg: str = None
+) -> None:
+    """Registers the error raised for a retcode.
+
+    If orig_msg is provided the error is only raised when the original message matches,
+    the message may contain `{}` placeholders for the retcode and the original message.
+    """
+    _errors[retcode, orig_msg] = (error, msg)
+
+
+_default_error = (GenshinStatsException, "{} Error ({})")
+
+for _retcode, _error, _msg in [
+    # general
+    (10101, TooManyRequests, "Cannnot get data for more than 30 accounts per cookie per day."),
+    (-100, NotLoggedIn, "Login cookies have not been provided or are incorrect."),
+    (10001, NotLoggedIn, "Login cookies have not been provided or are incorrect."),
+    (10102, DataNotPublic, "User's data is not public"),
+    (1009, AccountNotFound, "Could not find user; uid may not be valid."),
+    (-1, GenshinStatsException, "Internal database error, see original message"),
+    (-10002, AccountNotFound, "Cannot get rewards info. Account has no game account binded to it."),
+    (-108, GenshinStatsException, "Language is not valid."),
+    (10103, NotLoggedIn, "Cookies are correct but do not have a hoyolab account bound to them."),
+    # code redemption
+    (-2003, CodeRedeemException, "Invalid redemption code"),
+    (-2007, CodeRedeemException, "You have already used a redemption code of the same kind."),
+    (-2017, CodeRedeemException, "Redemption code has been claimed already."),
+    (-2018, CodeRedeemException, "This Redemption Code is already in use"),
+    (-2001, CodeRedeemException, "Redemption code has expired."),
+    (-2021, CodeRedeemException, "Cannot claim codes for account with adventure rank lower than 10."),
+    (-1073, CodeRedeemException, "Cannot claim code. Account has no game account bound to it."),
+    (
+        -1071,
+        NotLoggedIn,
+        "Login cookies from redeem_code() have not been provided or are incorrect. "
+        "Make sure you use account_id and cookie_token cookies.",
+    ),
+    # sign in
+    (-5003, SignInException, "Already claimed daily reward today."),
+    (2001, SignInException, "Already checked into hoyolab today."),
+    # gacha log
+    (-101, AuthkeyTimeout, "Authkey has timed-out. Update it by opening the history page in Genshin."),
+]:
+    register_error(_retcode, _error, _msg)
+del _retcode, _error, _msg
+register_error(-100, InvalidAuthkey, "Authkey is not valid.", "authkey error")
+
+
+def raise_for_error(
+    response: dict, endpoint: str = None, cookie_id: str = None, retry_after: float = None
+):
+    """Raises a custom genshinstats error from a response.
+
+    The endpoint, cookie id and retry-after of the request are added to the error.
+    """
+    retcode, orig_msg = response["retcode"], response["message"]
+    cls, msg = _errors.get((retcode, orig_msg)) or _errors.get((retcode, None)) or _default_error
+    error = cls(msg)
+    error.retcode, error.orig_msg = retcode, orig_msg
+    if "{" in msg:
+        error.msg = msg.format(retcode, orig_msg)
+    error.endpoint, error.cookie_id, error.retry_after = endpoint, cookie_id, retry_after
     raise error
@@ -0,0 +1,421 @@
+"""Columnar export of wish history and transaction logs.
+
+Pages are appended straight into typed arrays without creating a dict for every row,
+strings like names and banners are stored as codes of a list of categories.
+Columns may be converted into numpy arrays or an arrow table if those libraries are installed
+and they may be streamed into csv or a compact binary format.
+
+>>> for batch in gs.iter_wish_history_columns(authkey=...):
+...     gs.write_binary(batch, file)
+"""
+import csv
+import importlib
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import IO, Any, Dict, Iterable, Iterator, List, Union
+
+from . import transactions, wishes
+
+__all__ = [
+    "Columns",
+    "iter_wish_history_columns",
+    "wish_history_to_columns",
+    "iter_transaction_columns",
+    "transactions_to_columns",
+    "write_csv",
+    "write_binary",
+    "read_binary",
+]
+
+# kinds of columns, numbers are stored in arrays of their typecode
+DATETIME = "datetime"  # seconds since the epoch in the timezone of the server
+CATEGORY = "category"  # codes of a list of categories
+
+WISH_SCHEMA = {
+    "id": "q",
+    "uid": "q",
+    "time": DATETIME,
+    "banner_type": "h",
+    "rarity": "b",
+    "type": CATEGORY,
+    "name": CATEGORY,
+    "banner": CATEGORY,
+}
+TRANSACTION_SCHEMA = {
+    "id": "q",
+    "uid": "q",
+    "time": DATETIME,
+    "amount": "i",
+    "reason_id": "i",
+    "reason": CATEGORY,
+}
+ITEM_TRANSACTION_SCHEMA = {**TRANSACTION_SCHEMA, "name": CATEGORY, "rarity": "b"}
+
+# column -> field of the api
+_WISH_FIELDS = {
+    "id": "id",
+    "uid": "uid",
+    "time": "time",
+    "banner_type": "gacha_type",
+    "rarity": "rank_type",
+    "type": "item_type",
+    "name": "name",
+}
+_TRANSACTION_FIELDS = {
+    "id": "id",
+    "uid": "uid",
+    "time": "time",
+    "amount": "add_num",
+    "reason_id": "reason",
+    "name": "name",
+    "rarity": "rank",
+}
+
+LOGS = {
+    "primogem": "getPrimogemLog",
+    "crystal": "getCrystalLog",
+    "resin": "getResinLog",
+    "artifact": "getArtifactLog",
+    "weapon": "getWeaponLog",
+}
+
+_TYPECODES = {DATETIME: "q", CATEGORY: "i"}
+_DTYPES = {"q": "int64", "i": "int32", "h": "int16", "b": "int8"}
+
+_MAGIC = b"GSCOLS1\n"
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _parse_times(times: List[str]) -> List[int]:
+    """Parses times of the api into seconds since the epoch"""
+    fromisoformat = datetime.fromisoformat
+    return [int((fromisoformat(t) - _EPOCH).total_seconds()) for t in times]
+
+
+def _format_times(seconds: Iterable[int]) -> List[str]:
+    """Formats seconds since the epoch like the api does"""
+    days: Dict[int, str] = {}
+    times = []
+    for t in seconds:
+        day, t = divmod(t, 86400)
+        prefix = days.get(day)
+        if prefix is None:
+            prefix = days[day] = (_EPOCH + timedelta(days=day)).strftime("%Y-%m-%d")
+        times.append(f"{prefix} {t // 3600:02}:{t // 60 % 60:02}:{t % 60:02}")
+    return times
+
+
+def _import(name: str, method: str) -> Any:
+    try:
+        return importlib.import_module(name)  # optional library
+    except ImportError:
+        raise ImportError(
+            f'Columns.{method}() requires "{name}". '
+            f'To use it please install the dependency with "pip install {name}".'
+        )
+
+
+class Columns:
+    """A table stored as columns.
+
+    Numbers are stored in arrays, times as seconds since the epoch
+    and strings as codes of the list of categories of their column.
+    The raw data is in `arrays` and `categories`, indexing decodes a column into a list.
+
+    Batches of the same export share their categories, which only ever grow.
+    """
+
+    def __init__(self, schema: Dict[str, str]) -> None:
+        self.schema = dict(schema)
+        self.arrays: Dict[str, array] = {
+            name: array(_TYPECODES.get(kind, kind)) for name, kind in self.schema.items()
+        }
+        self.categories: Dict[str, List[str]] = {
+            name: [] for name, kind in self.schema.items() if kind == CATEGORY
+        }
+        self._lookup: Dict[str, Dict[str, int]] = {name: {} for name in self.categories}
+
+    def __len__(self) -> int:
+        return len(self.arrays["id"])
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} of {len(self)} rows: {', '.join(self.schema)}>"
+
+    def __getitem__(self, name: str) -> List[Any]:
+        kind = self.schema[name]
+        if kind == CATEGORY:
+            categories = self.categories[name]
+            return [categories[c] for c in self.arrays[name]]
+        if kind == DATETIME:
+            return _format_times(self.arrays[name])
+        return self.arrays[name].tolist()
+
+    def rows(self) -> Iterator[tuple]:
+        """Yields every row as a tuple of decoded values"""
+        return zip(*(self[name] for name in self.schema))
+
+    def _new_batch(self) -> "Columns":
+        batch = type(self)(self.schema)
+        batch.categories, batch._lookup = self.categories, self._lookup
+        return batch
+
+    def _encode(self, name: str, values: Iterable[str]) -> List[int]:
+        lookup, categories = self._lookup[name], self.categories[name]
+        values = list(values)
+        for value in dict.fromkeys(values):
+            if value not in lookup:
+                lookup[value] = len(categories)
+                categories.append(value)
+        return [lookup[v] for v in values]
+
+    def extend_column(self, name: str, values: Iterable[Any]) -> None:
+        """Appends values to a column, all columns must be extended by the same amount"""
+        kind = self.schema[name]
+        if kind == CATEGORY:
+            values = self._encode(name, values)
+        elif kind == DATETIME:
+            values = _parse_times(list(values))
+        else:
+            values = [int(v) for v in values]
+        self.arrays[name].fromlist(values)
+
+    def extend(self, other: "Columns") -> None:
+        """Appends all rows of other columns with the same schema"""
+        if other.schema != self.schema:
+            raise ValueError("Cannot extend columns with a different schema")
+        for name, kind in self.schema.items():
+            codes = other.arrays[name]
+            if kind == CATEGORY and other.categories[name] is not self.categories[name]:
+                translate = self._encode(name, other.categories[name])
+                codes = array(codes.typecode, [translate[c] for c in codes])
+            self.arrays[name].extend(codes)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Converts the columns into numpy arrays, categories are decoded into object arrays"""
+        np = _import("numpy", "to_numpy")
+        result = {}
+        for name, kind in self.schema.items():
+            values = np.array(memoryview(self.arrays[name]))
+            if kind == CATEGORY:
+                values = np.array(self.categories[name], dtype=object)[values]
+            elif kind == DATETIME:
+                values = values.view("datetime64[s]")
+            result[name] = values
+        return result
+
+    def to_arrow(self) -> Any:
+        """Converts the columns into an arrow table, categories are dictionaries"""
+        pa = _import("pyarrow", "to_arrow")
+        arrays = []
+        for name, kind in self.schema.items():
+            values = self.arrays[name]
+            # arrays are copied in one go, exporting their buffer would forbid extending them
+            buffers = [None, pa.py_buffer(values.tobytes())]
+            if kind == CATEGORY:
+                codes = pa.Array.from_buffers(pa.int32(), len(values), buffers)
+                categories = pa.array(self.categories[name], pa.string())
+                arrays.append(pa.DictionaryArray.from_arrays(codes, categories))
+            elif kind == DATETIME:
+                arrays.append(pa.Array.from_buffers(pa.timestamp("s"), len(values), buffers))
+            else:
+                dtype = getattr(pa, _DTYPES[values.typecode])()
+                arrays.append(pa.Array.from_buffers(dtype, len(values), buffers))
+        return pa.Table.from_arrays(arrays, names=list(self.schema))
+
+
+def _append(columns: Columns, page: List[Dict[str, Any]], fields: Dict[str, str]) -> None:
+    """Appends a page of the api to columns"""
+    for name, kind in columns.schema.items():
+        key = fields.get(name)
+        if key is None:
+            continue
+        if kind == CATEGORY:
+            columns.extend_column(name, [i[key] for i in page])
+        elif kind == DATETIME:
+            columns.arrays[name].fromlist(_parse_times([i[key] for i in page]))
+        else:
+            columns.arrays[name].fromlist([int(i[key]) for i in page])
+
+
+def iter_wish_history_columns(
+    banner_type: int = None,
+    size: int = None,
+    authkey: str = None,
+    end_id: int = 0,
+    lang: str = "en",
+    batch_size: int = 1000,
+) -> Iterator[Columns]:
+    """Yields the wish history in batches of columns.
+
+    Unlike get_wish_history the pulls of all banners are not merged,
+    they're grouped by banner and ordered from the newest pull.
+    The size limits the amount of pulls of every banner.
+    """
+    if size is not None and size <= 0:
+        return
+
+    banner_types = wishes.get_banner_types(authkey, lang)
+    batch = Columns(WISH_SCHEMA)
+    for banner in [banner_type] if banner_type is not None else banner_types:
+        for page in wishes._get_wish_pages(banner, size, authkey, end_id, lang):
+            _append(batch, page, _WISH_FIELDS)
+            batch.extend_column("banner", [banner_types[banner]] * len(page))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = batch._new_batch()
+
+    if len(batch):
+        yield batch
+
+
+def wish_history_to_columns(
+    banner_type: int = None, size: int = None, authkey: str = None, end_id: int = 0, lang: str = "en"
+) -> Columns:
+    """Gets the wish history as columns, see iter_wish_history_columns"""
+    for columns in iter_wish_history_columns(banner_type, size, authkey, end_id, lang, sys.maxsize):
+        return columns
+    return Columns(WISH_SCHEMA)
+
+
+def iter_transaction_columns(
+    kind: str = "primogem",
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    batch_size: int = 1000,
+) -> Iterator[Columns]:
+    """Yields a transaction log in batches of columns.
+
+    The kind may be primogem, crystal, resin, artifact or weapon.
+    Artifact and weapon logs also have the name and rarity of the item.
+    """
+    if size is not None and size <= 0:
+        return
+
+    schema = ITEM_TRANSACTION_SCHEMA if kind in ("artifact", "weapon") else TRANSACTION_SCHEMA
+    reasons = transactions._get_reasons(lang)
+    batch = Columns(schema)
+    for page in transactions._get_transaction_pages(LOGS[kind], size, authkey, end_id):
+        _append(batch, page, _TRANSACTION_FIELDS)
+        reason_ids = batch.arrays["reason_id"][len(batch) - len(page) :]
+        batch.extend_column("reason", [reasons.get(r, "") for r in reason_ids])
+        if len(batch) >= batch_size:
+            yield batch
+            batch = batch._new_batch()
+
+    if len(batch):
+        yield batch
+
+
+def transactions_to_columns(
+    kind: str = "primogem", size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+) -> Columns:
+    """Gets a transaction log as columns, see iter_transaction_columns"""
+    for columns in iter_transaction_columns(kind, size, authkey, lang, end_id, sys.maxsize):
+        return columns
+    schema = ITEM_TRANSACTION_SCHEMA if kind in ("artifact", "weapon") else TRANSACTION_SCHEMA
+    return Columns(schema)
+
+
+def _batches(columns: Union[Columns, Iterable[Columns]]) -> Iterable[Columns]:
+    return [columns] if isinstance(columns, Columns) else columns
+
+
+def write_csv(columns: Union[Columns, Iterable[Columns]], file: Union[str, IO[str]]) -> int:
+    """Writes columns or batches of columns into a csv file, returns the amount of rows written"""
+    if isinstance(file, str):
+        with open(file, "w", newline="", encoding="utf-8") as f:
+            return write_csv(columns, f)
+
+    writer = csv.writer(file)
+    rows = 0
+    for batch in _batches(columns):
+        if rows == 0:
+            writer.writerow(batch.schema)
+        writer.writerows(batch.rows())
+        rows += len(batch)
+    return rows
+
+
+def _write_block(file: IO[bytes], data: bytes) -> None:
+    file.write(struct.pack("<I", len(data)))
+    file.write(data)
+
+
+def _read_block(file: IO[bytes]) -> bytes:
+    header = file.read(4)
+    if len(header) < 4:
+        raise EOFError("Unexpected end of columns file")
+    return file.read(struct.unpack("<I", header)[0])
+
+
+def write_binary(columns: Union[Columns, Iterable[Columns]], file: Union[str, IO[bytes]]) -> int:
+    """Writes columns or batches of columns into a compact binary file.
+
+    The file starts with a header of the schema, every batch follows it with its amount of rows,
+    the categories it added and the raw arrays. Returns the amount of rows written.
+    """
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return write_binary(columns, f)
+
+    rows = 0
+    lookup: Dict[str, Dict[str, int]] = {}
+    for batch in _batches(columns):
+        if not lookup:
+            file.write(_MAGIC)
+            header = {"schema": batch.schema, "byteorder": sys.byteorder}
+            _write_block(file, json.dumps(header).encode())
+            lookup = {name: {} for name in batch.categories}
+
+        file.write(struct.pack("<I", len(batch)))
+        arrays = dict(batch.arrays)
+        for name, categories in batch.categories.items():
+            # categories are numbered in the order they were written, batches may not share them
+            new: List[str] = []
+            translate = []
+            for category in categories:
+                code = lookup[name].get(category)
+                if code is None:
+                    code = lookup[name][category] = len(lookup[name])
+                    new.append(category)
+                translate.append(code)
+            if translate != list(range(len(translate))):
+                arrays[name] = array("i", [translate[c] for c in arrays[name]])
+            _write_block(file, json.dumps(new).encode())
+
+        for name in batch.schema:
+            file.write(arrays[name].tobytes())
+        rows += len(batch)
+    return rows
+
+
+def read_binary(file: Union[str, IO[bytes]]) -> Columns:
+    """Reads columns from a file written by write_binary"""
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return read_binary(f)
+
+    if file.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError("Not a columns file")
+    header = json.loads(_read_block(file))
+    columns = Columns(header["schema"])
+    while True:
+        size = file.read(4)
+        if not size:
+            return columns
+        rows = struct.unpack("<I", size)[0]
+        for name in columns.categories:
+            for category in json.loads(_read_block(file)):
+                columns._lookup[name][category] = len(columns.categories[name])
+                columns.categories[name].append(category)
+        for name, values in columns.arrays.items():
+            batch = array(values.typecode)
+            batch.frombytes(file.read(rows * batch.itemsize))
+            if header["byteorder"] != sys.byteorder:
+                batch.byteswap()
+            values.extend(batch)
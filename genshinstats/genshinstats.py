@@ -6,15 +6,21 @@ import hashlib
 import json
 import random
 import string
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from http.cookies import SimpleCookie
-from typing import Any, Dict, List, Mapping, MutableMapping, Union
-from urllib.parse import urljoin
+from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.sessions import RequestsCookieJar, Session
 
+from .cookiepool import CookiePool, _get_cookie_id
 from .errors import NotLoggedIn, TooManyRequests, raise_for_error
+from .lazy import LazyList, LazyView
 from .pretty import (
     prettify_abyss,
     prettify_activities,
@@ -24,7 +30,15 @@ from .pretty import (
     prettyify_tcg,
     prettyify_tcg_basic,
 )
-from .utils import USER_AGENT, is_chinese, recognize_server, retry
+from .ratelimit import throttle
+from .utils import (
+    USER_AGENT,
+    RetryPolicy,
+    SingleFlight,
+    _parse_retry_after,
+    is_chinese,
+    recognize_server,
+)
 
 __all__ = [
     "set_cookie",
@@ -32,6 +46,7 @@ __all__ = [
     "get_browser_cookies",
     "set_cookies_auto",
     "set_cookie_auto",
+    "set_transport",
     "fetch_endpoint",
     "get_user_stats",
     "get_characters",
@@ -57,7 +72,19 @@ session.headers.update(
     }
 )
 
-cookies: List[RequestsCookieJar] = []  # a list of all avalible cookies
+cookies = CookiePool()  # a pool of all avalible cookies
+_flight = SingleFlight()  # requests which are in flight
+_cookies_lock = threading.Lock()
+# retries connection errors, server errors and internal errors with a backoff, per endpoint
+retry_policy = RetryPolicy(3, requests.ConnectionError)
+
+# idle sessions are shared between all threads, the global one is only a template for their settings
+# a session is only ever used by one request at a time so its connections are kept alive
+# even when threads of a ThreadPoolExecutor come and go
+_sessions: List[Tuple[Session, int]] = []
+_sessions_lock = threading.Lock()
+_transport: Dict[str, Any] = {"pool_size": 10, "keep_alive": True}
+_transport_version = 0
 #salt os update 
 OS_DS_SALT = "6cqshh5dhw73bzxn20oexa9k516chk7s"
 #"x-rpc-client_type": old salt = 6cqshh5dhw73bzxn20oexa9k516chk7s 
@@ -96,13 +123,16 @@ def set_cookies(*args: Union[Mapping[str, Any], str], clear: bool = True) -> Non
         cookies.clear()
 
     for cookie in args:
-        if isinstance(cookie, Mapping):
-            cookie = {k: str(v) for k, v in cookie.items()}  # SimpleCookie needs a string
-        cookie = SimpleCookie(cookie)
+        cookies.append(_parse_cookie(cookie))
+
 
-        jar = RequestsCookieJar()
-        jar.update(cookie)
-        cookies.append(jar)
+def _parse_cookie(cookie: Union[Mapping[str, Any], str]) -> RequestsCookieJar:
+    """Creates a cookie jar out of a cookie mapping or a cookie header"""
+    if isinstance(cookie, Mapping):
+        cookie = {k: str(v) for k, v in cookie.items()}  # SimpleCookie needs a string
+    jar = RequestsCookieJar()
+    jar.update(SimpleCookie(cookie))
+    return jar
 
 
 def get_browser_cookies(browser: str = None) -> Dict[str, str]:
@@ -165,19 +195,79 @@ def generate_cn_ds(salt: str, body: Any = None, query: Mapping[str, Any] = None)
     return f"{t},{r},{h}"
 
 
+def set_transport(pool_size: int = 10, keep_alive: bool = True) -> None:
+    """Configures the connections used for requests.
+
+    Requests borrow a session from a shared pool which keeps up to pool_size idle sessions,
+    every session keeps up to pool_size connections per host open.
+    If keep_alive is False connections are closed after every request.
+    """
+    global _transport_version
+    with _sessions_lock:
+        _transport.update(pool_size=pool_size, keep_alive=keep_alive)
+        _transport_version += 1
+        idle = _sessions.copy()
+        _sessions.clear()
+    for s, _ in idle:
+        s.close()
+
+
+@contextmanager
+def _borrow_session() -> Iterator[Session]:
+    """Borrows an idle session from the pool and returns it once the request is done.
+
+    Headers and other settings are always taken from the global session.
+    """
+    with _sessions_lock:
+        s, version = _sessions.pop() if _sessions else (None, _transport_version)
+    if s is None:
+        s = Session()
+        adapter = HTTPAdapter(pool_maxsize=_transport["pool_size"])
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+
+    s.headers = session.headers
+    s.verify, s.cert, s.proxies, s.trust_env = (
+        session.verify,
+        session.cert,
+        session.proxies,
+        session.trust_env,
+    )
+    try:
+        yield s
+    finally:
+        s.cookies.clear()  # cookies must not leak into requests of other users
+        with _sessions_lock:
+            keep = version == _transport_version and len(_sessions) < _transport["pool_size"]
+            if keep:
+                _sessions.append((s, version))
+        if not keep:
+            s.close()
+
+
 # sometimes a random connection error can just occur, mihoyo being mihoyo
-@retry(3, requests.ConnectionError)
+@retry_policy.wrap(lambda method, url, **kwargs: urlsplit(url).path)
 def _request(*args: Any, **kwargs: Any) -> Any:
     """Fancy requests.request"""
-    r = session.request(*args, **kwargs)
+    if not _transport["keep_alive"]:
+        kwargs["headers"] = {**kwargs.get("headers", {}), "connection": "close"}
+    with _borrow_session() as s:
+        r = s.request(*args, **kwargs)
 
     r.raise_for_status()
-    kwargs["cookies"].update(session.cookies)
-    session.cookies.clear()
+    # the server may renew cookies, the jar may be used by other threads at the same time
+    with _cookies_lock:
+        for response in (*r.history, r):
+            kwargs["cookies"].update(response.cookies)
     data = r.json()
     if data["retcode"] == 0:
         return data["data"]
-    raise_for_error(data)
+    raise_for_error(
+        data,
+        urlsplit(r.url).path,
+        _get_cookie_id(kwargs["cookies"]),
+        _parse_retry_after(r.headers.get("Retry-After")),
+    )
 
 
 def fetch_endpoint(
@@ -192,11 +282,33 @@ def fetch_endpoint(
     Can specifically use the chinese base url and request data for chinese users,
     but that requires being logged in as that user.
 
-    Supports handling ratelimits if multiple cookies are set with `set_cookies`
+    Supports handling ratelimits if multiple cookies are set with `set_cookies`,
+    every request uses the least used cookie which hasn't been ratelimited yet.
+
+    Identical GET requests which are sent at the same time share a single response.
     """
     # parse the arguments for requests.request
     kwargs.setdefault("headers", {})
     method = kwargs.pop("method", "get")
+    url = urljoin(CN_TAKUMI_URL if chinese else OS_TAKUMI_URL, endpoint)
+
+    if method.lower() != "get":
+        return _fetch_endpoint(method, url, chinese, cookie, **kwargs)
+
+    # identical requests that are in flight at the same time share a single response
+    key = json.dumps(
+        [url, kwargs.get("params"), kwargs["headers"], cookie and _get_cookie_id(cookie)],
+        sort_keys=True,
+        default=str,
+    )
+    return _flight.do(key, _fetch_endpoint, method, url, chinese, cookie, **kwargs)
+
+
+def _fetch_endpoint(
+    method: str, url: str, chinese: bool, cookie: Mapping[str, Any] = None, **kwargs
+) -> Dict[str, Any]:
+    """Sends a request to the API with authentication and ratelimit handling"""
+    kwargs["headers"] = kwargs["headers"].copy()
     if chinese:
         kwargs["headers"].update(
             {
@@ -205,7 +317,6 @@ def fetch_endpoint(
                 "x-rpc-client_type": "5",
             }
         )
-        url = urljoin(CN_TAKUMI_URL, endpoint)
     else:
         kwargs["headers"].update(
             {
@@ -214,29 +325,30 @@ def fetch_endpoint(
                 "x-rpc-client_type": "4",
             }
         )
-        url = urljoin(OS_TAKUMI_URL, endpoint)
 
     if cookie is not None:
         if not isinstance(cookie, MutableMapping) or not all(
             isinstance(v, str) for v in cookie.values()
         ):
             cookie = {k: str(v) for k, v in cookie.items()}
+        throttle(url, _get_cookie_id(cookie))
         return _request(method, url, cookies=cookie, **kwargs)
     elif len(cookies) == 0:
         raise NotLoggedIn("Login cookies have not been provided")
 
-    for cookie in cookies.copy():
+    # the quota is only used up by requests for other accounts
+    account = kwargs.get("params", {}).get("role_id") or (kwargs.get("json") or {}).get("role_id")
+    account = int(account) if account else None
+    while True:
+        cookie = cookies.acquire(account)  # raises TooManyRequests if there's none left
         try:
+            throttle(url, _get_cookie_id(cookie))
             return _request(method, url, cookies=cookie, **kwargs)
         except TooManyRequests:
-            # move the ratelimited cookie to the end to let the ratelimit wear off
-            cookies.append(cookies.pop(0))
-
-    # if we're here it means we used up all our cookies so we must handle that
-    if len(cookies) == 1:
-        raise TooManyRequests("Cannnot get data for more than 30 accounts per day.")
-    else:
-        raise TooManyRequests("All cookies have hit their request limit of 30 accounts per day.")
+            # the ratelimit lasts until the next day so the cookie won't be used until then
+            cookies.exhaust(cookie)
+        finally:
+            cookies.release(cookie)
 
 
 def fetch_game_record_endpoint(
@@ -249,11 +361,19 @@ def fetch_game_record_endpoint(
 
 
 def get_user_stats(
-    uid: int, equipment: bool = False, lang: str = "en-us", cookie: Mapping[str, Any] = None
-) -> Dict[str, Any]:
+    uid: int,
+    equipment: bool = False,
+    lang: str = "en-us",
+    cookie: Mapping[str, Any] = None,
+    raw: bool = False,
+    lazy: bool = False,
+) -> Mapping[str, Any]:
     """Gets basic user information and stats.
 
-    If equipment is True an additional request will be made to get the character equipment
+    If equipment is True an additional request will be made to get the character equipment.
+    If raw is True the unprettified response is returned,
+    with equipment the raw characters are stored under "characters".
+    If lazy is True a LazyView is returned which only prettifies the accessed sections.
     """
     server = recognize_server(uid)
     data = fetch_game_record_endpoint(
@@ -263,26 +383,43 @@ def get_user_stats(
         params=dict(server=server, role_id=uid),
         headers={"x-rpc-language": lang},
     )
-    data = prettify_stats(data)
     if equipment:
-        data["characters"] = get_characters(
-            uid, [i["id"] for i in data["characters"]], lang, cookie
-        )
-    return data
+        # the response may be shared with concurrent callers so it's never modified
+        data = {
+            **data,
+            "characters": get_characters(
+                uid, [i["id"] for i in data["avatars"]], lang, cookie, raw=True
+            ),
+        }
+    if raw:
+        return data
+    if lazy:
+        return LazyView(data, "stats")
+    stats = prettify_stats(data)
+    if equipment:
+        stats["characters"] = prettify_characters(data["characters"])
+    return stats
 
 
 def get_characters(
-    uid: int, character_ids: List[int] = None, lang: str = "en-us", cookie: Mapping[str, Any] = None
-) -> List[Dict[str, Any]]:
+    uid: int,
+    character_ids: List[int] = None,
+    lang: str = "en-us",
+    cookie: Mapping[str, Any] = None,
+    raw: bool = False,
+    lazy: bool = False,
+) -> Sequence[Mapping[str, Any]]:
     """Gets characters of a user.
 
     Characters contain info about their level, constellation, weapon, and artifacts.
     Talents are not included.
 
     If character_ids are provided then only characters with those ids are returned.
+    If raw is True the unprettified characters are returned,
+    if lazy is True a LazyList is returned which only prettifies the accessed characters.
     """
     if character_ids is None:
-        character_ids = [i["id"] for i in get_user_stats(uid)["characters"]]
+        character_ids = [i["id"] for i in get_user_stats(uid, cookie=cookie, raw=True)["avatars"]]
 
     server = recognize_server(uid)
     data = fetch_game_record_endpoint(
@@ -295,15 +432,25 @@ def get_characters(
         ),  # POST uses the body instead
         headers={"x-rpc-language": lang},
     )["avatars"]
+    if raw:
+        return data
+    if lazy:
+        return LazyList(data)
     return prettify_characters(data)
 
 
 def get_spiral_abyss(
-    uid: int, previous: bool = False, cookie: Mapping[str, Any] = None
-) -> Dict[str, Any]:
+    uid: int,
+    previous: bool = False,
+    cookie: Mapping[str, Any] = None,
+    raw: bool = False,
+    lazy: bool = False,
+) -> Mapping[str, Any]:
     """Gets spiral abyss runs of a user and details about them.
 
     Every season these stats refresh and you can get the previous stats with `previous`.
+    If raw is True the unprettified response is returned,
+    if lazy is True a LazyView is returned which only prettifies the accessed sections.
     """
     server = recognize_server(uid)
     schedule_type = 2 if previous else 1
@@ -313,6 +460,10 @@ def get_spiral_abyss(
         cookie=cookie,
         params=dict(server=server, role_id=uid, schedule_type=schedule_type),
     )
+    if raw:
+        return data
+    if lazy:
+        return LazyView(data, "abyss")
     return prettify_abyss(data)
 
 
@@ -369,8 +520,9 @@ def get_tcg_basic(
     return prettyify_tcg_basic(data)
 
 def get_tcg(
-    uid: int, lang: str = "en-us", cookie: Mapping[str, Any] = None, characters: bool = True, action: bool = True
-) -> Dict[str, Any]:
+    uid: int, lang: str = "en-us", cookie: Mapping[str, Any] = None, characters: bool = True, action: bool = True,
+    raw: bool = False, lazy: bool = False
+) -> Mapping[str, Any]:
     """ONLY LOGGED IN USER
     
     Gets the cards for Genius Invokation TCG that user UNLOCKED and basic user stats
@@ -380,6 +532,9 @@ def get_tcg(
     For characters contains info like hp, element, weapon and skills.
     
     For summons and events contains info about cost.
+    
+    If raw is True the unprettified response is returned,
+    if lazy is True a LazyView is returned which only prettifies the accessed sections.
     """
     server = recognize_server(uid)
     data = fetch_game_record_endpoint(
@@ -389,20 +544,44 @@ def get_tcg(
         params=dict(server=server, role_id=uid, need_avatar="true" if characters else "false", need_action="true" if action else "false", limit=265, need_stats="true",),
         headers={"x-rpc-language": lang},
     )
+    if raw:
+        return data
+    if lazy:
+        return LazyView(data, "tcg")
     return prettyify_tcg(data)
 
 def get_all_user_data(
-    uid: int, lang: str = "en-us", tcg_basic = True, cookie: Mapping[str, Any] = None
+    uid: int,
+    lang: str = "en-us",
+    tcg_basic=True,
+    cookie: Mapping[str, Any] = None,
+    max_workers: int = 4,
+    return_exceptions: bool = False,
 ) -> Dict[str, Any]:
-    """Fetches all data a user can has. Very slow.
+    """Fetches all data a user can has.
 
     A helper function that gets all avalible data for a user and returns it as one dict.
-    However that makes it fairly slow so it's not recommended to use it outside caching.
+    Independent sections are requested concurrently by up to max_workers threads,
+    so it takes about as long as the slowest request. Set max_workers to 1 to make them one by one.
+
+    If return_exceptions is True, a spiral abyss or tcg section that failed is replaced by its exception.
+    User stats are required for the result so their errors are always raised.
     """
-    data = get_user_stats(uid, equipment=True, lang=lang, cookie=cookie)
-    data["spiral_abyss"] = [get_spiral_abyss(uid, previous, cookie) for previous in [False, True]]
-    if tcg_basic == True:
-        data["tcg"] = get_tcg_basic(uid, lang=lang, cookie=cookie)
-    else:
-        data["tcg"] = get_tcg(uid, lang=lang, cookie=cookie)
+    get_tcg_data = get_tcg_basic if tcg_basic else get_tcg
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        stats = executor.submit(get_user_stats, uid, equipment=True, lang=lang, cookie=cookie)
+        abyss = [
+            executor.submit(get_spiral_abyss, uid, previous, cookie) for previous in [False, True]
+        ]
+        tcg = executor.submit(get_tcg_data, uid, lang=lang, cookie=cookie)
+
+    def result(future: Future) -> Any:
+        if return_exceptions and future.exception() is not None:
+            return future.exception()
+        return future.result()
+
+    data = dict(stats.result())
+    data["spiral_abyss"] = [result(future) for future in abyss]
+    data["tcg"] = result(tcg)
     return data
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Mapping, Optional
 from .caching import permanent_cache
 from .genshinstats import fetch_endpoint, fetch_game_record_endpoint
 from .pretty import prettify_game_accounts
+from .ratelimit import get_ratelimiter
 from .utils import deprecated, recognize_server
 
 __all__ = [
@@ -23,6 +24,10 @@ __all__ = [
     "get_hot_posts",
 ]
 
+OS_BINDING_URL = "https://api-os-takumi.hoyoverse.com/binding/api/"
+CN_BINDING_URL = "https://api-takumi.mihoyo.com/binding/api/"
+REDEEM_URL = "https://sg-hk4e-api.hoyoverse.com/common/apicdkey/api/webExchangeCdkey"
+
 
 @permanent_cache()
 def get_langs() -> Dict[str, str]:
@@ -80,8 +85,8 @@ def get_game_accounts(
 
     Can get accounts both for overseas and china.
     """
-    url = "https://api-takumi.mihoyo.com/" if chinese else "https://api-os-takumi.hoyoverse.com/"
-    data = fetch_endpoint(url + "binding/api/getUserGameRolesByCookie", cookie=cookie)["list"]
+    url = CN_BINDING_URL if chinese else OS_BINDING_URL
+    data = fetch_endpoint(url + "getUserGameRolesByCookie", cookie=cookie)["list"]
     return prettify_game_accounts(data)
 
 
@@ -127,15 +132,14 @@ def redeem_code(code: str, uid: int = None, cookie: Mapping[str, Any] = None) ->
     specifying the uid will claim it only for that account.
     Returns the amount of users it managed to claim codes for.
 
-    You can claim codes only every 5s so you must sleep between claims.
-    The function sleeps for you when claiming for every account
-    but you must sleep yourself when passing in a uid or when an error is encountered.
+    You can claim codes only every 5s, the ratelimiter waits between claims of the same cookie.
+    If ratelimiting is disabled, claims for every account are still spaced out by 5s.
 
     Currently codes can only be claimed for overseas accounts, not chinese.
     """
     if uid is not None:
         fetch_endpoint(
-            "https://sg-hk4e-api.hoyoverse.com/common/apicdkey/api/webExchangeCdkey",
+            REDEEM_URL,
             cookie=cookie,
             params=dict(
                 uid=uid, region=recognize_server(uid), cdkey=code, game_biz="hk4e_global", lang="en"
@@ -147,7 +151,7 @@ def redeem_code(code: str, uid: int = None, cookie: Mapping[str, Any] = None) ->
             account for account in get_game_accounts(cookie=cookie) if account["level"] >= 10
         ]
         for i, account in enumerate(accounts):
-            if i:
+            if i and get_ratelimiter() is None:
                 time.sleep(5)  # there's a ratelimit of 1 request every 5 seconds
             redeem_code(code, account["uid"], cookie)
 
@@ -0,0 +1,104 @@
+"""Lazy views of api responses.
+
+Prettifying a whole response is wasted work when only a part of it is used,
+these views keep the raw response and only prettify a section once it's accessed.
+Pickling a view only stores the raw response so views are cheap to cache.
+
+>>> stats = gs.get_user_stats(uid, lazy=True)
+>>> stats["stats"]["achievements"]  # info, characters, teapot and explorations are never prettified
+"""
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, Iterator, List
+
+from .pretty import abyss_sections, prettify_character, stats_sections, tcg_sections
+
+__all__ = ["LazyView", "LazyList"]
+
+
+class LazyList(Sequence):
+    """A read-only list of characters which are prettified on access"""
+
+    __slots__ = ("data", "_cache")
+
+    def __init__(self, data: List[Dict[str, Any]]) -> None:
+        self.data = data
+        self._cache: Dict[int, Dict[str, Any]] = {}
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.data)))]
+        if index < 0:
+            index += len(self.data)
+        if index not in self._cache:
+            self._cache[index] = prettify_character(self.data[index])
+        return self._cache[index]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (LazyList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self.data)} characters)"
+
+    def __reduce__(self) -> Any:
+        return type(self), (self.data,)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Prettifies all characters into the list returned without lazy"""
+        return list(self)
+
+
+def _stats_characters(data: Dict[str, Any]) -> Any:
+    # characters with equipment are stored raw under "characters" by get_user_stats
+    if "characters" in data:
+        return LazyList(data["characters"])
+    return stats_sections["characters"](data)
+
+
+_sections: Dict[str, Dict[str, Callable[[Dict[str, Any]], Any]]] = {
+    "stats": {**stats_sections, "characters": _stats_characters},
+    "abyss": abyss_sections,
+    "tcg": tcg_sections,
+}
+
+
+class LazyView(Mapping):
+    """A read-only mapping of a response whose sections are prettified on access"""
+
+    __slots__ = ("data", "kind", "_cache")
+
+    def __init__(self, data: Dict[str, Any], kind: str) -> None:
+        if kind not in _sections:
+            raise ValueError(f"{kind!r} is not a valid kind, must be one of {list(_sections)}")
+        self.data = data
+        self.kind = kind
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._cache:
+            self._cache[key] = _sections[self.kind][key](self.data)
+        return self._cache[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_sections[self.kind])
+
+    def __len__(self) -> int:
+        return len(_sections[self.kind])
+
+    def __repr__(self) -> str:
+        prettified = ", ".join(self._cache)
+        return f"{type(self).__name__}({self.kind!r}, prettified=[{prettified}])"
+
+    def __reduce__(self) -> Any:
+        return type(self), (self.data, self.kind)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Prettifies all sections into the dict returned without lazy"""
+        return {
+            key: value.to_list() if isinstance(value, LazyList) else value
+            for key, value in self.items()
+        }
@@ -3,8 +3,13 @@
 Fixes the huge problem of outdated field names in the api,
 that were leftover from during development
 """
-import re, json, requests
+import re, json
 from datetime import datetime
+from functools import lru_cache
+from sys import intern
+
+from .characters import get_character_name
+from .records import ItemTransaction, Transaction, Wish
 
 
 elements = {
@@ -17,167 +22,213 @@ elements = {
     "Ice": "Cyro"
 }
 
+# constant tables are built once instead of for every element
+artifact_positions = {1: "flower", 2: "feather", 3: "hourglass", 4: "goblet", 5: "crown"}
+set_effect_types = ["none", "single", "classic"]
+banner_type_names = {
+    100: "Novice Wishes",
+    200: "Permanent Wish",
+    301: "Character Event Wish",
+    302: "Weapon Event Wish",
+}
+item_elements = {
+    "风": "Anemo",
+    "火": "Pyro",
+    "水": "Hydro",
+    "雷": "Electro",
+    "冰": "Cryo",
+    "岩": "Geo",
+    "？": "Dendro",
+    "": None,
+}
+tcg_card_types = {
+    "CardTypeCharacter": "characters",  # Characters
+    "CardTypeModify": "equipment",  # Artefacts, weapons etc.
+    "CardTypeAssist": "summons",  # Summon Timmie, Liben etc.
+    "CardTypeEvent": "event",  # Get another card, switch character as fast action etc.
+}
+
+_html_tag = re.compile(r"<.*?>")
+_tcg_tag = re.compile(r"([A-Z])\w+")
+
 
 def _recognize_character_id(id: int) -> str:
     """Recognizes a character's id and returns its name."""
-    ambr_top = requests.get('https://api.ambr.top/v2/en/avatar').json()
-    return ambr_top['data']['items'][f'{id}']['name']
+    # the catalogue is shared by the whole process so this doesn't make any requests
+    return get_character_name(id) or f"Unknown ({id})"
 
 
-def prettify_stats(data):
+def _prettify_stats_info(data):
     r = data["role"]
+    return {
+        "nick": r["nickname"],
+        "level": r["level"],
+        "region": r["region"],
+        "avatar_url": r["AvatarUrl"] # idk what is this for
+    }
+
+
+def _prettify_stats_stats(data):
     s = data["stats"]
-    h = data["homes"][0] if data["homes"] else None
     return {
-        "info": {
-            "nick": r["nickname"],
-            "level": r["level"],
-            "region": r["region"],
-            "avatar_url": r["AvatarUrl"] # idk what is this for
-        },
-        "stats": {
-            "achievements": s["achievement_number"],
-            "active_days": s["active_day_number"],
-            "characters": s["avatar_number"],
-            "spiral_abyss": s["spiral_abyss"],
-            "anemoculi": s["anemoculus_number"],
-            "geoculi": s["geoculus_number"],
-            "electroculi": s["electroculus_number"],
-            "dendroculus": s["dendroculus_number"],
-            "hydroculus": s["hydroculus_number"],
-            "common_chests": s["common_chest_number"],
-            "exquisite_chests": s["exquisite_chest_number"],
-            "precious_chests": s["precious_chest_number"],
-            "luxurious_chests": s["luxurious_chest_number"],
-            "remarkable_chests": s["magic_chest_number"],
-            "unlocked_waypoints": s["way_point_number"],
-            "unlocked_domains": s["domain_number"],
-        },
-        "characters": [
-            {
-                "name": i["name"],
-                "rarity": i["rarity"]
-                if i["rarity"] < 100
-                else i["rarity"] - 100,  # aloy has 105 stars
-                "element": i["element"],
-                "level": i["level"],
-                "friendship": i["fetter"],
-                "constellation": i["actived_constellation_num"],
-                "icon": i["image"],
-                "id": i["id"],
-            }
-            for i in data["avatars"]
-        ],
-        "teapot": {
-            # only unique data between realms are names and icons
-            "realms": [{"name": s["name"], "icon": s["icon"]} for s in data["homes"]],
-            "level": h["level"],
-            "comfort": h["comfort_num"],
-            "comfort_name": h["comfort_level_name"],
-            "comfort_icon": h["comfort_level_icon"],
-            "items": h["item_num"],
-            "visitors": h["visit_num"],  # currently not in use
-        }
-        if h
-        else None,
-        "explorations": [
-            {
-                "id": i['id'],
-                "name": i["name"],
-                "explored": round(i["exploration_percentage"] / 10, 1),
-                "type": i["type"],
-                "level": i["level"],
-                "icon": i["icon"], # icon in white color
-                "icon_dark": i["inner_icon"], # icon in black color
-                "offerings": i["offerings"],
-            }
-            for i in data["world_explorations"]
-        ],
+        "achievements": s["achievement_number"],
+        "active_days": s["active_day_number"],
+        "characters": s["avatar_number"],
+        "spiral_abyss": s["spiral_abyss"],
+        "anemoculi": s["anemoculus_number"],
+        "geoculi": s["geoculus_number"],
+        "electroculi": s["electroculus_number"],
+        "dendroculus": s["dendroculus_number"],
+        "hydroculus": s["hydroculus_number"],
+        "common_chests": s["common_chest_number"],
+        "exquisite_chests": s["exquisite_chest_number"],
+        "precious_chests": s["precious_chest_number"],
+        "luxurious_chests": s["luxurious_chest_number"],
+        "remarkable_chests": s["magic_chest_number"],
+        "unlocked_waypoints": s["way_point_number"],
+        "unlocked_domains": s["domain_number"],
     }
 
 
-def prettify_characters(data):
+def _prettify_stats_characters(data):
     return [
         {
             "name": i["name"],
-            "rarity": i["rarity"] if i["rarity"] < 100 else i["rarity"] - 100,  # aloy has 105 stars
+            "rarity": i["rarity"]
+            if i["rarity"] < 100
+            else i["rarity"] - 100,  # aloy has 105 stars
             "element": i["element"],
             "level": i["level"],
             "friendship": i["fetter"],
-            "constellation": sum(c["is_actived"] for c in i["constellations"]),
-            "icon": i["icon"],
-            "image": i["image"],
+            "constellation": i["actived_constellation_num"],
+            "icon": i["image"],
             "id": i["id"],
-            "collab": i["rarity"] >= 100,
-            **(
-                {"traveler_name": "Aether" if "Boy" in i["icon"] else "Lumine"}
-                if "Player" in i["icon"]
-                else {}
-            ),
-            "weapon": {
-                "name": i["weapon"]["name"],
-                "rarity": i["weapon"]["rarity"],
-                "type": i["weapon"]["type_name"],
-                "level": i["weapon"]["level"],
-                "ascension": i["weapon"]["promote_level"],
-                "refinement": i["weapon"]["affix_level"],
-                "description": i["weapon"]["desc"],
-                "icon": i["weapon"]["icon"],
-                "id": i["weapon"]["id"],
-            },
-            "artifacts": [
-                {
-                    "name": a["name"],
-                    "pos_name": {
-                        1: "flower",
-                        2: "feather",
-                        3: "hourglass",
-                        4: "goblet",
-                        5: "crown",
-                    }[a["pos"]],
-                    "full_pos_name": a["pos_name"],
-                    "pos": a["pos"],
-                    "rarity": a["rarity"],
-                    "level": a["level"],
-                    "set": {
-                        "name": a["set"]["name"],
-                        "effect_type": ["none", "single", "classic"][len(a["set"]["affixes"])],
-                        "effects": [
-                            {
-                                "pieces": e["activation_number"],
-                                "effect": e["effect"],
-                            }
-                            for e in a["set"]["affixes"]
-                        ],
-                        #"set_id": int(re.search(r"UI_RelicIcon_(\d+)_\d+", a["icon"]).group(1)),  # type: ignore
-                        "id": a["set"]["id"],
-                    },
-                    "icon": a["icon"],
-                    "id": a["id"],
-                }
-                for a in i["reliquaries"]
-            ],
-            "constellations": [
-                {
-                    "name": c["name"],
-                    "effect": c["effect"],
-                    "is_activated": c["is_actived"],
-                    "index": c["pos"],
-                    "icon": c["icon"],
-                    "id": c["id"],
-                }
-                for c in i["constellations"]
-            ],
-            "outfits": [
-                {"name": c["name"], "icon": c["icon"], "id": c["id"]} for c in i["costumes"]
-            ],
         }
-        for i in data
+        for i in data["avatars"]
     ]
 
 
-def prettify_abyss(data):
-    fchars = lambda d: [
+def _prettify_stats_teapot(data):
+    h = data["homes"][0] if data["homes"] else None
+    return {
+        # only unique data between realms are names and icons
+        "realms": [{"name": s["name"], "icon": s["icon"]} for s in data["homes"]],
+        "level": h["level"],
+        "comfort": h["comfort_num"],
+        "comfort_name": h["comfort_level_name"],
+        "comfort_icon": h["comfort_level_icon"],
+        "items": h["item_num"],
+        "visitors": h["visit_num"],  # currently not in use
+    } if h else None
+
+
+def _prettify_stats_explorations(data):
+    return [
+        {
+            "id": i['id'],
+            "name": i["name"],
+            "explored": round(i["exploration_percentage"] / 10, 1),
+            "type": i["type"],
+            "level": i["level"],
+            "icon": i["icon"], # icon in white color
+            "icon_dark": i["inner_icon"], # icon in black color
+            "offerings": i["offerings"],
+        }
+        for i in data["world_explorations"]
+    ]
+
+
+# every section of a response is prettified on its own so lazy views can skip the unused ones
+stats_sections = {
+    "info": _prettify_stats_info,
+    "stats": _prettify_stats_stats,
+    "characters": _prettify_stats_characters,
+    "teapot": _prettify_stats_teapot,
+    "explorations": _prettify_stats_explorations,
+}
+
+
+def prettify_stats(data):
+    return {key: section(data) for key, section in stats_sections.items()}
+
+
+def prettify_character(i):
+    return {
+        "name": i["name"],
+        "rarity": i["rarity"] if i["rarity"] < 100 else i["rarity"] - 100,  # aloy has 105 stars
+        "element": i["element"],
+        "level": i["level"],
+        "friendship": i["fetter"],
+        "constellation": sum(c["is_actived"] for c in i["constellations"]),
+        "icon": i["icon"],
+        "image": i["image"],
+        "id": i["id"],
+        "collab": i["rarity"] >= 100,
+        **(
+            {"traveler_name": "Aether" if "Boy" in i["icon"] else "Lumine"}
+            if "Player" in i["icon"]
+            else {}
+        ),
+        "weapon": {
+            "name": i["weapon"]["name"],
+            "rarity": i["weapon"]["rarity"],
+            "type": i["weapon"]["type_name"],
+            "level": i["weapon"]["level"],
+            "ascension": i["weapon"]["promote_level"],
+            "refinement": i["weapon"]["affix_level"],
+            "description": i["weapon"]["desc"],
+            "icon": i["weapon"]["icon"],
+            "id": i["weapon"]["id"],
+        },
+        "artifacts": [
+            {
+                "name": a["name"],
+                "pos_name": artifact_positions[a["pos"]],
+                "full_pos_name": a["pos_name"],
+                "pos": a["pos"],
+                "rarity": a["rarity"],
+                "level": a["level"],
+                "set": {
+                    "name": a["set"]["name"],
+                    "effect_type": set_effect_types[len(a["set"]["affixes"])],
+                    "effects": [
+                        {
+                            "pieces": e["activation_number"],
+                            "effect": e["effect"],
+                        }
+                        for e in a["set"]["affixes"]
+                    ],
+                    #"set_id": int(re.search(r"UI_RelicIcon_(\d+)_\d+", a["icon"]).group(1)),  # type: ignore
+                    "id": a["set"]["id"],
+                },
+                "icon": a["icon"],
+                "id": a["id"],
+            }
+            for a in i["reliquaries"]
+        ],
+        "constellations": [
+            {
+                "name": c["name"],
+                "effect": c["effect"],
+                "is_activated": c["is_actived"],
+                "index": c["pos"],
+                "icon": c["icon"],
+                "id": c["id"],
+            }
+            for c in i["constellations"]
+        ],
+        "outfits": [
+            {"name": c["name"], "icon": c["icon"], "id": c["id"]} for c in i["costumes"]
+        ],
+    }
+
+
+def prettify_characters(data):
+    return [prettify_character(i) for i in data]
+
+
+def _abyss_characters(d):
+    return [
         {
             "value": a["value"],
             "name": _recognize_character_id(a["avatar_id"]),
@@ -187,66 +238,90 @@ def prettify_abyss(data):
         }
         for a in d
     ]
-    todate = lambda x: datetime.fromtimestamp(int(x)).strftime("%Y-%m-%d")
-    totime = lambda x: datetime.fromtimestamp(int(x)).isoformat(" ")
+
+
+def _abyss_date(x):
+    return datetime.fromtimestamp(int(x)).strftime("%Y-%m-%d")
+
+
+def _abyss_time(x):
+    return datetime.fromtimestamp(int(x)).isoformat(" ")
+
+
+def _prettify_abyss_stats(data):
     return {
-        "season": data["schedule_id"],
-        "season_start_time": todate(data["start_time"]),
-        "season_end_time": todate(data["end_time"]),
-        "stats": {
-            "total_battles": data["total_battle_times"],
-            "total_wins": data["total_win_times"],
-            "max_floor": data["max_floor"],
-            "total_stars": data["total_star"],
-        },
-        "character_ranks": {
-            "most_played": fchars(data["reveal_rank"]),
-            "most_kills": fchars(data["defeat_rank"]),
-            "strongest_strike": fchars(data["damage_rank"]),
-            "most_damage_taken": fchars(data["take_damage_rank"]),
-            "most_bursts_used": fchars(data["normal_skill_rank"]),
-            "most_skills_used": fchars(data["energy_skill_rank"]),
-        },
-        "floors": [
-            {
-                "floor": f["index"],
-                "stars": f["star"],
-                "max_stars": f["max_star"],
-                "icon": f["icon"],
-                "chambers": [
-                    {
-                        "chamber": l["index"],
-                        "stars": l["star"],
-                        "max_stars": l["max_star"],
-                        "has_halves": len(l["battles"]) == 2,
-                        "battles": [
-                            {
-                                "half": b["index"],
-                                "timestamp": totime(b["timestamp"]),
-                                "characters": [
-                                    {
-                                        "name": _recognize_character_id(c["id"]),
-                                        "rarity": c["rarity"]
-                                        if c["rarity"] < 100
-                                        else c["rarity"] - 100,  # aloy has 105 stars
-                                        "level": c["level"],
-                                        "icon": c["icon"],
-                                        "id": c["id"],
-                                    }
-                                    for c in b["avatars"]
-                                ],
-                            }
-                            for b in l["battles"]
-                        ],
-                    }
-                    for l in f["levels"]
-                ],
-            }
-            for f in data["floors"]
-        ],
+        "total_battles": data["total_battle_times"],
+        "total_wins": data["total_win_times"],
+        "max_floor": data["max_floor"],
+        "total_stars": data["total_star"],
     }
 
 
+def _prettify_abyss_character_ranks(data):
+    return {
+        "most_played": _abyss_characters(data["reveal_rank"]),
+        "most_kills": _abyss_characters(data["defeat_rank"]),
+        "strongest_strike": _abyss_characters(data["damage_rank"]),
+        "most_damage_taken": _abyss_characters(data["take_damage_rank"]),
+        "most_bursts_used": _abyss_characters(data["normal_skill_rank"]),
+        "most_skills_used": _abyss_characters(data["energy_skill_rank"]),
+    }
+
+
+def _prettify_abyss_floors(data):
+    return [
+        {
+            "floor": f["index"],
+            "stars": f["star"],
+            "max_stars": f["max_star"],
+            "icon": f["icon"],
+            "chambers": [
+                {
+                    "chamber": l["index"],
+                    "stars": l["star"],
+                    "max_stars": l["max_star"],
+                    "has_halves": len(l["battles"]) == 2,
+                    "battles": [
+                        {
+                            "half": b["index"],
+                            "timestamp": _abyss_time(b["timestamp"]),
+                            "characters": [
+                                {
+                                    "name": _recognize_character_id(c["id"]),
+                                    "rarity": c["rarity"]
+                                    if c["rarity"] < 100
+                                    else c["rarity"] - 100,  # aloy has 105 stars
+                                    "level": c["level"],
+                                    "icon": c["icon"],
+                                    "id": c["id"],
+                                }
+                                for c in b["avatars"]
+                            ],
+                        }
+                        for b in l["battles"]
+                    ],
+                }
+                for l in f["levels"]
+            ],
+        }
+        for f in data["floors"]
+    ]
+
+
+abyss_sections = {
+    "season": lambda data: data["schedule_id"],
+    "season_start_time": lambda data: _abyss_date(data["start_time"]),
+    "season_end_time": lambda data: _abyss_date(data["end_time"]),
+    "stats": _prettify_abyss_stats,
+    "character_ranks": _prettify_abyss_character_ranks,
+    "floors": _prettify_abyss_floors,
+}
+
+
+def prettify_abyss(data):
+    return {key: section(data) for key, section in abyss_sections.items()}
+
+
 def prettify_activities(data):
     activities = {
         k: v if v.get("exists_data") else {"records": []}
@@ -334,7 +409,36 @@ def prettify_game_accounts(data):
     ]
 
 
-def prettify_wish_history(data, banner_name=None):
+def _int_cache():
+    """Creates a converter which reuses ints of repeated strings like uids"""
+    cache = {}
+
+    def to_int(s):
+        try:
+            return cache[s]
+        except KeyError:
+            cache[s] = i = int(s)
+            return i
+
+    return to_int
+
+
+def prettify_wish_history(data, banner_name=None, records=False):
+    if records:
+        to_int = _int_cache()
+        return [
+            Wish(
+                intern(i["item_type"]),
+                intern(i["name"]),
+                int(i["rank_type"]),
+                i["time"],
+                int(i["id"]),
+                banner_name,
+                to_int(i["gacha_type"]),
+                to_int(i["uid"]),
+            )
+            for i in data
+        ]
     return [
         {
             "type": i["item_type"],
@@ -364,53 +468,43 @@ def prettify_gacha_items(data):
     ]
 
 
+def _parse_probability(p):
+    return None if p == "0%" else float(p[:-1].replace(",", "."))
+
+
+def _prettify_banner_items(l):
+    return [
+        {
+            "type": i["item_type"],
+            "name": i["item_name"],
+            "rarity": int(i["rank"]),
+            "is_up": bool(i["is_up"]),
+            "order_value": i["order_value"],
+        }
+        for i in l or []
+    ]
+
+
+def _prettify_rate_up_items(l):
+    return [
+        {
+            "type": i["item_type"],
+            "name": i["item_name"],
+            "element": item_elements[i["item_attr"]],
+            "icon": i["item_img"],
+        }
+        for i in l or []
+    ]
+
+
 def prettify_banner_details(data):
-    per = lambda p: None if p == "0%" else float(p[:-1].replace(",", "."))
-    fprobs = (
-        lambda l: [
-            {
-                "type": i["item_type"],
-                "name": i["item_name"],
-                "rarity": int(i["rank"]),
-                "is_up": bool(i["is_up"]),
-                "order_value": i["order_value"],
-            }
-            for i in l
-        ]
-        if l
-        else []
-    )
-    fitems = (
-        lambda l: [
-            {
-                "type": i["item_type"],
-                "name": i["item_name"],
-                "element": {
-                    "风": "Anemo",
-                    "火": "Pyro",
-                    "水": "Hydro",
-                    "雷": "Electro",
-                    "冰": "Cryo",
-                    "岩": "Geo",
-                    "？": "Dendro",
-                    "": None,
-                }[i["item_attr"]],
-                "icon": i["item_img"],
-            }
-            for i in l
-        ]
-        if l
-        else []
-    )
+    per = _parse_probability
+    fprobs = _prettify_banner_items
+    fitems = _prettify_rate_up_items
     return {
-        "banner_type_name": {
-            100: "Novice Wishes",
-            200: "Permanent Wish",
-            301: "Character Event Wish",
-            302: "Weapon Event Wish",
-        }[int(data["gacha_type"])],
+        "banner_type_name": banner_type_names[int(data["gacha_type"])],
         "banner_type": int(data["gacha_type"]),
-        "banner": re.sub(r"<.*?>", "", data["title"]).strip(),
+        "banner": _html_tag.sub("", data["title"]).strip(),
         "title": data["title"],
         "content": data["content"],
         "date_range": data["date_range"],
@@ -440,7 +534,35 @@ def prettify_banner_details(data):
     }
 
 
-def prettify_trans(data, reasons={}):
+def prettify_trans(data, reasons={}, records=False):
+    if records:
+        to_int = _int_cache()
+        if data and "name" in data[0]:
+            return [
+                ItemTransaction(
+                    i["time"],
+                    intern(i["name"]),
+                    to_int(i["rank"]),
+                    to_int(i["add_num"]),
+                    reasons.get(to_int(i["reason"]), ""),
+                    to_int(i["reason"]),
+                    to_int(i["uid"]),
+                    int(i["id"]),
+                )
+                for i in data
+            ]
+        return [
+            Transaction(
+                i["time"],
+                to_int(i["add_num"]),
+                reasons.get(to_int(i["reason"]), ""),
+                to_int(i["reason"]),
+                to_int(i["uid"]),
+                int(i["id"]),
+            )
+            for i in data
+        ]
+
     if data and "name" in data[0]:
         # transaction item
         return [
@@ -470,82 +592,96 @@ def prettify_trans(data, reasons={}):
             for i in data
         ]
 
-def prettyify_tcg(data):
+@lru_cache(maxsize=None)
+def _parse_tcg_tag(tag, prefix):
+    return _tcg_tag.search(tag)[0].replace(prefix, "")
+
+
+@lru_cache(maxsize=None)
+def _tcg_cost_type(cost_type):
+    return str(cost_type).replace('CostType', '').replace('Same', 'of the same type').replace('Void', 'of random type')
+
+
+def _prettify_tcg_card(card):
+    cost = card['action_cost'][0]
+    return {
+        "id": card['id'],
+        "name": card['name'],
+        "description": card['desc'],
+        "image": card['image'],
+        "amount": card['num'],
+        "used": card['use_count'],
+        "card_proficiency": card['proficiency'],
+        "action_cost": None if cost['cost_value'] == 0 else f"{cost['cost_value']} {_tcg_cost_type(cost['cost_type'])}",
+        "wiki": card['card_wiki']
+    }
+
+
+def _prettify_tcg_stats(data):
     stats = data['stats']
-    data = data['card_list']
-    characters = list(filter(lambda x:x['card_type']=='CardTypeCharacter',data)) # Characters
-    equipment = list(filter(lambda x:x['card_type']=='CardTypeModify',data)) # Artefacts, weapons etc.
-    summons = list(filter(lambda x:x['card_type']=='CardTypeAssist',data)) # Summon Timmie, Liben etc.
-    event = list(filter(lambda x:x['card_type']=='CardTypeEvent',data)) # Get another card, switch character as fast action etc.
-    reg = r"([A-Z])\w+"
     return {
-        "stats": {
-                "level": stats['level'],
-                "characters_unlocked": stats['avatar_card_num_gained'],
-                "characters_card_total_num": stats['avatar_card_num_total'],
-                "actions_unlocked": stats['action_card_num_gained'],
-                "action_card_total_num": stats['action_card_num_total']
-            },
-        "characters": [
-            {
-                "id": character['id'],
-                "name": character['name'],
-                "description": character['desc'],
-                "image": character['image'],
-                "hp": character['hp'],
-                "used": character['use_count'],
-                "card_proficiency": character['proficiency'],
-                "element": elements[re.search(reg, character['tags'][0])[0].replace("UI_Gcg_Tag_Element_", "")],
-                "weapon_type": re.search(reg, character['tags'][1])[0].replace("UI_Gcg_Tag_Weapon_", ""),
-                "skills": [
-                    {
-                        "name": i['name'],
-                        "description": i['desc'],
-                        "type": i['tag'] 
-                    } for i in character['card_skills']
-                ],
-                "wiki": character['card_wiki']
-            } for character in characters if character['num'] > 0
-        ],
-        "equipment": [
-            {
-                "id": modifier['id'],
-                "name": modifier['name'],
-                "description": modifier['desc'],
-                "image": modifier['image'],
-                "amount": modifier['num'],
-                "used": modifier['use_count'],
-                "card_proficiency": modifier['proficiency'],
-                "action_cost": None if modifier['action_cost'][0]['cost_value'] == 0 else f"{modifier['action_cost'][0]['cost_value']} {str(modifier['action_cost'][0]['cost_type']).replace('CostType', '').replace('Same', 'of the same type').replace('Void', 'of random type')}",
-                "wiki": modifier['card_wiki']
-            } for modifier in equipment if modifier['num'] > 0
-        ],
-        "summons": [
+        "level": stats['level'],
+        "characters_unlocked": stats['avatar_card_num_gained'],
+        "characters_card_total_num": stats['avatar_card_num_total'],
+        "actions_unlocked": stats['action_card_num_gained'],
+        "action_card_total_num": stats['action_card_num_total']
+    }
+
+
+def _prettify_tcg_character(character):
+    return {
+        "id": character['id'],
+        "name": character['name'],
+        "description": character['desc'],
+        "image": character['image'],
+        "hp": character['hp'],
+        "used": character['use_count'],
+        "card_proficiency": character['proficiency'],
+        "element": elements[_parse_tcg_tag(character['tags'][0], "UI_Gcg_Tag_Element_")],
+        "weapon_type": _parse_tcg_tag(character['tags'][1], "UI_Gcg_Tag_Weapon_"),
+        "skills": [
             {
-                "id": assist['id'],
-                "name": assist['name'],
-                "description": assist['desc'],
-                "image": assist['image'],
-                "amount": assist['num'],
-                "used": assist['use_count'],
-                "card_proficiency": assist['proficiency'],
-                "action_cost": None if assist['action_cost'][0]['cost_value'] == 0 else f"{assist['action_cost'][0]['cost_value']} {str(assist['action_cost'][0]['cost_type']).replace('CostType', '').replace('Same', 'of the same type').replace('Void', 'of random type')}",
-                "wiki": assist['card_wiki']
-            } for assist in summons if assist['num'] > 0
+                "name": i['name'],
+                "description": i['desc'],
+                "type": i['tag'] 
+            } for i in character['card_skills']
         ],
-        "event": [
-            {
-                "id": events['id'],
-                "name": events['name'],
-                "description": events['desc'],
-                "image": events['image'],
-                "amount": events['num'],
-                "used": events['use_count'],
-                "card_proficiency": events['proficiency'],
-                "action_cost": None if events['action_cost'][0]['cost_value'] == 0 else f"{events['action_cost'][0]['cost_value']} {str(events['action_cost'][0]['cost_type']).replace('CostType', '').replace('Same', 'of the same type').replace('Void', 'of random type')}",
-                "wiki": events['card_wiki']
-            } for events in event if events['num'] > 0
+        "wiki": character['card_wiki']
+    }
+
+
+def _tcg_bucket(bucket, prettify):
+    # a lazy section only looks at the owned cards of its own type
+    def section(data):
+        return [
+            prettify(card) for card in data['card_list']
+            if tcg_card_types.get(card['card_type']) == bucket and card['num'] > 0
         ]
+    return section
+
+
+tcg_sections = {
+    "stats": _prettify_tcg_stats,
+    "characters": _tcg_bucket("characters", _prettify_tcg_character),
+    "equipment": _tcg_bucket("equipment", _prettify_tcg_card),
+    "summons": _tcg_bucket("summons", _prettify_tcg_card),
+    "event": _tcg_bucket("event", _prettify_tcg_card),
+}
+
+
+def prettyify_tcg(data):
+    # owned cards are sorted by their type in a single pass
+    cards = {bucket: [] for bucket in tcg_card_types.values()}
+    for card in data['card_list']:
+        bucket = tcg_card_types.get(card['card_type'])
+        if bucket is not None and card['num'] > 0:
+            cards[bucket].append(card)
+    return {
+        "stats": _prettify_tcg_stats(data),
+        "characters": [_prettify_tcg_character(character) for character in cards["characters"]],
+        "equipment": [_prettify_tcg_card(modifier) for modifier in cards["equipment"]],
+        "summons": [_prettify_tcg_card(assist) for assist in cards["summons"]],
+        "event": [_prettify_tcg_card(events) for events in cards["event"]],
     }
     
 def prettyify_tcg_basic(data):
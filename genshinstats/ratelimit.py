@@ -0,0 +1,176 @@
+"""Client-side ratelimits.
+
+Requests are paced with token buckets before they're sent so the known limits of the api aren't hit.
+Every bucket belongs to an endpoint family, like code redemption, and a key, like a cookie or an authkey.
+The state of the buckets may be shared between processes with an sqlite backend.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Pattern, Tuple
+
+__all__ = [
+    "Limit",
+    "MemoryBackend",
+    "SqliteBackend",
+    "RateLimiter",
+    "get_family",
+    "get_ratelimiter",
+    "set_ratelimiter",
+]
+
+
+# waits go through this so they can be replaced without touching time.sleep of other threads
+sleep = time.sleep
+
+
+class Limit(NamedTuple):
+    rate: float  # tokens per second
+    burst: int  # the maximum amount of tokens
+
+
+# known limits of the api
+LIMITS: Dict[str, Limit] = {
+    "redeem": Limit(1 / 5, 1),  # a code every 5 seconds
+    "gacha": Limit(5, 10),  # fast pagination returns "visit too frequently"
+    "transactions": Limit(5, 10),
+    "daily": Limit(1, 3),
+}
+
+_FAMILIES: List[Tuple[Pattern[str], str]] = [
+    (re.compile(r"/apicdkey/"), "redeem"),
+    (re.compile(r"/gacha_info/"), "gacha"),
+    (re.compile(r"/ysulog/"), "transactions"),
+    (re.compile(r"/sol/|/bbs_sign_reward/"), "daily"),
+    (re.compile(r"/game_record/"), "game_record"),
+]
+
+
+def get_family(url: str) -> Optional[str]:
+    """Recognizes which endpoint family a url belongs to"""
+    for pattern, family in _FAMILIES:
+        if pattern.search(url):
+            return family
+    return None
+
+
+class MemoryBackend:
+    """Keeps the buckets in memory of the current process"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # name -> (tokens, updated)
+
+    def reserve(self, name: str, limit: Limit, now: float) -> float:
+        """Takes a token from a bucket and returns how long to wait until it's available.
+
+        Tokens may be reserved in advance so every waiting request gets its own turn.
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(name, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate) - 1
+            self._buckets[name] = (tokens, now)
+        return -tokens / limit.rate if tokens < 0 else 0
+
+
+class SqliteBackend:
+    """Keeps the buckets in an sqlite database so they may be shared by multiple processes"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, name: str, limit: Limit, now: float) -> float:
+        """Takes a token from a bucket and returns how long to wait until it's available"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # other processes must wait until the bucket is updated
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+            tokens, updated = row or (limit.burst, now)
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate) - 1
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return -tokens / limit.rate if tokens < 0 else 0
+
+
+class RateLimiter:
+    """Paces requests with token buckets per endpoint family and key.
+
+    Limits may be changed for every family, families without a limit are not paced:
+    >>> gs.set_ratelimiter(RateLimiter({"game_record": Limit(2, 5)}, SqliteBackend("ratelimits.db")))
+
+    Only the thread sending a request waits, requests of other families or keys are not affected.
+    """
+
+    def __init__(self, limits: Mapping[str, Optional[Limit]] = None, backend: Any = None) -> None:
+        self.limits: Dict[str, Optional[Limit]] = {**LIMITS, **(limits or {})}
+        self.backend = backend or MemoryBackend()
+
+    def reserve(self, family: Optional[str], key: Any = None) -> float:
+        """Reserves a request without waiting, returns the amount of seconds to wait before sending it"""
+        limit = self.limits.get(family) if family else None
+        if limit is None:
+            return 0
+        # keys are usually credentials so they're only saved as hashes
+        key = hashlib.sha1(str(key).encode()).hexdigest()[:16]
+        return self.backend.reserve(f"{family}:{key}", limit, time.time())
+
+    def wait(self, family: Optional[str], key: Any = None) -> float:
+        """Waits until a request may be sent, returns the amount of seconds waited"""
+        delay = self.reserve(family, key)
+        if delay > 0:
+            sleep(delay)
+        return delay
+
+    def throttle(self, url: str, key: Any = None) -> float:
+        """Waits until a request to a url may be sent"""
+        return self.wait(get_family(url), key)
+
+
+_ratelimiter: Optional[RateLimiter] = RateLimiter()
+
+
+def get_ratelimiter() -> Optional[RateLimiter]:
+    """Gets the ratelimiter consulted before every request"""
+    return _ratelimiter
+
+
+def set_ratelimiter(ratelimiter: Optional[RateLimiter]) -> None:
+    """Sets the ratelimiter consulted before every request, None disables ratelimiting.
+
+    Code redemption still waits 5 seconds between claims without a ratelimiter.
+    """
+    global _ratelimiter
+    _ratelimiter = ratelimiter
+
+
+def throttle(url: str, key: Any = None) -> float:
+    """Waits until a request to a url may be sent according to the current ratelimiter"""
+    return _ratelimiter.throttle(url, key) if _ratelimiter is not None else 0
+
+
+def reserve(url: str, key: Any = None) -> float:
+    """Reserves a request to a url without waiting, for clients which can't block like the async one"""
+    return _ratelimiter.reserve(get_family(url), key) if _ratelimiter is not None else 0
@@ -0,0 +1,103 @@
+"""Compact records for rows of large histories.
+
+Wish history and transaction logs may have tens of thousands of rows,
+these records take up a fraction of the memory of a dict and their repeated strings are interned.
+Records are read-only mappings so they can be used just like the dicts they replace.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+
+__all__ = ["Record", "Wish", "Transaction", "ItemTransaction"]
+
+
+class Record(Mapping):
+    """A read-only mapping with a fixed set of fields stored in slots"""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self) -> Any:
+        return type(self), tuple(getattr(self, k) for k in self._fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the record into the dict returned without records"""
+        return {k: getattr(self, k) for k in self._fields}
+
+
+class Wish(Record):
+    """A single pull of the wish history"""
+
+    __slots__ = ("type", "name", "rarity", "time", "id", "banner", "banner_type", "uid")
+    _fields: Tuple[str, ...] = __slots__
+
+    def __init__(
+        self,
+        type: str,
+        name: str,
+        rarity: int,
+        time: str,
+        id: int,
+        banner: str,
+        banner_type: int,
+        uid: int,
+    ) -> None:
+        self.type = type
+        self.name = name
+        self.rarity = rarity
+        self.time = time
+        self.id = id
+        self.banner = banner
+        self.banner_type = banner_type
+        self.uid = uid
+
+
+class Transaction(Record):
+    """A single change of a currency like primogems or resin"""
+
+    __slots__ = ("time", "amount", "reason", "reason_id", "uid", "id")
+    _fields: Tuple[str, ...] = __slots__
+
+    def __init__(self, time: str, amount: int, reason: str, reason_id: int, uid: int, id: int) -> None:
+        self.time = time
+        self.amount = amount
+        self.reason = reason
+        self.reason_id = reason_id
+        self.uid = uid
+        self.id = id
+
+
+class ItemTransaction(Transaction):
+    """A single artifact or weapon that was gotten or destroyed"""
+
+    __slots__ = ("name", "rarity")
+    _fields = ("time", "name", "rarity", "amount", "reason", "reason_id", "uid", "id")
+
+    def __init__(
+        self,
+        time: str,
+        name: str,
+        rarity: int,
+        amount: int,
+        reason: str,
+        reason_id: int,
+        uid: int,
+        id: int,
+    ) -> None:
+        super().__init__(time, amount, reason, reason_id, uid, id)
+        self.name = name
+        self.rarity = rarity
@@ -0,0 +1,133 @@
+"""Daily rewards and code redemption for many accounts.
+
+Every cookie is handled by its own worker so cookies don't have to wait for each other,
+requests of a single cookie are still spaced out by the ratelimiter.
+Results are reported for every account instead of stopping at the first error.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Union,
+)
+
+from . import daily, hoyolab
+from .cookiepool import DAY, RESET_OFFSET, _get_cookie_id
+from .genshinstats import _parse_cookie
+from .ratelimit import get_ratelimiter
+
+__all__ = ["AccountResult", "claim_daily_rewards", "redeem_codes", "time_until_reset"]
+
+Cookie = Union[Mapping[str, Any], str]
+
+
+class AccountResult(NamedTuple):
+    """The result of an action for a single account"""
+
+    cookie_id: str  # a hash of the cookie
+    uid: Optional[int]  # the game account, None for actions of the whole hoyolab account
+    action: str  # "daily" or the redeemed code
+    result: Any
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _run(
+    cookies: Iterable[Cookie],
+    worker: Callable[[str, Any], List[AccountResult]],
+    max_workers: int,
+) -> Iterator[AccountResult]:
+    """Runs a worker for every cookie and yields the results as soon as a cookie is done"""
+    with ThreadPoolExecutor(max_workers) as executor:
+        pending: Set[Future] = set()
+        for cookie in cookies:
+            jar = _parse_cookie(cookie)
+            pending.add(executor.submit(worker, _get_cookie_id(jar), jar))
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def claim_daily_rewards(
+    cookies: Iterable[Cookie],
+    chinese: bool = False,
+    lang: str = "en-us",
+    max_workers: int = 16,
+) -> Iterator[AccountResult]:
+    """Claims the daily reward for every cookie concurrently.
+
+    Yields a result for every cookie, the result is the claimed reward
+    or None if it has already been claimed today.
+    """
+
+    def worker(cookie_id: str, jar: Any) -> List[AccountResult]:
+        try:
+            reward = daily.claim_daily_reward(chinese=chinese, lang=lang, cookie=jar)
+        except Exception as e:
+            return [AccountResult(cookie_id, None, "daily", None, e)]
+        return [AccountResult(cookie_id, None, "daily", reward, None)]
+
+    return _run(cookies, worker, max_workers)
+
+
+def redeem_codes(
+    cookies: Iterable[Cookie],
+    codes: Iterable[str],
+    min_level: int = 10,
+    max_workers: int = 16,
+) -> Iterator[AccountResult]:
+    """Redeems codes for every game account of every cookie.
+
+    Cookies are handled concurrently while the redemptions of a single cookie
+    are spaced out by the ratelimiter, which allows one every 5 seconds.
+    If ratelimiting is disabled, they're spaced out by sleeping for 5 seconds.
+    Codes cannot be claimed by accounts with an adventure rank lower than 10.
+
+    Yields a result for every account and code, the result is always None.
+    If the game accounts of a cookie cannot be fetched, the results of its codes have no uid.
+    """
+    codes = list(codes)
+
+    def worker(cookie_id: str, jar: Any) -> List[AccountResult]:
+        try:
+            accounts = hoyolab.get_game_accounts(cookie=jar)
+        except Exception as e:
+            return [AccountResult(cookie_id, None, code, None, e) for code in codes]
+
+        results: List[AccountResult] = []
+        for account in accounts:
+            if account["level"] < min_level:
+                continue
+            for code in codes:
+                if results and get_ratelimiter() is None:
+                    time.sleep(5)  # there's a ratelimit of 1 request every 5 seconds
+                try:
+                    hoyolab.redeem_code(code, account["uid"], jar)
+                except Exception as e:
+                    results.append(AccountResult(cookie_id, account["uid"], code, None, e))
+                else:
+                    results.append(AccountResult(cookie_id, account["uid"], code, None, None))
+        return results
+
+    return _run(cookies, worker, max_workers)
+
+
+def time_until_reset(t: float = None) -> float:
+    """Gets the amount of seconds until the daily rewards reset"""
+    t = time.time() if t is None else t
+    return DAY - (t + RESET_OFFSET) % DAY
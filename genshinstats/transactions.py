@@ -25,6 +25,7 @@ __all__ = [
 ]
 
 YSULOG_URL = "https://hk4e-api-os.hoyoverse.com/ysulog/api/"
+REASONS_URL = "https://mi18n-os.hoyoverse.com/webstatic/admin/mi18n/hk4e_global/m02251421001311/m02251421001311-{lang}.json"
 
 
 def fetch_transaction_endpoint(
@@ -40,14 +41,8 @@ def fetch_transaction_endpoint(
     return fetch_gacha_endpoint(url, authkey, **kwargs)
 
 
-@permanent_cache("lang")
-def _get_reasons(lang: str = "en-us") -> Dict[int, str]:
-    r = static_session.get(
-        f"https://mi18n-os.hoyoverse.com/webstatic/admin/mi18n/hk4e_global/m02251421001311/m02251421001311-{lang}.json"
-    )
-    r.raise_for_status()
-    data = r.json()
-
+def _parse_reasons(data: Dict[str, str]) -> Dict[int, str]:
+    """Picks transaction reasons out of a mi18n translation table"""
     return {
         int(k.split("_")[-1]): v
         for k, v in data.items()
@@ -55,13 +50,36 @@ def _get_reasons(lang: str = "en-us") -> Dict[int, str]:
     }
 
 
+@permanent_cache("lang")
+def _get_reasons(lang: str = "en-us") -> Dict[int, str]:
+    r = static_session.get(REASONS_URL.format(lang=lang))
+    r.raise_for_status()
+    return _parse_reasons(r.json())
+
+
 def _get_transactions(
-    endpoint: str, size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    endpoint: str,
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
-    """A paginator that uses mihoyo's id paginator algorithm to yield pages"""
+    """A paginator that uses mihoyo's id paginator algorithm to yield pages.
+
+    With records transactions are yielded as compact read-only `Transaction` mappings instead of dicts.
+    """
     if size is not None and size <= 0:
         return
 
+    for page in _get_transaction_pages(endpoint, size, authkey, end_id):
+        yield from prettify_trans(page, _get_reasons(lang), records)
+
+
+def _get_transaction_pages(
+    endpoint: str, size: int = None, authkey: str = None, end_id: int = 0
+) -> Iterator[List[Dict[str, Any]]]:
+    """A paginator that yields the unparsed pages of a log"""
     page_size = 20
     size = size or sys.maxsize
 
@@ -69,60 +87,79 @@ def _get_transactions(
         data = fetch_transaction_endpoint(
             endpoint, authkey=authkey, params=dict(size=min(page_size, size), end_id=end_id)
         )["list"]
-        data = prettify_trans(data, _get_reasons(lang))
-        yield from data
+        yield data
 
         size -= page_size
         if len(data) < page_size or size <= 0:
             break
 
-        end_id = data[-1]["id"]
+        end_id = int(data[-1]["id"])
 
 
 def get_primogem_log(
-    size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
     """Gets all transactions of primogems
 
     This means stuff like getting primogems from rewards and explorations or making wishes.
     Records go only 3 months back.
     """
-    return _get_transactions("getPrimogemLog", size, authkey, lang, end_id)
+    return _get_transactions("getPrimogemLog", size, authkey, lang, end_id, records)
 
 
 def get_crystal_log(
-    size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
     """Get all transactions of genesis crystals
 
     Records go only 3 months back.
     """
-    return _get_transactions("getCrystalLog", size, authkey, lang, end_id)
+    return _get_transactions("getCrystalLog", size, authkey, lang, end_id, records)
 
 
 def get_resin_log(
-    size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
     """Gets all usage of resin
 
     This means using them in ley lines, domains, crafting and weekly bosses.
     Records go only 3 months back.
     """
-    return _get_transactions("getResinLog", size, authkey, lang, end_id)
+    return _get_transactions("getResinLog", size, authkey, lang, end_id, records)
 
 
 def get_artifact_log(
-    size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
     """Get the log of all artifacts gotten or destroyed in the last 3 months"""
-    return _get_transactions("getArtifactLog", size, authkey, lang, end_id)
+    return _get_transactions("getArtifactLog", size, authkey, lang, end_id, records)
 
 
 def get_weapon_log(
-    size: int = None, authkey: str = None, lang: str = "en-us", end_id: int = 0
+    size: int = None,
+    authkey: str = None,
+    lang: str = "en-us",
+    end_id: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
     """Get the log of all weapons gotten or destroyed in the last 3 months"""
-    return _get_transactions("getWeaponLog", size, authkey, lang, end_id)
+    return _get_transactions("getWeaponLog", size, authkey, lang, end_id, records)
 
 
 def current_resin(
@@ -1,11 +1,29 @@
 """Various utility functions for genshinstats."""
+import asyncio
 import inspect
 import os.path
+import random
 import re
+import threading
+import time
 import warnings
 import pathlib
+from collections import Counter, deque
+from email.utils import parsedate_to_datetime
 from functools import wraps
-from typing import Callable, Iterable, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from .errors import AccountNotFound
 
@@ -16,6 +34,8 @@ __all__ = [
     "is_game_uid",
     "is_chinese",
     "get_datafile",
+    "SingleFlight",
+    "RetryPolicy",
 ]
 
 T = TypeVar("T")
@@ -110,26 +130,153 @@ def get_datafile(game_location: str = None) -> Optional[str]:
     return None  # no genshin datafile
 
 
-def retry(
-    tries: int = 3,
-    exceptions: Union[Type[BaseException], Iterable[Type[BaseException]]] = Exception,
-) -> Callable[[T], T]:
-    """A classic retry() decorator"""
-
-    def wrapper(func):
-        @wraps(func)
-        def inner(*args, **kwargs):
-            for _ in range(tries):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    exc = e
-            else:
-                raise Exception(f"Maximum tries ({tries}) exceeded: {exc}") from exc  # type: ignore
-
-        return inner
+def _parse_retry_after(header: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header into an amount of seconds"""
+    if header is None:
+        return None
+    try:
+        return float(header)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(header)  # may also be an http date
+    except (TypeError, ValueError):
+        return None
+    return date.timestamp() - time.time()
+
+
+class RetryPolicy:
+    """Decides whether and when failed calls are retried.
+
+    Retries are delayed with exponential backoff and full jitter,
+    unless the error says how long to wait with Retry-After.
+    Calls are retried on exceptions, http statuses of failed responses and api retcodes.
+
+    Every key (usually an endpoint) may only be retried `budget` times per `window` seconds,
+    so a flapping server doesn't get flooded with retries.
+    Once the policy gives up the original error is raised with the amount of retries in `retries`.
+    """
+
+    def __init__(
+        self,
+        tries: int = 3,
+        exceptions: Union[Type[BaseException], Iterable[Type[BaseException]]] = (),
+        statuses: Iterable[int] = (429, 500, 502, 503, 504),
+        retcodes: Iterable[int] = (-1,),
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        budget: Optional[int] = 10,
+        window: float = 60,
+    ) -> None:
+        self.tries = tries
+        self.exceptions = tuple(exceptions) if isinstance(exceptions, Iterable) else (exceptions,)
+        self.statuses = set(statuses)
+        self.retcodes = set(retcodes)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.window = window
+        self.stats: Counter = Counter()  # retries, gave_up and budget_exhausted
+        self._lock = threading.Lock()
+        self._retries: Dict[Hashable, Deque[float]] = {}
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """Checks whether an error is temporary"""
+        if isinstance(exc, self.exceptions):
+            return True
+        # requests keeps the failed response, aiohttp puts the status on the error itself
+        response = getattr(exc, "response", None)
+        if getattr(response, "status_code", getattr(exc, "status", None)) in self.statuses:
+            return True
+        return getattr(exc, "retcode", None) in self.retcodes
+
+    def get_retry_after(self, exc: BaseException) -> Optional[float]:
+        """Gets the amount of seconds the server asked to wait for"""
+        retry_after = getattr(exc, "retry_after", None)
+        headers = getattr(getattr(exc, "response", None), "headers", getattr(exc, "headers", None))
+        if retry_after is None and headers is not None:
+            retry_after = _parse_retry_after(headers.get("Retry-After"))
+        return max(retry_after, 0) if retry_after is not None else None
+
+    def get_delay(self, exc: BaseException, attempt: int) -> Optional[float]:
+        """Gets the delay before the next try or None if the server asked for too long"""
+        retry_after = self.get_retry_after(exc)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_backoff else None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _spend_budget(self, key: Hashable) -> bool:
+        if self.budget is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            retries = self._retries.setdefault(key, deque())
+            while retries and retries[0] <= now - self.window:
+                retries.popleft()
+            if len(retries) >= self.budget:
+                return False
+            retries.append(now)
+            return True
+
+    def _next_delay(self, key: Hashable, exc: Exception, attempt: int) -> Optional[float]:
+        # the delay before the next try or None when the error should be raised
+        if not self.is_retryable(exc):
+            return None
+        delay = self.get_delay(exc, attempt)
+        if attempt + 1 >= self.tries or delay is None:
+            self.stats["gave_up"] += 1
+        elif not self._spend_budget(key):
+            self.stats["budget_exhausted"] += 1
+        else:
+            self.stats["retries"] += 1
+            return delay
+
+        exc.retries = attempt  # type: ignore
+        return None
 
-    return wrapper  # type: ignore
+    def call(self, key: Hashable, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Calls a function and retries it according to the policy"""
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(key, e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    async def acall(
+        self, key: Hashable, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> T:
+        """Awaits a coroutine function and retries it according to the policy"""
+        attempt = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(key, e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def wrap(self, key: Callable[..., Hashable] = None) -> Callable[[T], T]:
+        """Decorates a function to be called with this policy.
+
+        The key is created from the arguments of the function, by default every function has one key.
+        """
+
+        def wrapper(func):
+            @wraps(func)
+            def inner(*args, **kwargs):
+                k = key(*args, **kwargs) if key is not None else func
+                return self.call(k, func, *args, **kwargs)
+
+            return inner
+
+        return wrapper  # type: ignore
 
 
 def deprecated(
@@ -146,3 +293,67 @@ def deprecated(
         return inner
 
     return wrapper  # type: ignore
+
+
+@deprecated("{} is deprecated and will be removed in future versions, use RetryPolicy instead")
+def retry(
+    tries: int = 3,
+    exceptions: Union[Type[BaseException], Iterable[Type[BaseException]]] = Exception,
+) -> Callable[[T], T]:
+    """A classic retry() decorator, retries immediately.
+
+    Only kept for backwards compatibility, it's the same as a RetryPolicy without backoff.
+    """
+    policy = RetryPolicy(tries, exceptions, statuses=(), retcodes=(), backoff=0, budget=None)
+    return policy.wrap()
+
+
+class _Call:
+    __slots__ = ("done", "result", "exception")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Makes concurrent calls with the same key share a single call.
+
+    The first caller of a key runs the function, everyone who calls it with the same key
+    before it finishes waits and gets the same result or exception.
+    Results are not remembered afterwards, that's the job of a cache.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        """The amount of calls in flight"""
+        return len(self._calls)
+
+    def do(self, key: Hashable, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Calls func unless a call with the same key is in flight already"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
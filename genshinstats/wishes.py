@@ -5,19 +5,25 @@ Requires an authkey that is fetched automatically from a logfile.
 """
 import base64
 import heapq
+import json
+import mmap
 import os
+import queue
 import re
 import sys
+import threading
 from itertools import chain, islice
 from tempfile import gettempdir
-from typing import Any, Dict, Iterator, List, Optional
-from urllib.parse import unquote, urljoin
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+from urllib.parse import unquote, urljoin, urlsplit
 
 from requests import Session
 
 from .errors import AuthkeyError, MissingAuthKey, raise_for_error
+from .genshinstats import retry_policy
+from .ratelimit import throttle
 from .pretty import *
-from .utils import USER_AGENT, get_datafile
+from .utils import USER_AGENT, SingleFlight, _parse_retry_after, get_datafile
 from .caching import permanent_cache
 
 __all__ = [
@@ -34,8 +40,8 @@ __all__ = [
     "validate_authkey",
 ]
 
-GENSHIN_LOG = get_datafile()
 GACHA_INFO_URL = "https://hk4e-api-os.hoyoverse.com/event/gacha_info/api/"
+GACHA_STATIC_URL = "https://webstatic-sea.hoyoverse.com/hk4e/gacha_info/os_asia/"
 AUTHKEY_FILE = os.path.join(gettempdir(), "genshinstats_authkey.txt")
 
 session = Session()
@@ -55,6 +61,9 @@ session.params = {
     "sign_type": "2",
 }
 static_session = Session()  # extra session for static resources
+_flight = SingleFlight()  # requests which are in flight
+
+T = TypeVar("T")
 
 
 def _get_short_lang_code(lang: str) -> str:
@@ -62,26 +71,95 @@ def _get_short_lang_code(lang: str) -> str:
     return lang if "zh" in lang else lang.split("-")[0]
 
 
-def _read_datafile(game_location: str = None) -> str:
-    """Return the contents of a datafile."""
-    datafile = get_datafile(game_location)
+class _DatafileScan(NamedTuple):
+    authkey: Optional[str]
+    banner_ids: List[str]
+
+
+_GACHA_ID_RE = re.compile(rb"https://.+?gacha_id=([^&#]+)")
+_URL_PARAM_RE = re.compile(rb"[^&#]+")
+_datafile_scans: Dict[str, Tuple[Tuple[int, int], _DatafileScan]] = {}
+
+
+_default_datafile: Any = None
+
+
+def _find_default_datafile() -> Any:
+    """Finds the datafile of the installed game, the result is remembered once it's found."""
+    global _default_datafile
+    # finding it requires reading the game's output log so it's only done when really needed
+    if _default_datafile is None:
+        _default_datafile = get_datafile()
+    return _default_datafile
+
+
+def __getattr__(name: str) -> Any:
+    # the datafile used to be found on import
+    if name == "GENSHIN_LOG":
+        return _find_default_datafile()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_datafile(game_location: str = None) -> Any:
+    datafile = get_datafile(game_location) if game_location else _find_default_datafile()
     if datafile is None:
         raise FileNotFoundError(
             "No Genshin Installation was found, could not get gacha data. "
             "Please check if you set correct game location."
         )
+    return datafile
+
+
+def _find_last_authkey(data: Any) -> Optional[str]:
+    """Finds the last authkey in a bytes-like object by searching backwards from its end"""
+    pos = len(data)
+    while True:
+        pos = data.rfind(b"authkey=", 0, pos)
+        if pos == -1:
+            return None
+        # the authkey must be a part of a url on the same line
+        line_start = data.rfind(b"\n", 0, pos) + 1
+        if pos == line_start or data.find(b"https://", line_start, pos - 1) == -1:
+            continue
+        match = _URL_PARAM_RE.match(data, pos + len(b"authkey="))
+        if match is not None:
+            return unquote(match[0].decode(errors="replace"))
+
+
+def _scan_datafile(game_location: str = None) -> _DatafileScan:
+    """Scans a datafile for the newest authkey and all banner ids.
+
+    The datafile is memory-mapped and searched as bytes so it's never fully loaded into memory.
+    Results are cached until the datafile is modified.
+    """
+    datafile = _get_datafile(game_location)
 
     try:
+        stat = os.stat(datafile)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = _datafile_scans.get(str(datafile))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
         # won't work if genshin is running or script using this function isn't run as administrator
-        return datafile.read_text(errors="replace")
+        with open(datafile, "rb") as file:
+            if stat.st_size == 0:
+                scan = _DatafileScan(None, [])  # empty files cannot be mapped
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    ids = dict.fromkeys(m[1].decode(errors="replace") for m in _GACHA_ID_RE.finditer(data))
+                    scan = _DatafileScan(_find_last_authkey(data), list(ids))
     except PermissionError as ex:
         raise PermissionError("Pleas turn off genshin impact or try running script as administrator!") from ex
 
+    _datafile_scans[str(datafile)] = (version, scan)
+    return scan
+
 
 def extract_authkey(string: str) -> Optional[str]:
     """Extracts an authkey from the provided string. Returns None if not found."""
     match = re.findall(r"https://.+?authkey=([^&#]+)", string, re.MULTILINE)
-    if match is not None:
+    if match:
         return unquote(match[-1])
     return None
 
@@ -92,7 +170,7 @@ def get_authkey(game_location: str = None) -> str:
     This will either be done from the logs or from a tempfile.
     """
     # first try the log
-    authkey = extract_authkey(_read_datafile(game_location))
+    authkey = _scan_datafile(game_location).authkey
     if authkey is not None:
         with open(AUTHKEY_FILE, "w") as file:
             file.write(authkey)
@@ -126,9 +204,7 @@ def get_banner_ids(logfile: str = None) -> List[str]:
 
     You need to open the details of all banners for this to work.
     """
-    log = _read_datafile(logfile)
-    ids = re.findall(r"https://.+?gacha_id=([^&#]+)", log, re.MULTILINE)
-    return list(set(ids))
+    return _scan_datafile(logfile).banner_ids.copy()
 
 
 def fetch_gacha_endpoint(endpoint: str, authkey: str = None, **kwargs) -> Dict[str, Any]:
@@ -138,6 +214,8 @@ def fetch_gacha_endpoint(endpoint: str, authkey: str = None, **kwargs) -> Dict[s
     If an authkey is provided, it uses that authkey specifically.
     A request is then sent and returns a parsed response.
     Includes error handling and getting the authkey.
+
+    Identical GET requests which are sent at the same time share a single response.
     """
     if authkey is None:
         session.params["authkey"] = session.params["authkey"] or get_authkey()  # type: ignore
@@ -146,6 +224,21 @@ def fetch_gacha_endpoint(endpoint: str, authkey: str = None, **kwargs) -> Dict[s
     method = kwargs.pop("method", "get")
     url = urljoin(GACHA_INFO_URL, endpoint)
 
+    if method.lower() != "get":
+        return _fetch_gacha_endpoint(method, url, **kwargs)
+
+    # the authkey is in the params or the session so it's a part of the key either way
+    key = json.dumps(
+        [url, kwargs.get("params"), session.params["authkey"]],  # type: ignore
+        sort_keys=True,
+        default=str,
+    )
+    return _flight.do(key, _fetch_gacha_endpoint, method, url, **kwargs)
+
+
+@retry_policy.wrap(lambda method, url, **kwargs: urlsplit(url).path)
+def _fetch_gacha_endpoint(method: str, url: str, **kwargs) -> Dict[str, Any]:
+    throttle(url, kwargs.get("params", {}).get("authkey") or session.params["authkey"])  # type: ignore
     r = session.request(method, url, **kwargs)
     r.raise_for_status()
 
@@ -153,7 +246,50 @@ def fetch_gacha_endpoint(endpoint: str, authkey: str = None, **kwargs) -> Dict[s
     if data["retcode"] == 0:
         return data["data"]
 
-    raise_for_error(data)
+    # gacha endpoints are authenticated with an authkey, there is no cookie id
+    raise_for_error(
+        data, urlsplit(url).path, retry_after=_parse_retry_after(r.headers.get("Retry-After"))
+    )
+
+
+def _prefetch(iterator: Iterator[T], buffer: int) -> Iterator[T]:
+    """Consumes an iterator in a background thread, keeping up to buffer items ready.
+
+    The thread stops once the returned generator is closed.
+    """
+    q: "queue.Queue[Any]" = queue.Queue(buffer)
+    stop = threading.Event()
+    end = object()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def worker() -> None:
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except Exception as e:
+            put((end, e))
+
+    threading.Thread(target=worker, daemon=True).start()
+    try:
+        while True:
+            item, exc = q.get()
+            if item is end:
+                if exc is not None:
+                    raise exc
+                return
+            yield item
+    finally:
+        stop.set()
 
 
 @permanent_cache("lang")
@@ -171,6 +307,8 @@ def get_wish_history(
     authkey: str = None,
     end_id: int = 0,
     lang: str = "en",
+    prefetch: int = 0,
+    records: bool = False,
 ) -> Iterator[Dict[str, Any]]:
     """Gets wish history.
 
@@ -183,6 +321,12 @@ def get_wish_history(
 
     To be able to get history starting from somewhere other than the last pull
     you may pass in the id of the pull right chronologically after the one you want to start from as end_id.
+
+    When getting all banners, prefetch makes every banner be fetched concurrently in a background thread
+    which reads up to prefetch pulls ahead. The pulls are still yielded in order.
+
+    With records pulls are yielded as compact read-only `Wish` mappings instead of dicts,
+    which is recommended for keeping large histories in memory.
     """
     if size is not None and size <= 0:
         return
@@ -191,14 +335,24 @@ def get_wish_history(
         # we get data from all banners by getting data from every individual banner
         # and then sorting it by pull date with heapq.merge
         gens = [
-            get_wish_history(banner_type, None, authkey, end_id, lang)
+            get_wish_history(banner_type, None, authkey, end_id, lang, records=records)
             for banner_type in get_banner_types(authkey)
         ]
+        if prefetch > 0:
+            gens = [_prefetch(gen, prefetch) for gen in gens]
         yield from islice(heapq.merge(*gens, key=lambda x: x["time"], reverse=True), size)
         return
 
     # we create banner_name outside prettify so we don't make extra requests
     banner_name = get_banner_types(authkey, lang)[banner_type]
+    for page in _get_wish_pages(banner_type, size, authkey, end_id, lang):
+        yield from prettify_wish_history(page, banner_name, records)
+
+
+def _get_wish_pages(
+    banner_type: int, size: int = None, authkey: str = None, end_id: int = 0, lang: str = "en"
+) -> Iterator[List[Dict[str, Any]]]:
+    """A paginator that yields the unparsed pages of a banner"""
     lang = _get_short_lang_code(lang)
     page_size = 20
     size = size or sys.maxsize
@@ -211,21 +365,18 @@ def get_wish_history(
                 gacha_type=banner_type, size=min(page_size, size), end_id=end_id, lang=lang
             ),
         )["list"]
-        data = prettify_wish_history(data, banner_name)
-        yield from data
+        yield data
 
         size -= page_size
         if len(data) < page_size or size <= 0:
             break
 
-        end_id = data[-1]["id"]
+        end_id = int(data[-1]["id"])
 
 
 def get_gacha_items(lang: str = "en-us") -> List[Dict[str, Any]]:
     """Gets the list of characters and weapons that can be gotten from the gacha."""
-    r = static_session.get(
-        f"https://webstatic-sea.hoyoverse.com/hk4e/gacha_info/os_asia/items/{lang}.json"
-    )
+    r = static_session.get(urljoin(GACHA_STATIC_URL, f"items/{lang}.json"))
     r.raise_for_status()
     return prettify_gacha_items(r.json())
 
@@ -239,9 +390,7 @@ def get_banner_details(banner_id: str, lang: str = "en-us") -> Dict[str, Any]:
 
     The newbie gacha has no json resource tied to it so you can't get info about it.
     """
-    r = static_session.get(
-        f"https://webstatic-sea.hoyoverse.com/hk4e/gacha_info/os_asia/{banner_id}/{lang}.json"
-    )
+    r = static_session.get(urljoin(GACHA_STATIC_URL, f"{banner_id}/{lang}.json"))
     r.raise_for_status()
     return prettify_banner_details(r.json())
 
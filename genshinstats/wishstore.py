@@ -0,0 +1,153 @@
+"""Local storage of wish history.
+
+Keeps the wish history of users in an sqlite database
+and only requests pulls that were made since the last sync.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from . import wishes
+
+__all__ = ["WishHistoryStore"]
+
+_COLUMNS = ("type", "name", "rarity", "time", "id", "banner", "banner_type", "uid")
+
+
+def _format_time(t: Union[datetime, str]) -> str:
+    return t.strftime("%Y-%m-%d %H:%M:%S") if isinstance(t, datetime) else t
+
+
+class WishHistoryStore:
+    """A local database of wish history.
+
+    Usage:
+    >>> store = WishHistoryStore("wishes.db")
+    >>> store.sync(authkey=...)
+    >>> five_stars = list(store.get_wish_history(uid, rarity=5))
+
+    Pulls are stored per uid and banner. Syncing requests the newest pages of every banner
+    and stops as soon as it reaches a pull which is already stored.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            # sync_banner is the banner type the pull was requested with,
+            # banner_type may differ for banners that share a history
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wishes ("
+                "id INTEGER PRIMARY KEY, uid INTEGER, sync_banner INTEGER, banner_type INTEGER, "
+                "banner TEXT, type TEXT, name TEXT, rarity INTEGER, time TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS wishes_sync ON wishes (uid, sync_banner, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS wishes_time ON wishes (uid, time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS wishes_rarity ON wishes (uid, rarity, time)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_last_id(self, uid: int, banner_type: int) -> int:
+        """Gets the id of the newest stored pull of a banner, 0 if there are none"""
+        row = self._connect().execute(
+            "SELECT MAX(id) FROM wishes WHERE uid = ? AND sync_banner = ?", (uid, banner_type)
+        ).fetchone()
+        return row[0] or 0
+
+    def sync_banner(self, banner_type: int, authkey: str = None, lang: str = "en") -> int:
+        """Fetches all new pulls of a single banner and stores them.
+
+        Returns the amount of new pulls.
+        """
+        new: List[Dict[str, Any]] = []
+        last_id: Optional[int] = None
+        for pull in wishes.get_wish_history(banner_type, authkey=authkey, lang=lang):
+            if last_id is None:
+                # the uid is only known after the first page
+                last_id = self.get_last_id(pull["uid"], banner_type)
+            # ids only ever grow so every following pull is stored already
+            if pull["id"] <= last_id:
+                break
+            new.append(pull)
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO wishes "
+                "(id, uid, sync_banner, banner_type, banner, type, name, rarity, time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        p["id"],
+                        p["uid"],
+                        banner_type,
+                        p["banner_type"],
+                        p["banner"],
+                        p["type"],
+                        p["name"],
+                        p["rarity"],
+                        p["time"],
+                    )
+                    for p in new
+                ],
+            )
+        return len(new)
+
+    def sync(
+        self, authkey: str = None, banner_types: Iterable[int] = None, lang: str = "en"
+    ) -> int:
+        """Fetches all new pulls of every banner and stores them.
+
+        Returns the amount of new pulls.
+        """
+        if banner_types is None:
+            banner_types = wishes.get_banner_types(authkey)
+        return sum(self.sync_banner(banner, authkey, lang) for banner in banner_types)
+
+    def get_uids(self) -> List[int]:
+        """Gets all uids that have stored pulls"""
+        return [uid for (uid,) in self._connect().execute("SELECT DISTINCT uid FROM wishes")]
+
+    def get_wish_history(
+        self,
+        uid: int,
+        banner_type: int = None,
+        rarity: int = None,
+        since: Union[datetime, str] = None,
+        until: Union[datetime, str] = None,
+        size: int = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Gets stored pulls of a user, newest first.
+
+        Pulls may be filtered by banner type, rarity and a time range.
+        They have the same format as pulls from genshinstats.get_wish_history.
+        """
+        query = "SELECT type, name, rarity, time, id, banner, banner_type, uid FROM wishes WHERE uid = ?"
+        params: List[Any] = [uid]
+        if banner_type is not None:
+            query += " AND sync_banner = ?"
+            params.append(banner_type)
+        if rarity is not None:
+            query += " AND rarity = ?"
+            params.append(rarity)
+        if since is not None:
+            query += " AND time >= ?"
+            params.append(_format_time(since))
+        if until is not None:
+            query += " AND time < ?"
+            params.append(_format_time(until))
+        query += " ORDER BY time DESC, id DESC"
+        if size is not None:
+            query += " LIMIT ?"
+            params.append(size)
+
+        for row in self._connect().execute(query, params):
+            yield dict(zip(_COLUMNS, row))
@@ -14,6 +14,7 @@ setup(
         "Issue tracker": "https://github.com/nitolar/genshinstats/issues",
     },
     install_requires=["requests", "browser-cookie3"],
+    extras_require={"aio": ["aiohttp"], "export": ["numpy", "pyarrow"]},
     author_email="kontakt.nitolarplay@gmail.com",
     long_description=open("README.md", encoding="utf-8").read(),
     long_description_content_type="text/markdown",
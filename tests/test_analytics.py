@@ -0,0 +1,68 @@
+import genshinstats as gs
+import pytest
+from genshinstats.export import WISH_SCHEMA
+
+banners = [
+    {
+        "banner_type": 301,
+        "date_range": "2021/09/01 10:00:00 ~ 2021/09/21 17:59:59",
+        "r5_up_items": [{"name": "Venti"}],
+    }
+]
+
+
+def make_columns(pulls):
+    columns = gs.Columns(WISH_SCHEMA)
+    for name, values in zip(("uid", "banner_type", "id", "rarity", "name"), zip(*pulls)):
+        columns.extend_column(name, values)
+    columns.extend_column("time", ["2021-09-10 12:00:00"] * len(pulls))
+    columns.extend_column("type", ["Character"] * len(pulls))
+    columns.extend_column("banner", ["Event"] * len(pulls))
+    return columns
+
+
+def test_analyze_wish_history():
+    rarities = [3, 3, 4, 3, 5, 3, 4, 5, 3, 5, 3, 3]
+    names = ["", "", "", "", "Diluc", "", "", "Venti", "", "Venti", "", ""]
+    pulls = [(1, 301, i, r, n) for i, (r, n) in enumerate(zip(rarities, names))]
+    pulls += [(1, 400, 100 + i, 3, "") for i in range(3)]  # shares its pity with 301
+    pulls += [(1, 301, 100, 3, "")]  # the same pull requested through the other banner
+    pulls += [(2, 200, i, 5 if i == 5 else 3, "Jean") for i in range(8)]
+    columns = make_columns(pulls[::-1])
+
+    user1, user2 = gs.analyze_wish_history(columns, banners)
+    assert (user1.uid, user1.banner_type, user1.pulls) == (1, 301, 15)
+    assert (user1.pity5, user1.pity4) == (5, 5)
+    assert user1.distribution5[5] == 1 and user1.distribution5[3] == 1 and user1.distribution5[2] == 1
+    assert sum(user1.distribution4) == 5
+    assert (user1.wins, user1.losses, user1.guaranteed, user1.next_guaranteed) == (1, 1, 1, False)
+    assert user1.primogems == 15 * 160
+
+    assert (user2.uid, user2.banner_type, user2.pulls, user2.pity5) == (2, 200, 8, 2)
+    assert user2.wins == user2.losses == 0
+
+    # without banner details the 50/50 is unknown
+    assert gs.analyze_wish_history(columns)[0].wins == 0
+    assert gs.analyze_wish_history(gs.Columns(WISH_SCHEMA)) == []
+
+
+def test_numpy_matches_python():
+    np = pytest.importorskip("numpy")
+    from genshinstats import analytics
+
+    random = np.random.default_rng(0)
+    pulls = []
+    for uid in range(5):
+        for banner_type in (100, 200, 301, 302, 400):
+            ids = random.choice(1000, random.integers(0, 200), replace=False).tolist()
+            if random.random() < 0.5:
+                ids.sort(reverse=True)
+            rarities = random.choice([3, 4, 5], len(ids), p=[0.85, 0.12, 0.03]).tolist()
+            pulls += [(uid, banner_type, i, r, "Venti") for i, r in zip(ids, rarities)]
+    columns = make_columns(pulls)
+    shuffled = make_columns(random.permutation(np.array(pulls, dtype=object)).tolist())
+
+    expected = analytics._group_python(columns)
+    assert analytics._group_numpy(columns, np) == expected
+    assert analytics._group_python(shuffled).groups == expected.groups
+    assert analytics._group_numpy(shuffled, np) == analytics._group_python(shuffled)
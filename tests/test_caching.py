@@ -0,0 +1,152 @@
+import genshinstats as gs
+from genshinstats.caching import cache_func, cache_paginator
+
+
+def test_sqlite_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    calls = []
+
+    def get_data(uid: int, lang: str = "en-us"):
+        calls.append(uid)
+        return {"uid": uid, "lang": lang}
+
+    cached = cache_func(get_data, gs.SqliteCache(path))
+    assert cached(1) == cached(1, "en-us") == {"uid": 1, "lang": "en-us"}
+    assert calls == [1]
+
+    # a new process would see the same data
+    cached = cache_func(get_data, gs.SqliteCache(path))
+    assert cached(1) == {"uid": 1, "lang": "en-us"}
+    assert calls == [1]
+
+
+def test_sqlite_cache_unhashable(tmp_path):
+    calls = []
+
+    def get_data(uid: int, character_ids: list):
+        calls.append(uid)
+        return character_ids
+
+    cached = cache_func(get_data, gs.SqliteCache(str(tmp_path / "cache.db")))
+    assert cached(1, [2, 3]) == cached(1, [2, 3]) == [2, 3]
+    assert calls == [1]
+
+
+def test_sqlite_cache_eviction(tmp_path):
+    cache = gs.SqliteCache(str(tmp_path / "cache.db"), ttls={"expired": 0}, maxsize=2)
+    cache[("expired", 1)] = 1
+    assert ("expired", 1) not in cache
+
+    for i in range(5):
+        cache[("func", i)] = i
+    cache.evict()
+    assert len(cache) == 2
+
+
+def test_cache_key():
+    def get_data(uid, lang="en-us", *args, cookie=None, **kwargs):
+        return uid
+
+    cache = {}
+    cached = cache_func(get_data, cache)
+    cached(1)
+    cached(1, "en-us", cookie={"ltuid": 1})
+    cached(uid=1, lang="en-us")
+    cached(1, "de-de", 2, b=2, a=1)
+    cached(1, "de-de", 2, a=1, b=2)
+    keys = list(cache)
+    assert keys == [
+        ("get_data", 1, "en-us", (), ()),
+        ("get_data", 1, "de-de", (2,), (("a", 1), ("b", 2))),
+    ]
+
+
+def test_permanent_cache():
+    calls = []
+
+    @gs.permanent_cache("lang")
+    def get_data(uid, lang="en-us"):
+        calls.append(uid)
+        return lang
+
+    assert get_data(1) == get_data(2, lang="en-us") == get_data(3, "en-us") == "en-us"
+    assert calls == [1]
+
+
+def make_paginator(history, requests):
+    def get_log(size=None, authkey=None, end_id=0, lang="en"):
+        requests.append(end_id)
+        items = [i for i in history if not end_id or i < end_id][:size]
+        return iter([{"id": i, "lang": lang} for i in items])
+
+    return get_log
+
+
+def test_cache_paginator():
+    history = list(range(1000, 0, -1))
+    requests = []
+    cache = {}
+    cached = cache_paginator(make_paginator(history, requests), cache, segment_size=1000)
+
+    assert [i["id"] for i in cached(size=30, end_id=500)] == list(range(499, 469, -1))
+    assert [i["id"] for i in cached()] == history
+    # the gap between the head and the first read is closed and everything is one segment
+    assert sum(k[1] == "segment" for k in cache) == 1
+    assert cache[("get_log", "index", "en")] == {1000: (1, True)}
+
+    requests.clear()
+    assert [i["id"] for i in cached()] == history
+    assert [i["id"] for i in cached(end_id=600)] == list(range(599, 0, -1))
+    assert requests == [0]  # only the head is requested
+
+    # new items are added in front of the cached ones
+    history[:0] = range(1010, 1000, -1)
+    assert [i["id"] for i in cached()] == history
+    assert cache[("get_log", "index", "en")] == {1010: (1000, False), 1000: (1, True)}
+
+
+def test_cache_paginator_strict():
+    history = list(range(100, 0, -1))
+    requests = []
+    cache = {}
+    cached = cache_paginator(make_paginator(history, requests), cache, strict=True, segment_size=40)
+
+    assert [i["id"] for i in cached(lang="de")] == history
+    assert len(requests) == 6
+    assert [i["id"] for i in cached(lang="de", size=50)] == history[:50]
+    assert len(requests) == 6
+    assert sum(k[1] == "segment" for k in cache) == 3
+
+
+def test_permanent_cache_limits(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(gs.caching.time, "monotonic", lambda: now[0])
+    calls = []
+
+    @gs.permanent_cache("uid", maxsize=2, ttl=10)
+    def get_data(uid):
+        calls.append(uid)
+        return uid
+
+    for uid in (1, 2, 1, 3, 1):
+        get_data(uid)
+    assert calls == [1, 2, 3]  # 2 was the least recently used one
+    get_data(2)
+    assert calls == [1, 2, 3, 2]
+    assert get_data.cache_info() == (2, 4, 2, 2)
+
+    now[0] = 11
+    get_data(2)
+    assert calls == [1, 2, 3, 2, 2]
+
+    get_data.invalidate(uid=2)
+    get_data(2)
+    assert calls == [1, 2, 3, 2, 2, 2]
+
+    # the cache attribute only exposes the values
+    assert dict(get_data.cache) == {(1,): 1, (2,): 2}
+    get_data.cache[(5,)] = "five"
+    assert get_data(5) == "five" and calls[-1] == 2
+
+    get_data.cache_clear()
+    assert get_data.cache_info() == (0, 0, 2, 0)
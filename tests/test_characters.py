@@ -0,0 +1,60 @@
+import genshinstats as gs
+import pytest
+import requests
+
+
+@pytest.fixture()
+def offline(monkeypatch):
+    def get(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(gs.characters.requests, "get", get)
+    monkeypatch.setattr(gs.characters, "_refreshed", set())
+
+
+def test_snapshot(offline):
+    assert gs.get_character_name(10000046) == "Hu Tao"
+    assert gs.get_character_name(10000007) == "Traveler"
+
+
+def test_character_names_read_only(offline):
+    names = gs.get_character_names()
+    assert names[10000046] == "Hu Tao"
+    with pytest.raises(TypeError):
+        names[10000046] = "Someone else"  # type: ignore
+    assert gs.get_character_name(10000046) == "Hu Tao"
+
+
+def test_unknown_character(offline):
+    assert gs.get_character_name(10009999) is None
+    assert gs.pretty._recognize_character_id(10009999) == "Unknown (10009999)"
+
+
+def test_string_character_id(monkeypatch):
+    def get(*args, **kwargs):
+        raise AssertionError("known ids must not refresh the catalogue")
+
+    monkeypatch.setattr(gs.characters.requests, "get", get)
+    monkeypatch.setattr(gs.characters, "_refreshed", set())
+    assert gs.get_character_name("10000046") == "Hu Tao"  # type: ignore
+
+
+def test_prettify_abyss_names(offline):
+    rank = [{"value": 3, "avatar_id": 10000030, "rarity": 5, "avatar_icon": ""}]
+    data = {
+        "schedule_id": 1,
+        "start_time": "0",
+        "end_time": "0",
+        "total_battle_times": 1,
+        "total_win_times": 1,
+        "max_floor": "12-3",
+        "total_star": 36,
+        "floors": [],
+        **{
+            k: rank
+            for k in ("reveal_rank", "defeat_rank", "damage_rank")
+            + ("take_damage_rank", "normal_skill_rank", "energy_skill_rank")
+        },
+    }
+    abyss = gs.pretty.prettify_abyss(data)
+    assert abyss["character_ranks"]["most_played"][0]["name"] == "Zhongli"
@@ -0,0 +1,33 @@
+import genshinstats as gs
+import pytest
+
+
+def test_least_used():
+    pool = gs.CookiePool([{"ltuid": "1"}, {"ltuid": "2"}])
+    first = pool.acquire(1)
+    second = pool.acquire(2)
+    assert first is not second
+    # an account keeps using the same cookie
+    assert pool.acquire(1) is first
+
+
+def test_quota():
+    pool = gs.CookiePool([{"ltuid": "1"}], limit=1)
+    pool.release(pool.acquire(1))
+    with pytest.raises(gs.TooManyRequests):
+        pool.acquire(2)
+    # requests which don't use up the quota are still allowed
+    assert pool.acquire() is pool[0]
+
+
+def test_exhaust(tmp_path):
+    pool = gs.CookiePool([{"ltuid": "1"}, {"ltuid": "2"}])
+    pool.exhaust(pool[0])
+    assert all(pool.acquire(i) is pool[1] for i in range(5))
+
+    path = str(tmp_path / "pool.json")
+    pool.save(path)
+    restored = gs.CookiePool([{"ltuid": "1"}, {"ltuid": "2"}])
+    restored.load(path)
+    assert restored.available == 1
+    assert restored.acquire(3) is restored[1]
@@ -0,0 +1,30 @@
+import genshinstats as gs
+
+DATA = (
+    b"\x00\xffhttps://webstatic-sea.hoyoverse.com/genshin/event/e20190909gacha/index.html?"
+    b"authkey_ver=1&gacha_id=b8fd0d8a6c940c7a16a486367de5f6d2232f53&authkey=old%2Bkey&lang=en#/log\n"
+    b"\x00\xffhttps://webstatic-sea.hoyoverse.com/genshin/event/e20190909gacha/index.html?"
+    b"authkey_ver=1&gacha_id=a37a19624270b092e7250edfabce541a3435c2&authkey=new%2Bkey&lang=en#/log\n"
+    b"\x00\x01 binary garbage authkey=not-a-url\n"
+)
+
+
+def test_scan_datafile(tmp_path):
+    datafile = tmp_path / "data_2"
+    datafile.write_bytes(DATA)
+
+    assert gs.get_authkey(str(datafile)) == "new+key"
+    assert gs.get_banner_ids(str(datafile)) == [
+        "b8fd0d8a6c940c7a16a486367de5f6d2232f53",
+        "a37a19624270b092e7250edfabce541a3435c2",
+    ]
+    assert gs.extract_authkey(DATA.decode(errors="replace")) == "new+key"
+
+
+def test_scan_datafile_modified(tmp_path):
+    datafile = tmp_path / "data_2"
+    datafile.write_bytes(b"")
+    assert gs.get_banner_ids(str(datafile)) == []
+
+    datafile.write_bytes(DATA)
+    assert len(gs.get_banner_ids(str(datafile))) == 2
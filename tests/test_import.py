@@ -0,0 +1,36 @@
+import importlib
+import os
+import re
+import subprocess
+import sys
+
+import genshinstats as gs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_LIMIT = 0.05  # seconds, excluding the interpreter's own startup
+
+
+def run(code: str, *args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def test_lazy_import():
+    code = "import sys, genshinstats; print(sorted(m for m in sys.modules if 'requests' in m or 'genshinstats.' in m))"
+    assert run(code).stdout.strip() == "['genshinstats.errors']"
+
+
+def test_import_time():
+    # -X importtime reports the cumulative import time of every module in microseconds
+    stderr = run("import genshinstats", "-X", "importtime").stderr
+    match = re.search(r"\|\s*(\d+) \| genshinstats$", stderr, re.MULTILINE)
+    assert match is not None
+    assert int(match[1]) / 1e6 < IMPORT_TIME_LIMIT
+
+
+def test_exports():
+    for module, names in gs._exports.items():
+        module = importlib.import_module(f"genshinstats.{module}")
+        assert names == getattr(module, "__all__", [])
@@ -0,0 +1,471 @@
+import asyncio
+import csv
+import itertools
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import genshinstats as gs
+import pytest
+from benchmarks.mockserver import MockServer
+
+uid = 710785423
+authkey = "offline"
+
+
+@pytest.fixture(scope="module")
+def server():
+    from genshinstats import aio, daily, genshinstats, transactions, wishes  # noqa: F401 - patched modules
+
+    ratelimiter = gs.get_ratelimiter()
+    gs.set_ratelimiter(None)  # tested separately
+    with MockServer(wishes=45, transactions=30) as server, server.patch():
+        yield server
+    gs.set_ratelimiter(ratelimiter)
+
+
+@pytest.fixture(autouse=True)
+def cookies(server):
+    server.requests.clear()
+    server.ratelimited.clear()
+    gs.set_cookies(dict(ltuid="1", ltoken="offline"), dict(ltuid="2", ltoken="offline"))
+    yield
+    gs.set_cookies()
+
+
+def test_user_stats(server):
+    stats = gs.get_user_stats(uid)
+    assert stats["stats"]["spiral_abyss"] == "12-3"
+    assert stats["characters"][0]["name"] == "Kamisato Ayaka"
+
+
+def test_lazy(server):
+    stats = gs.get_user_stats(uid, lazy=True)
+    assert stats["stats"]["spiral_abyss"] == "12-3"
+    assert stats.to_dict() == gs.get_user_stats(uid)
+    assert gs.get_user_stats(uid, raw=True)["stats"]["spiral_abyss"] == "12-3"
+
+    stats = gs.get_user_stats(uid, equipment=True, lazy=True)
+    assert isinstance(stats["characters"], gs.LazyList)
+    assert stats["characters"] == gs.get_user_stats(uid, equipment=True)["characters"]
+    assert gs.get_characters(uid, lazy=True) == gs.get_characters(uid)
+    assert "weapon" in gs.get_characters(uid, raw=True)[0]
+
+    abyss = gs.get_spiral_abyss(uid, lazy=True)
+    assert abyss["floors"] == gs.get_spiral_abyss(uid)["floors"]
+    assert dict(abyss) == gs.get_spiral_abyss(uid)
+    assert gs.get_tcg(uid, lazy=True).to_dict() == gs.get_tcg(uid)
+
+    # only the raw response is pickled
+    assert pickle.loads(pickle.dumps(stats)).to_dict() == stats.to_dict()
+    assert len(pickle.dumps(stats)) < len(pickle.dumps(stats.data)) + 100
+
+
+def test_equipment_concurrent(server):
+    server.latency = 0.05
+    try:
+        with ThreadPoolExecutor() as executor:
+            raw = executor.submit(gs.get_user_stats, uid, raw=True)
+            stats = executor.submit(gs.get_user_stats, uid)
+            equipment = executor.submit(gs.get_user_stats, uid, equipment=True)
+            raw, stats, equipment = raw.result(), stats.result(), equipment.result()
+    finally:
+        server.latency = 0
+    assert server.requests["game_record/genshin/api/index"] == 1  # the response was shared
+    assert "characters" not in raw
+    assert "weapon" not in stats["characters"][0]
+    assert "weapon" in equipment["characters"][0]
+
+
+def test_sqlite_cache_equipment(server, tmp_path):
+    gs.install_cache(gs.SqliteCache(str(tmp_path / "cache.db")))
+    try:
+        stats = gs.get_user_stats(uid, equipment=True)
+        assert gs.get_user_stats(uid, equipment=True) == stats
+        assert server.requests["game_record/genshin/api/character"] == 1
+        assert len(gs.get_all_user_data(uid)["characters"]) == 40
+    finally:
+        gs.uninstall_cache()
+
+
+def test_all_user_data(server):
+    data = gs.get_all_user_data(uid)
+    assert len(data["characters"]) == 40
+    assert len(data["spiral_abyss"]) == 2
+    assert server.requests["game_record/genshin/api/spiralAbyss"] == 2
+
+
+def test_aio(server):
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        cookies = [dict(ltuid="1", ltoken="offline")]
+        async with gs.AsyncGenshinClient(cookies, authkey=authkey) as client:
+            stats = await client.get_user_stats(uid, equipment=True)
+            history = [i async for i in client.get_wish_history()]
+            newest = [i async for i in client.get_wish_history(size=5)]
+            log = [i async for i in client.get_primogem_log()]
+
+            server.fail("game_record/genshin/api/index", 10102)
+            with pytest.raises(gs.DataNotPublic) as exc_info:
+                await client.get_user_stats(uid)
+            with pytest.raises(gs.InvalidAuthkey):
+                await client.get_wish_history(301, authkey="invalid").__anext__()
+            session = client._session
+        return stats, history, newest, log, exc_info.value, session
+
+    stats, history, newest, log, error, session = asyncio.run(main())
+    assert stats == gs.get_user_stats(uid, equipment=True)
+    assert len(history) == 45 * 4
+    assert [i["time"] for i in history] == sorted((i["time"] for i in history), reverse=True)
+    assert newest == history[:5]
+    assert log == list(gs.get_primogem_log(authkey=authkey))
+    assert error.endpoint == "/game_record/genshin/api/index"
+    assert session.closed
+
+
+def test_all_user_data_exceptions(server):
+    server.fail("game_record/genshin/api/gcg/basicInfo", 10102)
+    with pytest.raises(gs.DataNotPublic):
+        gs.get_all_user_data(uid)
+
+    server.fail("game_record/genshin/api/gcg/basicInfo", 10102)
+    data = gs.get_all_user_data(uid, return_exceptions=True)
+    assert isinstance(data["tcg"], gs.DataNotPublic)
+    assert data["stats"]["spiral_abyss"] == "12-3"
+    assert len(data["characters"]) == 40
+    assert all(isinstance(i, dict) for i in data["spiral_abyss"])
+
+    server.fail("game_record/genshin/api/spiralAbyss", 10102)
+    data = gs.get_all_user_data(uid, return_exceptions=True)
+    assert sorted(type(i).__name__ for i in data["spiral_abyss"]) == ["DataNotPublic", "dict"]
+    assert isinstance(data["tcg"], dict)
+
+    server.fail("game_record/genshin/api/index", 10102)
+    with pytest.raises(gs.DataNotPublic):
+        gs.get_all_user_data(uid, return_exceptions=True)  # stats are always required
+
+
+def test_connection_reuse(server):
+    gs.get_all_user_data(uid)
+    connections = server.connections
+    gs.get_all_user_data(uid)
+    # the second call borrows the sessions of the first, so no new connections are opened
+    assert server.connections == connections
+
+
+def test_wish_history(server):
+    history = list(gs.get_wish_history(301, authkey=authkey))
+    assert len(history) == 45
+    assert server.requests["gacha_info/getGachaLog"] == 3
+    assert [i["id"] for i in history] == sorted((i["id"] for i in history), reverse=True)
+
+    assert len(list(gs.get_wish_history(301, size=25, authkey=authkey))) == 25
+
+
+def test_wish_history_all(server):
+    history = list(gs.get_wish_history(authkey=authkey, prefetch=10))
+    assert len(history) == 45 * 4
+    assert [i["time"] for i in history] == sorted((i["time"] for i in history), reverse=True)
+
+
+def test_records(server):
+    history = list(gs.get_wish_history(authkey=authkey))
+    records = list(gs.get_wish_history(authkey=authkey, records=True))
+    assert records == history
+    assert records[0]["name"] == records[0].name and isinstance(records[0], gs.Wish)
+    assert pickle.loads(pickle.dumps(records)) == history
+    assert records[0].to_dict() == history[0]
+
+    log = list(gs.get_primogem_log(authkey=authkey, records=True))
+    assert log == list(gs.get_primogem_log(authkey=authkey))
+    assert log[0].reason == "Reason 1010"
+    assert list(gs.get_weapon_log(authkey=authkey, records=True))[0].keys() == {
+        "time", "name", "rarity", "amount", "reason", "reason_id", "uid", "id"
+    }
+
+
+def test_export(server, tmp_path):
+    history = list(gs.get_wish_history(301, authkey=authkey))
+    columns = gs.wish_history_to_columns(301, authkey=authkey)
+    assert len(columns) == 45
+    assert list(columns.rows()) == [tuple(i[k] for k in columns.schema) for i in history]
+    assert len(columns.categories["banner"]) == 1
+
+    batches = list(gs.iter_wish_history_columns(authkey=authkey, batch_size=50))
+    assert [len(b) for b in batches] == [65, 65, 50]  # batches are cut after full pages
+    assert batches[0].categories is batches[-1].categories
+
+    merged = gs.wish_history_to_columns(200, authkey=authkey)
+    merged.extend(columns)
+    assert list(merged.rows())[45:] == list(columns.rows())
+
+    path = str(tmp_path / "wishes.bin")
+    assert gs.write_binary(batches, path) == 180
+    assert list(gs.read_binary(path).rows()) == [row for b in batches for row in b.rows()]
+
+    log = gs.transactions_to_columns("weapon", authkey=authkey)
+    path = str(tmp_path / "weapons.csv")
+    assert gs.write_csv(log, path) == 30
+    with open(path, encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert rows[0]["name"] == "Cool Steel" and rows[0]["reason"] == "Reason 1010"
+
+
+def test_export_numpy(server):
+    np = pytest.importorskip("numpy")
+    columns = gs.wish_history_to_columns(authkey=authkey)
+    arrays = columns.to_numpy()
+    assert list(arrays) == list(columns.schema)
+    for name in ("id", "uid", "banner_type", "rarity", "name", "type", "banner"):
+        assert arrays[name].tolist() == columns[name]
+    assert arrays["name"].dtype == object and arrays["id"].dtype == np.int64
+    times = np.datetime_as_string(arrays["time"], unit="s").tolist()
+    assert [t.replace("T", " ") for t in times] == columns["time"]
+
+
+def test_export_arrow(server):
+    pytest.importorskip("pyarrow")
+    columns = gs.wish_history_to_columns(authkey=authkey)
+    table = columns.to_arrow()
+    assert table.column_names == list(columns.schema) and table.num_rows == len(columns)
+    for name in ("id", "uid", "banner_type", "rarity", "name", "type", "banner"):
+        assert table.column(name).to_pylist() == columns[name]
+
+    # categories keep their codes instead of being decoded
+    name = table.column("name").combine_chunks()
+    assert name.indices.to_pylist() == columns.arrays["name"].tolist()
+    assert name.dictionary.to_pylist() == columns.categories["name"]
+    times = [t.strftime("%Y-%m-%d %H:%M:%S") for t in table.column("time").to_pylist()]
+    assert times == columns["time"]
+
+    # the columns can still be built further while the table is alive
+    columns.extend(gs.wish_history_to_columns(301, authkey=authkey))
+    assert len(columns) == table.num_rows + 45
+    assert table.column("id").to_pylist() == columns["id"][: table.num_rows]
+
+
+def test_transactions(server):
+    log = list(gs.get_primogem_log(authkey=authkey))
+    assert len(log) == 30
+    assert log[0]["reason"] == "Reason 1010"
+
+
+def test_ratelimit_rotation(server):
+    server.ratelimited.add("1")
+    gs.get_notes(uid)
+    gs.get_notes(uid)
+    # the ratelimited cookie is only tried once
+    assert server.requests["game_record/genshin/api/dailyNote"] == 3
+
+    server.ratelimited.add("2")
+    with pytest.raises(gs.TooManyRequests):
+        gs.get_notes(uid + 1)
+
+
+def test_aio_ratelimit_rotation(server):
+    pytest.importorskip("aiohttp")
+    server.ratelimited.add("1")
+
+    async def main():
+        cookies = [dict(ltuid="1", ltoken="offline"), dict(ltuid="2", ltoken="offline")]
+        async with gs.AsyncGenshinClient(cookies) as client:
+            # every concurrent request tries the ratelimited cookie at most once
+            await asyncio.gather(*(client.get_notes(uid) for _ in range(4)))
+            assert server.requests["game_record/genshin/api/dailyNote"] <= 8
+
+            # afterwards it's skipped
+            server.requests.clear()
+            await client.get_notes(uid)
+            assert server.requests["game_record/genshin/api/dailyNote"] == 1
+
+            server.ratelimited.add("2")
+            with pytest.raises(gs.TooManyRequests):
+                await client.get_notes(uid + 1)
+
+    asyncio.run(main())
+
+
+def test_injected_error(server):
+    server.fail("game_record/genshin/api/index", 10102)
+    with pytest.raises(gs.DataNotPublic) as exc_info:
+        gs.get_user_stats(uid, cookie=dict(ltuid="1", ltoken="offline"))
+    gs.get_user_stats(uid)
+
+    error = exc_info.value
+    assert error.retcode == 10102 and error.endpoint == "/game_record/genshin/api/index"
+    assert error.cookie_id == gs.cookiepool._get_cookie_id(dict(ltuid="1", ltoken="offline"))
+    assert error.retry_after is None
+
+
+def test_register_error(server, monkeypatch):
+    monkeypatch.setitem(gs.errors._errors, (-9999, None), (gs.SignInException, "{} - {}"))
+    server.fail("game_record/genshin/api/index", -9999, "Custom")
+    with pytest.raises(gs.SignInException, match="-9999 - Custom"):
+        gs.get_user_stats(uid)
+
+    monkeypatch.setattr(gs.errors, "_errors", gs.errors._errors.copy())  # registrations are undone
+    gs.register_error(-9999, gs.DataNotPublic, "Hidden", "Hidden")
+    server.fail("game_record/genshin/api/index", -9999, "Hidden")
+    with pytest.raises(gs.DataNotPublic):
+        gs.get_user_stats(uid)
+
+
+def test_authkey_errors(server):
+    with pytest.raises(gs.AuthkeyTimeout):
+        list(gs.get_wish_history(301, authkey="expired"))
+    with pytest.raises(gs.InvalidAuthkey):
+        list(gs.get_wish_history(301, authkey="invalid"))
+
+
+def test_daily_reward(server):
+    cookie = dict(ltuid="10", ltoken="offline")
+    assert gs.claim_daily_reward(cookie=cookie) is not None
+    assert gs.claim_daily_reward(cookie=cookie) is None
+    assert len(list(gs.get_claimed_rewards())) == 3
+
+
+def test_claim_daily_rewards(server):
+    cookies = [dict(ltuid=str(i), ltoken="offline") for i in range(20, 25)] + [{}]
+    results = list(gs.claim_daily_rewards(cookies, max_workers=4))
+    assert len(results) == 6
+    assert sum(r.ok for r in results) == 5
+    assert all(r.result is not None for r in results if r.ok)
+    assert all(r.result is None for r in gs.claim_daily_rewards(cookies[:5]))
+
+
+def test_claim_daily_rewards_order(server, monkeypatch):
+    def claim_daily_reward(cookie, **kwargs):
+        time.sleep((30 - int(cookie["ltuid"])) / 20)
+        return cookie["ltuid"]
+
+    monkeypatch.setattr(gs.daily, "claim_daily_reward", claim_daily_reward)
+    cookies = [dict(ltuid=str(i), ltoken="offline") for i in range(27, 30)]
+    # the slowest cookie is first but its result comes last
+    assert [r.result for r in gs.claim_daily_rewards(cookies)] == ["29", "28", "27"]
+
+
+def test_redeem_codes(server, monkeypatch):
+    waited = []
+    monkeypatch.setattr(gs.ratelimit, "sleep", waited.append)
+    gs.set_ratelimiter(gs.RateLimiter())
+    try:
+        cookies = [dict(ltuid=str(i), ltoken="offline") for i in range(30, 33)]
+        results = list(gs.redeem_codes(cookies, ["CODE1", "CODE2"]))
+    finally:
+        gs.set_ratelimiter(None)
+    # the low level account is skipped, every cookie redeems both codes for the same account
+    assert len(results) == 6
+    assert {r.uid for r in results} == {710785423}
+    assert sum(r.ok for r in results) == 2
+    assert all(isinstance(r.error, gs.CodeRedeemException) for r in results if not r.ok)
+    # cookies wait only for their own previous code
+    assert len(waited) == 3 and all(4.9 < w <= 5 for w in waited)
+
+
+def test_redeem_codes_without_ratelimiter(server, monkeypatch):
+    waited = []
+    monkeypatch.setattr(gs.scheduler.time, "sleep", waited.append)
+    results = list(gs.redeem_codes([dict(ltuid="30", ltoken="offline")], ["CODE1", "CODE2"]))
+    assert len(results) == 2
+    assert waited == [5]
+
+
+def test_single_flight(server):
+    server.latency = 0.1
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: gs.get_notes(uid), range(8)))
+    finally:
+        server.latency = 0
+    assert server.requests["game_record/genshin/api/dailyNote"] == 1
+    assert all(r == results[0] for r in results)
+
+
+def test_cookie_renewal(server):
+    server.renew_cookies = {"ltoken": "renewed"}
+    try:
+        cookie = dict(ltuid="3", ltoken="offline")
+        gs.get_notes(uid, cookie=cookie)
+        assert cookie["ltoken"] == "renewed"
+        assert gs.genshinstats.cookies[0]["ltoken"] == "offline"
+    finally:
+        server.renew_cookies = {}
+
+
+def test_retries(server, monkeypatch):
+    policy = gs.genshinstats.retry_policy
+    monkeypatch.setattr(policy, "backoff", 0)
+    route = "game_record/genshin/api/index"
+
+    server.fail(route, -1)
+    server.fail(route, status=503, retry_after=0)
+    gs.get_user_stats(uid)
+    assert server.requests[route] == 3
+
+    server.fail(route, -1, times=3)
+    with pytest.raises(gs.GenshinStatsException) as exc_info:
+        gs.get_user_stats(uid)
+    assert exc_info.value.retcode == -1
+    assert exc_info.value.retries == 2
+
+
+def test_ratelimit(server, monkeypatch):
+    waited = []
+    monkeypatch.setattr(gs.ratelimit, "sleep", waited.append)
+    gs.set_ratelimiter(gs.RateLimiter({"game_record": gs.Limit(1, 2)}))
+    try:
+        for _ in range(4):
+            gs.get_notes(uid, cookie=dict(ltuid="1", ltoken="offline"))
+        gs.get_notes(uid, cookie=dict(ltuid="2", ltoken="offline"))
+    finally:
+        gs.set_ratelimiter(None)
+    # the first two requests use up the burst, the cookie doesn't share the bucket
+    assert len(waited) == 2
+    assert 0.9 < waited[0] < 1 and 1.9 < waited[1] < 2
+
+
+def test_fetch_many(server):
+    results = dict(gs.get_user_stats_many([uid, uid + 1, 310785423, uid + 2], max_workers=2))
+    assert len(results) == 4
+    assert isinstance(results[310785423], gs.AccountNotFound)
+    assert results[uid]["stats"]["spiral_abyss"] == "12-3"
+
+    server.fail("game_record/genshin/api/index", 10102)
+    results = dict(gs.get_user_stats_many([uid, uid + 1], max_workers=1))
+    assert sum(isinstance(r, gs.DataNotPublic) for r in results.values()) == 1
+
+
+def test_fetch_many_order():
+    def get(uid, cookie=None):
+        time.sleep((uid % 10) / 20)
+        return uid
+
+    uids = [710000003, 710000001, 710000002, 710000000]
+    assert [r for _, r in gs.fetch_many(get, uids, max_workers=4)] == sorted(uids)
+
+
+def test_fetch_many_bounded():
+    lock = threading.Lock()
+    running = [0, 0]  # current, max
+    read = []
+
+    def get(uid, cookie=None):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return uid
+
+    def uids():
+        for uid in itertools.count(710000000):
+            read.append(uid)
+            yield uid
+
+    results = list(itertools.islice(gs.fetch_many(get, uids(), max_workers=3), 10))
+    assert len(results) == 10 and all(uid == r for uid, r in results)
+    assert running[1] <= 3
+    assert len(read) <= 10 + 3 * 2 * 2  # only a window of uids is read ahead
@@ -0,0 +1,31 @@
+import genshinstats as gs
+import pytest
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_token_bucket(tmp_path, backend):
+    if backend == "memory":
+        backend = gs.MemoryBackend()
+    else:
+        backend = gs.SqliteBackend(str(tmp_path / "ratelimits.db"))
+    limit = gs.Limit(rate=0.5, burst=2)
+
+    assert [backend.reserve("a", limit, 0) for _ in range(4)] == [0, 0, 2, 4]
+    assert backend.reserve("b", limit, 0) == 0
+    # two tokens were refilled but both were already reserved
+    assert backend.reserve("a", limit, 4) == 2
+    assert backend.reserve("a", limit, 100) == 0
+
+
+def test_shared_sqlite(tmp_path):
+    path = str(tmp_path / "ratelimits.db")
+    limit = gs.Limit(rate=1, burst=1)
+    assert gs.SqliteBackend(path).reserve("a", limit, 0) == 0
+    assert gs.SqliteBackend(path).reserve("a", limit, 0) == 1
+
+
+def test_families():
+    assert gs.get_family("https://sg-hk4e-api.hoyoverse.com/common/apicdkey/api/webExchangeCdkey") == "redeem"
+    assert gs.get_family("https://hk4e-api-os.hoyoverse.com/event/gacha_info/api/getGachaLog") == "gacha"
+    assert gs.get_family("https://sg-hk4e-api.hoyolab.com/event/sol/sign") == "daily"
+    assert gs.get_family("https://api-os-takumi.mihoyo.com/community/misc/wapi/langs") is None
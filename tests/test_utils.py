@@ -0,0 +1,85 @@
+import threading
+import time
+
+import genshinstats as gs
+import pytest
+
+
+def test_single_flight():
+    flight = gs.SingleFlight()
+    calls = []
+    results = []
+
+    def get_data(x):
+        calls.append(x)
+        time.sleep(0.1)
+        if x < 0:
+            raise ValueError(x)
+        return [x]
+
+    def worker(x):
+        try:
+            results.append(flight.do(x, get_data, x))
+        except ValueError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=worker, args=(x,)) for x in (1, 1, 1, -1, -1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == [-1, 1]
+    assert results.count([1]) == 3
+    assert len({id(r) for r in results if isinstance(r, ValueError)}) == 1
+    assert len(flight) == 0
+
+    # finished calls are not remembered
+    assert flight.do(1, get_data, 1) == [1]
+    assert len(calls) == 3
+
+    with pytest.raises(ValueError):
+        flight.do(-1, get_data, -1)
+
+
+def test_retry_policy(monkeypatch):
+    delays = []
+    monkeypatch.setattr(gs.utils.time, "sleep", delays.append)
+    policy = gs.RetryPolicy(tries=4, exceptions=KeyError, backoff=1, budget=3)
+    calls = []
+
+    @policy.wrap()
+    def get_data(fail):
+        calls.append(fail)
+        if len(calls) <= fail:
+            raise KeyError(len(calls))
+        return len(calls)
+
+    assert get_data(2) == 3
+    assert 0 <= delays[0] <= 1 and 0 <= delays[1] <= 2
+
+    # only one retry is left in the budget
+    calls.clear()
+    with pytest.raises(KeyError) as exc_info:
+        get_data(5)
+    assert exc_info.value.retries == 1
+    assert policy.stats == {"retries": 3, "budget_exhausted": 1}
+
+    with pytest.raises(ValueError):
+        policy.call("key", int, "a")
+    assert len(calls) == 2
+
+
+def test_retry():
+    calls = []
+
+    with pytest.warns(PendingDeprecationWarning, match="RetryPolicy"):
+
+        @gs.utils.retry(3, KeyError)
+        def get_data():
+            calls.append(1)
+            if len(calls) < 3:
+                raise KeyError(len(calls))
+            return len(calls)
+
+    assert get_data() == 3
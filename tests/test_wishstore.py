@@ -0,0 +1,54 @@
+import genshinstats as gs
+import pytest
+
+
+@pytest.fixture()
+def history(monkeypatch):
+    pulls = []
+    requests = []
+
+    def fetch_gacha_endpoint(endpoint, authkey=None, **kwargs):
+        params = kwargs.get("params", {})
+        requests.append(endpoint)
+        if endpoint == "getConfigList":
+            return {"gacha_type_list": [{"key": "200", "name": "Permanent Wish"}]}
+
+        end_id = params["end_id"]
+        page = [p for p in reversed(pulls) if not end_id or p < end_id][: params["size"]]
+        return {
+            "list": [
+                {
+                    "uid": "710785423",
+                    "gacha_type": "200",
+                    "item_type": "Weapon",
+                    "name": "Cool Steel",
+                    "rank_type": "5" if i % 10 == 0 else "3",
+                    "time": f"2021-01-{i // 100 + 1:02} 00:{i // 60 % 60:02}:{i % 60:02}",
+                    "id": str(i),
+                }
+                for i in page
+            ]
+        }
+
+    monkeypatch.setattr(gs.wishes, "fetch_gacha_endpoint", fetch_gacha_endpoint)
+    monkeypatch.setattr(gs.wishes, "get_banner_types", lambda *args: {200: "Permanent Wish"})
+    return pulls, requests
+
+
+def test_sync(tmp_path, history):
+    pulls, requests = history
+    store = gs.WishHistoryStore(str(tmp_path / "wishes.db"))
+
+    pulls.extend(range(1, 51))
+    assert store.sync(authkey="") == 50
+    assert len(requests) == 3
+
+    requests.clear()
+    pulls.extend(range(51, 56))
+    assert store.sync(authkey="") == 5
+    assert len(requests) == 1
+
+    history = list(store.get_wish_history(710785423))
+    assert [p["id"] for p in history] == list(range(55, 0, -1))
+    assert [p["id"] for p in store.get_wish_history(710785423, rarity=5)] == [50, 40, 30, 20, 10]
+    assert len(list(store.get_wish_history(710785423, since="2021-01-01 00:00:30"))) == 26